@@ -32,8 +32,12 @@ from castervoice.lib import control
 if control.nexus() is None:
     from castervoice.lib.ctrl.mgr.loading.load.content_loader import ContentLoader
     from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
+    from castervoice.lib.ctrl.mgr.loading.load.indexed_content_request_generator import \
+        IndexedContentRequestGenerator
     _crg = ContentRequestGenerator()
-    _content_loader = ContentLoader(_crg)
+    if settings.settings(["miscellaneous", "content_scan_index"], True):
+        _crg = IndexedContentRequestGenerator(settings.SETTINGS["paths"]["CONTENT_INDEX_PATH"])
+    _content_loader = ContentLoader(_crg, settings.settings(["miscellaneous", "defer_disabled_rules"], True))
     control.init_nexus(_content_loader)
 
 if settings.SETTINGS["sikuli"]["enabled"]:
@@ -11,6 +11,7 @@ finally:
     from castervoice.asynch.hmc.hmc_confirm import HomunculusConfirm
     from castervoice.asynch.hmc.homunculus import Homunculus
     from castervoice.lib import settings
+    from castervoice.lib.merge.communication import Communicator
 '''
 To add a new homunculus (pop-up ui window) type:
     (1) create the module
@@ -21,16 +22,34 @@ To add a new homunculus (pop-up ui window) type:
 
 
 def launch(hmc_type, data=None):
+    '''returns the launch id to take the pop-up window's response with
+    (see AsynchronousAction.hmc_complete), or None if Caster isn't listening for it'''
     from dragonfly import (WaitWindow, FocusWindow, Key)
+    launch_id = _listen_for_response()
     instructions = _get_instructions(hmc_type)
     if data is not None:  # and callback!=None:
         instructions.append(data)
-    Popen(instructions)
+    environment = os.environ.copy()
+    if launch_id is not None:
+        environment[Communicator.HMC_LAUNCH_ID_VARIABLE] = str(launch_id)
+    Popen(instructions, env=environment)
 
     hmc_title = _get_title(hmc_type)
     WaitWindow(title=hmc_title, timeout=5).execute()
     FocusWindow(title=hmc_title).execute()
     Key("tab").execute()
+    return launch_id
+
+
+def _listen_for_response():
+    '''the pop-up window sends its response to Caster as soon as it's complete,
+    if Caster is listening; otherwise Caster polls the window for it'''
+    from castervoice.lib import control
+    if settings.settings(["miscellaneous", "hmc_push_responses"], True):
+        responses = control.nexus().hmc_responses
+        if responses.start():
+            return responses.new_launch()
+    return None
 
 
 def _get_instructions(hmc_type):
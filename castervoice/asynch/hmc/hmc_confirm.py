@@ -44,3 +44,4 @@ class HomunculusConfirm(Homunculus):
             self.completed = True
             '''1 is True, 2 is False'''
             self.value = 1 if action else 2
+            self.push_response()
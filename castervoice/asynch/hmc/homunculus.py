@@ -1,11 +1,9 @@
 import sys
 import six
 if six.PY2:
-    from SimpleXMLRPCServer import SimpleXMLRPCServer  # pylint: disable=import-error
     from Tkinter import Label, Text
     import Tkinter as tk
 else:
-    from xmlrpc.server import SimpleXMLRPCServer # pylint: disable=no-name-in-module
     from tkinter import Label, Text
     import tkinter as tk
 import signal, os
@@ -18,6 +16,7 @@ try:  # Style C -- may be imported into Caster, or externally
 finally:
     from castervoice.lib import settings
     from castervoice.lib.merge.communication import Communicator
+    from castervoice.lib.merge.framed_rpc import CasterRPCServer
 
 
 class Homunculus(tk.Tk):
@@ -66,9 +65,7 @@ class Homunculus(tk.Tk):
     def setup_xmlrpc_server(self):
         self.server_quit = 0
         comm = Communicator()
-        self.server = SimpleXMLRPCServer(
-            (Communicator.LOCALHOST, comm.com_registry["hmc"]),
-            logRequests=False, allow_none=True)
+        self.server = CasterRPCServer((Communicator.LOCALHOST, comm.com_registry["hmc"]))
         self.server.register_function(self.xmlrpc_do_action, "do_action")
         self.server.register_function(self.xmlrpc_complete, "complete")
         self.server.register_function(self.xmlrpc_get_message, "get_message")
@@ -83,6 +80,11 @@ class Homunculus(tk.Tk):
         self.completed = True
         self.after(10, self.withdraw)
         Timer(self.max_after_completed, self.xmlrpc_kill).start()
+        self.push_response()
+
+    def push_response(self):
+        '''sends the response to Caster now that it's complete, instead of waiting to be asked for it'''
+        Communicator().push_hmc_response(self.xmlrpc_get_message)
 
     def xmlrpc_get_message(self):
         '''override this for every new child class'''
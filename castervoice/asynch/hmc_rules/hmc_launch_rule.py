@@ -14,8 +14,8 @@ def receive_settings(data):
 
 
 def settings_window():
-    h_launch.launch(settings.WXTYPE_SETTINGS)
-    on_complete = AsynchronousAction.hmc_complete(lambda data: receive_settings(data))
+    launch_id = h_launch.launch(settings.WXTYPE_SETTINGS)
+    on_complete = AsynchronousAction.hmc_complete(lambda data: receive_settings(data), launch_id)
     AsynchronousAction(
         [L(S(["cancel"], on_complete))],
         time_in_seconds=1,
@@ -9,10 +9,8 @@ import threading as th
 import time
 from dragonfly import monitors
 if six.PY2:
-    from SimpleXMLRPCServer import SimpleXMLRPCServer  # pylint: disable=import-error
     import Tkinter as tk
 else:
-    from xmlrpc.server import SimpleXMLRPCServer  # pylint: disable=no-name-in-module
     import tkinter as tk
 try:  # Style C -- may be imported into Caster, or externally
     BASE_PATH = os.path.realpath(__file__).rsplit(os.path.sep + "castervoice", 1)[0]
@@ -22,6 +20,7 @@ finally:
     from castervoice.lib import settings, utilities
     from castervoice.lib.actions import Mouse
     from castervoice.lib.merge.communication import Communicator
+    from castervoice.lib.merge.framed_rpc import CasterRPCServer
     settings.initialize()
 try:
     from PIL import ImageGrab, ImageTk, ImageDraw, ImageFont
@@ -86,9 +85,7 @@ class TkTransparent(tk.Tk):
 
     def setup_xmlrpc_server(self):
         comm = Communicator()
-        self.server = SimpleXMLRPCServer(
-            (Communicator.LOCALHOST, comm.com_registry["grids"]),
-            logRequests=False, allow_none=True)
+        self.server = CasterRPCServer((Communicator.LOCALHOST, comm.com_registry["grids"]))
         self.server.register_function(self.xmlrpc_kill, "kill")
 
     def pre_redraw(self):
@@ -3,8 +3,6 @@ import os
 import sys
 import threading
 
-from xmlrpc.server import SimpleXMLRPCServer  # pylint: disable=no-name-in-module
-
 try:  # Style C -- may be imported into Caster, or externally
     BASE_PATH = os.path.realpath(__file__).rsplit(os.path.sep + "castervoice", 1)[0]
     if BASE_PATH not in sys.path:
@@ -13,6 +11,7 @@ finally:
     from castervoice.lib import printer
     from castervoice.lib import settings
     from castervoice.lib.merge.communication import Communicator
+    from castervoice.lib.merge.framed_rpc import CasterRPCServer
 
 # TODO: Remove this try wrapper when CI server supports Qt
 try:
@@ -103,6 +102,7 @@ class SettingsDialog(QDialog):
         elif event.type() == RPC_COMPLETE_EVENT:
             self.completed = True
             self.hide()
+            Communicator().push_hmc_response(self.xmlrpc_get_message)
             return True
         return QDialog.event(self, event)
 
@@ -231,8 +231,8 @@ class SettingsDialog(QDialog):
 def main():
     server_address = (Communicator.LOCALHOST, Communicator().com_registry["hmc"])
     # Enabled by default logging causes RPC to malfunction when the GUI runs on
-    # pythonw.  Explicitly disable logging for the XML server.
-    server = SimpleXMLRPCServer(server_address, logRequests=False, allow_none=True)
+    # pythonw; CasterRPCServer doesn't log requests.
+    server = CasterRPCServer(server_address)
     app = QApplication(sys.argv)
     window = SettingsDialog(server)
     window.show()
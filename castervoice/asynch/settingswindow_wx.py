@@ -5,11 +5,6 @@ import six
 import sys
 import threading
 
-if six.PY2:
-    from SimpleXMLRPCServer import SimpleXMLRPCServer   # pylint: disable=import-error
-else:
-    from xmlrpc.server import SimpleXMLRPCServer  # pylint: disable=no-name-in-module
-
 try:  # Style C -- may be imported into Caster, or externally
     BASE_PATH = os.path.realpath(__file__).rsplit(os.path.sep + "castervoice", 1)[0]
     if BASE_PATH not in sys.path:
@@ -18,6 +13,7 @@ finally:
     from castervoice.lib import printer
     from castervoice.lib import settings
     from castervoice.lib.merge.communication import Communicator
+    from castervoice.lib.merge.framed_rpc import CasterRPCServer
 
 try:
     from wx import (Notebook, NB_MULTILINE, Menu, ID_EXIT, EVT_MENU, MenuBar, BoxSizer,
@@ -106,11 +102,13 @@ class SettingsFrame(Frame):
     def OnComplete(self, event):
         self.completed = True
         self.Hide()
+        Communicator().push_hmc_response(self.xmlrpc_get_message)
 
     def prepare_for_exit(self, e):
         self.Hide()
         self.completed = True
         threading.Timer(10, self.xmlrpc_kill).start()
+        Communicator().push_hmc_response(self.xmlrpc_get_message)
 
     def tree_to_dictionary(self, t=None):
         d = {}
@@ -234,8 +232,8 @@ class SettingsFrame(Frame):
 def main():
     server_address = (Communicator.LOCALHOST, Communicator().com_registry["hmc"])
     # Enabled by default logging causes RPC to malfunction when the GUI runs on
-    # pythonw.  Explicitly disable logging for the XML server.
-    server = SimpleXMLRPCServer(server_address, logRequests=False, allow_none=True)
+    # pythonw; CasterRPCServer doesn't log requests.
+    server = CasterRPCServer(server_address)
     app = App(False)
     SettingsFrame(None,
                   settings.SETTINGS_WINDOW_TITLE + settings.SOFTWARE_VERSION_NUMBER,
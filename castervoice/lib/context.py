@@ -1,6 +1,7 @@
 import time
 
-from dragonfly import AppContext, Pause
+import dragonfly
+from dragonfly import AppContext, Context, Pause
 
 from castervoice.lib import utilities, settings
 from castervoice.lib.actions import Key
@@ -185,3 +186,81 @@ def nav(parameters):
     if result:
         Key(str(parameters[0])).execute()
     return result
+
+
+class ForegroundContextCache(object):
+    """
+    Remembers which contexts match the foreground window, until the window changes.
+
+    Every grammar's context is matched at the start of every utterance, and
+    most of them are AppContexts, which only depend on the window. So the window's
+    identity (executable, title, handle) is compared once per match, and an
+    AppContext is only matched again when the identity has changed.
+
+    Only plain AppContexts are remembered: anything else (a FuncContext, aenea's
+    ProxyAppContext, ...) may change without the foreground window changing.
+    """
+
+    def __init__(self):
+        self._window = None
+        self._matches = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_cacheable(context):
+        return type(context) is dragonfly.AppContext
+
+    def cached(self, context):
+        """
+        :param context: Context or None
+        :return: a context which matches the same windows as the given context,
+            through this cache if the context is cacheable
+        """
+        if not ForegroundContextCache.is_cacheable(context):
+            return context
+        return CachedContext(context, self)
+
+    def matches(self, context, executable, title, handle):
+        window = (executable, title, handle)
+        if window != self._window:
+            self._window = window
+            self._matches = {}
+        result = self._matches.get(context)
+        if result is not None:
+            self.hits += 1
+            return result
+        # only cacheable contexts are ever in _matches
+        result = context.matches(executable, title, handle)
+        if ForegroundContextCache.is_cacheable(context):
+            self.misses += 1
+            self._matches[context] = result
+        return result
+
+
+class CachedContext(Context):
+    """
+    Matches the same windows as the wrapped context, through a ForegroundContextCache.
+    """
+
+    def __init__(self, context, context_cache):
+        super(CachedContext, self).__init__()
+        self._context = context
+        self._context_cache = context_cache
+        self._str = str(context)
+
+    def get_context(self):
+        return self._context
+
+    def matches(self, executable, title, handle):
+        return self._context_cache.matches(self._context, executable, title, handle)
+
+
+_FOREGROUND_CONTEXT_CACHE = None
+
+
+def get_foreground_context_cache():
+    global _FOREGROUND_CONTEXT_CACHE
+    if _FOREGROUND_CONTEXT_CACHE is None:
+        _FOREGROUND_CONTEXT_CACHE = ForegroundContextCache()
+    return _FOREGROUND_CONTEXT_CACHE
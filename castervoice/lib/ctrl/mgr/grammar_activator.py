@@ -33,12 +33,21 @@ class GrammarActivator(object):
         trigger = self._get_trigger(managed_rule)
         self._class_name_to_trigger[managed_rule.get_rule_class_name()] = trigger
 
+    def register_trigger(self, rule_class_name, trigger):
+        """
+        register a rule which hasn't been imported yet, by an already known trigger
+        """
+        self._class_name_to_trigger[rule_class_name] = trigger
+
+    def get_registered_trigger(self, rule_class_name):
+        return self._class_name_to_trigger.get(rule_class_name)
+
     def _get_trigger(self, managed_rule):
         """
         Ideally we're dealing with a MergeRule and the trigger is its pronunciation. But since
         GrammarManager also manages pure Dragonfly rules, we might need to derive the name otherwise.
         """
-        rule_instance = managed_rule.get_rule_instance()
+        rule_instance = managed_rule.get_prototype()
         if self._merge_rule_checker_fn(rule_instance):
             return rule_instance.get_pronunciation()
         if managed_rule.get_details().name is not None:
@@ -9,11 +9,19 @@ class BasicGrammarContainer(BaseGrammarContainer):
 
     def __init__(self):
         """
-        ccr grammars ALL get wiped every merge = list
+        ccr grammars ALL get replaced every merge = list
         non-ccr grammars get turned on/off one at a time = dict
         """
         self._ccr_grammars = []
+        # content keys of the ccr grammars, taken before they were loaded (which adds the referenced rules)
+        self._ccr_keys = []
         self._non_ccr_grammars = {}
+        # engine load/unload calls for CCR grammars: in total, and in the last set_ccr()
+        self.ccr_loads = 0
+        self.ccr_unloads = 0
+        self.last_ccr_loads = 0
+        self.last_ccr_unloads = 0
+        self.last_ccr_reuses = 0
 
     def set_non_ccr(self, rcn, grammar):
         if rcn in self._non_ccr_grammars:
@@ -25,14 +33,68 @@ class BasicGrammarContainer(BaseGrammarContainer):
             self._non_ccr_grammars[rcn] = grammar
 
     def set_ccr(self, ccr_grammars):
-        # first, wipe out old ccr rules
-        for ccr_grammar in self._ccr_grammars:
+        """
+        Loads the new CCR grammars, except that a loaded grammar with exactly the
+        same content (see CCRMerger2) is kept instead of its replacement (taking
+        the replacement's context, so nothing from the old merge stays in use),
+        and only unloads the old ones which weren't kept. Loading a grammar is
+        expensive for some engines (e.g. Kaldi compiles it).
+
+        :param ccr_grammars: list of unloaded Grammars
+        """
+        reusable = {}
+        for old_grammar, key in zip(self._ccr_grammars, self._ccr_keys):
+            if key is not None:
+                reusable.setdefault(key, []).append(old_grammar)
+
+        kept = []
+        new_grammars = []
+        new_keys = []
+        to_load = []
+        for grammar in ccr_grammars:
+            key = BasicGrammarContainer._get_content_key(grammar)
+            if key is not None and len(reusable.get(key, [])) > 0:
+                old_grammar = reusable[key].pop(0)
+                # the same context, but the new one is part of the current merge (e.g. its CCRContextIndex)
+                old_grammar._context = grammar._context
+                kept.append(old_grammar)
+                new_grammars.append(old_grammar)
+            else:
+                to_load.append(grammar)
+                new_grammars.append(grammar)
+            new_keys.append(key)
+
+        # first, wipe out old ccr rules which aren't kept
+        to_unload = [grammar for grammar in self._ccr_grammars if grammar not in kept]
+        for ccr_grammar in to_unload:
             BasicGrammarContainer._empty_grammar(ccr_grammar)
-        self._ccr_grammars = ccr_grammars
+        self._ccr_grammars = new_grammars
+        self._ccr_keys = new_keys
+        for ccr_grammar in to_load:
+            ccr_grammar.load()
+
+        self.last_ccr_loads = len(to_load)
+        self.last_ccr_unloads = len(to_unload)
+        self.last_ccr_reuses = len(kept)
+        self.ccr_loads += self.last_ccr_loads
+        self.ccr_unloads += self.last_ccr_unloads
 
     def wipe_ccr(self):
         self.set_ccr([])
 
+    @staticmethod
+    def _get_content_key(grammar):
+        """
+        :param grammar: Grammar, not loaded yet
+        :return: hashable, or None if any of the grammar's rules doesn't say what's in it
+        """
+        rule_keys = []
+        for rule in grammar.rules:
+            if not hasattr(rule, "content_key"):
+                return None
+            rule_keys.append(rule.content_key)
+        return str(grammar._context), tuple(rule_keys)
+
     @staticmethod
     def _empty_grammar(grammar):
         # disable all of the grammar's rules
@@ -1,4 +1,4 @@
-import os, traceback
+import os, time, traceback
 
 from dragonfly import Grammar
 
@@ -7,7 +7,7 @@ from castervoice.lib.ctrl.mgr.errors.invalid_companion_configuration_error impor
 from castervoice.lib.ctrl.mgr.errors.not_a_module import NotAModuleError
 from castervoice.lib.ctrl.mgr.loading.load.content_type import ContentType
 from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
-from castervoice.lib.ctrl.mgr.rule_formatter import _set_rdescripts
+from castervoice.lib.ctrl.mgr.rule_formatter import _forget_rdescripts, _register_rdescripts
 from castervoice.lib.ctrl.mgr.rules_enabled_diff import RulesEnabledDiff
 from castervoice.lib.merge.ccrmerging2.hooks.events.activation_event import RuleActivationEvent
 from castervoice.lib.merge.ccrmerging2.hooks.events.on_error_event import OnErrorEvent
@@ -31,7 +31,8 @@ class GrammarManager(object):
                  smrc,
                  t_runner,
                  companion_config,
-                 combo_validator):
+                 combo_validator,
+                 startup_cache=None):
         """
         Holds both the current merged ccr rules and the most recently instantiated/validated
         copies of all ccr and non-ccr rules.
@@ -52,6 +53,8 @@ class GrammarManager(object):
         :param t_runner: a reference is kept to it so can instantly activate its activation rule
         :param companion_config: a config which controls which rules can be enabled/disabled instantly by other rules
         :param combo_validator: validates all (ccr/non-ccr) rule+detail combinations
+        :param startup_cache: StartupCache or None; remembers validation results and rules' triggers
+            between restarts
         """
         self._config = config
         self._merger = merger
@@ -67,18 +70,25 @@ class GrammarManager(object):
         self._transformers_runner = t_runner
         self._companion_config = companion_config
         self._combo_validator = combo_validator
+        self._startup_cache = startup_cache
 
         # rules: (class name : ManagedRule}
         self._managed_rules = {}
+        # rules which haven't been imported yet: {class name: ContentRequest}
+        self._deferred_rules = {}
         #
         self._reload_observable.register_listener(self)
         '''The passed method references below would be a good place to start splitting the GM apart.'''
         #
         self._activator.set_activation_fn(lambda rcn, active: self._change_rule_enabled(rcn, active))
         #
-        smrc.set_reload_fn(lambda rcn: self._delegate_enable_rule(rcn, True))
+        smrc.set_reload_fn(lambda rcn: self._reset_rule(rcn))
         #
         self._initial_activations_complete = False
+        # rule instantiations: see get_instantiation_counts()
+        self._instantiations_before_startup = ManagedRule.get_instantiation_count()
+        self._startup_instantiations = None
+        self._last_remerge_instantiations = None
 
     def initialize(self):
         if self._initial_activations_complete:
@@ -101,7 +111,11 @@ class GrammarManager(object):
         if is_timer_based_reload_observable:
             self._reload_observable.start()
 
+        if self._startup_cache is not None:
+            self._startup_cache.save()
+
         self._initial_activations_complete = True
+        self._startup_instantiations = ManagedRule.get_instantiation_count() - self._instantiations_before_startup
 
     def register_rule(self, rule_class, details):
         """
@@ -114,26 +128,71 @@ class GrammarManager(object):
         :return:
         """
         class_name = rule_class.__name__
+        managed_rule = ManagedRule(rule_class, details)
 
         # do not load or watch invalid rules
-        invalidation = self._get_invalidation(rule_class, details)
+        invalidation, trigger = self._get_cached_invalidation(managed_rule)
         if invalidation is not None:
             printer.out(invalidation)
             return
 
-        _set_rdescripts(rule_class.mapping, class_name)
+        _register_rdescripts(rule_class.mapping, class_name)
         '''
         rule should be safe for loading at this point: register it
         but do not load here -- this method only registers
         '''
-        managed_rule = ManagedRule(rule_class, details)
         self._managed_rules[class_name] = managed_rule
-        # set up de/activation command
-        self._activator.register_rule(managed_rule)
+        self._deferred_rules.pop(class_name, None)
+        # set up de/activation command (instantiating the rule, unless its command is known)
+        if trigger is not None:
+            self._activator.register_trigger(class_name, trigger)
+        else:
+            self._activator.register_rule(managed_rule)
+        # remember the de/activation command so the rule can be deferred next time
+        if self._startup_cache is not None and not details.watch_exclusion:
+            self._startup_cache.put_trigger(class_name, details.get_filepath(),
+                                            self._activator.get_registered_trigger(class_name))
         # watch this file for future changes
         if not details.watch_exclusion:
             self._reload_observable.register_watched_file(details.get_filepath())
 
+    def register_deferred_rule(self, request):
+        """
+        Registers a rule without importing it: only its de/activation command is set up.
+        The rule is imported, validated and registered the first time it's enabled.
+        If its de/activation command isn't known (the StartupCache has never seen the
+        current version of its file), it's imported and registered right away instead.
+
+        :param request: ContentRequest for a rule module
+        :return:
+        """
+        class_name = request.content_class_name
+        file_path = os.path.join(request.directory, request.module_name + ".py")
+        trigger = None
+        if self._startup_cache is not None and class_name is not None:
+            trigger = self._startup_cache.get_trigger(class_name, file_path)
+
+        self._deferred_rules[class_name] = request
+        if trigger is None:
+            self._load_deferred_rule(class_name)
+        else:
+            self._activator.register_trigger(class_name, trigger)
+
+    def _load_deferred_rule(self, class_name):
+        """
+        Imports and registers a deferred rule. Does nothing for any other rule.
+
+        :param class_name: str
+        :return:
+        """
+        request = self._deferred_rules.pop(class_name, None)
+        if request is None:
+            return
+        content = self._content_loader.process_request(request)
+        if content is not None:
+            rule_class, details = content
+            self.register_rule(rule_class, details)
+
     def _change_rule_enabled(self, class_name, enabled, tail=True):
         """
         This is called by the GrammarActivator. The necessity of this function
@@ -145,6 +204,12 @@ class GrammarManager(object):
         :return:
         """
 
+        # import it if that was deferred
+        if class_name in self._deferred_rules:
+            self._load_deferred_rule(class_name)
+            if class_name not in self._managed_rules:
+                return
+
         # load it
         enabled_diff = self._delegate_enable_rule(class_name, enabled)
         # run activation hooks
@@ -182,6 +247,7 @@ class GrammarManager(object):
             rcn = difference[0]
             enabled = difference[1]
             for companion_rcn in self._companion_config.get_companions(rcn):
+                self._load_deferred_rule(companion_rcn)
                 if companion_rcn in self._managed_rules:
                     mr = self._managed_rules[companion_rcn]
                     is_ccr = mr.get_details().declared_ccrtype is not None
@@ -218,6 +284,8 @@ class GrammarManager(object):
 
         if managed_rule.get_details().declared_ccrtype is None:
             return self._enable_non_ccr_rule(managed_rule, enabled)
+        elif enabled and not self._instantiate_or_reject(managed_rule):
+            return RulesEnabledDiff([], set())
         else:
             rcn = managed_rule.get_rule_class_name()
             enabled_rules = OrderedSet(self._config.get_enabled_rcns_ordered())
@@ -227,6 +295,19 @@ class GrammarManager(object):
             place(rcn)
             return enabled_diff
 
+    def _reset_rule(self, class_name):
+        """
+        Called when a selfmod rule has changed its own state: the merger must not
+        reuse any copy of the rule it instantiated before the change.
+
+        :param class_name: str
+        :return: RulesEnabledDiff
+        """
+        self._managed_rules[class_name].invalidate_prototype()
+        _forget_rdescripts(class_name)
+        self._merger.invalidate_rule(class_name)
+        return self._delegate_enable_rule(class_name, True)
+
     def _remerge_ccr_rules(self, enabled_rcns):
         """
         :return: RulesEnabledDiff
@@ -238,7 +319,8 @@ class GrammarManager(object):
         loaded_enabled_rcns = set(self._managed_rules.keys())
         active_rule_class_names = [rcn for rcn in enabled_rcns if rcn in loaded_enabled_rcns]
         active_mrs = [self._managed_rules[rcn] for rcn in active_rule_class_names]
-        active_ccr_mrs = [mr for mr in active_mrs if mr.get_details().declared_ccrtype is not None]
+        active_ccr_mrs = [mr for mr in active_mrs if mr.get_details().declared_ccrtype is not None
+                          and self._instantiate_or_reject(mr)]
 
         '''
         The merge may result in 1 to n+1 rules where n is the number of ccr app rules
@@ -248,20 +330,40 @@ class GrammarManager(object):
         global stuff.
         '''
         sorter = ConfigBasedRuleSetSorter(enabled_rcns)
+        instantiations_before_merge = ManagedRule.get_instantiation_count()
         merge_result = self._merger.merge_rules(active_ccr_mrs, sorter)
+        self._last_remerge_instantiations = ManagedRule.get_instantiation_count() - instantiations_before_merge
         grammars = []
-        for rule_and_context in merge_result.ccr_rules_and_contexts:
-            rule = rule_and_context[0]
-            context = rule_and_context[1]
-            grammar = Grammar(name="ccr-" + GrammarManager._get_next_id(), context=context)
-            grammar.add_rule(rule)
+        if merge_result.single_grammar:
+            grammar = Grammar(name="ccr-" + GrammarManager._get_next_id())
+            for rule_and_context in merge_result.ccr_rules_and_contexts:
+                grammar.add_rule(rule_and_context[0])
             grammars.append(grammar)
+        else:
+            for rule_and_context in merge_result.ccr_rules_and_contexts:
+                rule = rule_and_context[0]
+                context = rule_and_context[1]
+                grammar = Grammar(name="ccr-" + GrammarManager._get_next_id(), context=context)
+                grammar.add_rule(rule)
+                grammars.append(grammar)
+        # the container loads them, or keeps already loaded grammars which are the same
         self._grammars_container.set_ccr(grammars)
-        for grammar in grammars:
-            grammar.load()
+        # a merge after startup (e.g. enabling a rule) may have found a new merge layout
+        if self._initial_activations_complete and self._startup_cache is not None:
+            self._startup_cache.save_changes()
 
         return merge_result.rules_enabled_diff
 
+    def get_instantiation_counts(self):
+        """
+        How many times rule classes were instantiated; each rule should only be
+        instantiated once per version of its file (selfmod rules: per change),
+        plus once with its name if it's a loaded non-CCR rule with a name.
+
+        :return: (number during startup (None until initialized), number during the last CCR merge)
+        """
+        return self._startup_instantiations, self._last_remerge_instantiations
+
     def _enable_non_ccr_rule(self, managed_rule, enabled):
         """
         :param managed_rule:
@@ -269,6 +371,8 @@ class GrammarManager(object):
         :return: RulesEnabledDiff
         """
         rcn = managed_rule.get_rule_class_name()
+        if enabled and not self._instantiate_or_reject(managed_rule):
+            return RulesEnabledDiff([], set())
         if enabled:
             grammar = self._mapping_rule_maker.create_non_ccr_grammar(managed_rule)
             self._grammars_container.set_non_ccr(rcn, grammar)
@@ -288,28 +392,113 @@ class GrammarManager(object):
         :param file_path_changed: str
         :return:
         """
-        try:
-            module_name = GrammarManager._get_module_name_from_file_path(file_path_changed)
-            rule_class, details = self._content_loader.idem_import_module(module_name, ContentType.GET_RULE)
-            # re-register:
-            self.register_rule(rule_class, details)
+        self.receive_batch([file_path_changed])
 
-            class_name = rule_class.__name__
-            if class_name in self._config.get_enabled_rcns_ordered():
-                self._delegate_enable_rule(class_name, True)
-        except Exception as error:
-            printer.out('Grammar Manager: {} - See error message above'.format(error)) 
-            self._hooks_runner.execute(OnErrorEvent())
+    def receive_batch(self, file_paths_changed):
+        """
+        Like receive(), but for all of the files which changed at once (e.g. "save all",
+        or a git checkout): every file is re-imported and re-registered first, then the
+        CCR rules are remerged (and their grammars swapped) only once.
+
+        DO NOT CALL THIS MANUALLY. Should only be called by the reload observable.
 
-    def _get_invalidation(self, rule_class, details):
+        :param file_paths_changed: list of str
+        :return:
+        """
+        start_time = time.time()
+        enabled_rcns = self._config.get_enabled_rcns_ordered()
+        ccr_changed = False
+        for file_path_changed in file_paths_changed:
+            try:
+                module_name = GrammarManager._get_module_name_from_file_path(file_path_changed)
+                rule_class, details = self._content_loader.idem_import_module(module_name, ContentType.GET_RULE)
+                # re-register:
+                self.register_rule(rule_class, details)
+
+                class_name = rule_class.__name__
+                if class_name in enabled_rcns and class_name in self._managed_rules:
+                    if details.declared_ccrtype is None:
+                        self._delegate_enable_rule(class_name, True)
+                    else:
+                        ccr_changed = True
+            except Exception as error:
+                printer.out('Grammar Manager: {} - See error message above'.format(error))
+                self._hooks_runner.execute(OnErrorEvent())
+
+        load_time = time.time()
+        if ccr_changed:
+            try:
+                self._remerge_ccr_rules(enabled_rcns)
+            except Exception as error:
+                printer.out('Grammar Manager: {} - See error message above'.format(error))
+                self._hooks_runner.execute(OnErrorEvent())
+        end_time = time.time()
+        msg = "Reloaded {} file(s) in {:.0f} ms (loading: {:.0f} ms, ccr merge: {:.0f} ms)"
+        printer.out(msg.format(len(file_paths_changed), (end_time - start_time) * 1000,
+                               (load_time - start_time) * 1000, (end_time - load_time) * 1000))
+
+    def _get_cached_invalidation(self, managed_rule):
+        """
+        Validating a rule means instantiating it, so if its file hasn't changed
+        since the last startup, the result from then is used, and so is its
+        de/activation command: the rule isn't instantiated until it's enabled.
+        If it can't be instantiated then (e.g. because a module it imports
+        changed), it's rejected by _instantiate_or_reject.
+        A rule remembered as valid whose command isn't known is instantiated
+        (the activator needs the instance), and validated from scratch if that fails.
+        :param managed_rule: ManagedRule
+        :return: (invalidation or None, the rule's known de/activation command or None)
+        """
+        if self._startup_cache is None:
+            return self._get_invalidation(managed_rule), None
+
+        rule_class, details = managed_rule.get_rule_class(), managed_rule.get_details()
+        found, invalidation = self._startup_cache.get_invalidation(rule_class, details)
+        trigger = None
+        if found and invalidation is None:
+            trigger = self._startup_cache.get_trigger(rule_class.__name__, details.get_filepath())
+            if trigger is None:
+                try:
+                    managed_rule.get_prototype()
+                except:  # ignore warnings on this line-- it's supposed to be broad
+                    self._startup_cache.drop_invalidation(rule_class, details)
+                    found = False
+        if not found:
+            invalidation = self._get_invalidation(managed_rule)
+            self._startup_cache.put_invalidation(rule_class, details, invalidation)
+        return invalidation, trigger
+
+    def _instantiate_or_reject(self, managed_rule):
+        """
+        Rules whose validation came from the StartupCache are instantiated for the
+        first time when they're enabled. One which fails to isn't enabled, and its
+        cached validation is replaced, so it's rejected at the next startup.
+        :param managed_rule: ManagedRule
+        :return: whether the rule could be instantiated
+        """
+        try:
+            managed_rule.get_prototype()
+            return True
+        except:  # ignore warnings on this line-- it's supposed to be broad
+            traceback.print_exc()
+        class_name = managed_rule.get_rule_class_name()
+        invalidation = "{} rejected due to instantiation errors".format(class_name)
+        printer.out(invalidation)
+        if self._startup_cache is not None:
+            self._startup_cache.put_invalidation(managed_rule.get_rule_class(), managed_rule.get_details(),
+                                                 invalidation)
+        return False
+
+    def _get_invalidation(self, managed_rule):
         """
         Attempts to find a reason to invalidate the rule. Return reason if can find one.
-        :param rule_class:
-        :param details: RuleDetails
+        The instance which is validated is the managed rule's prototype.
+        :param managed_rule: ManagedRule
         :return:
         """
 
-        class_name = rule_class.__name__
+        class_name = managed_rule.get_rule_class_name()
+        details = managed_rule.get_details()
 
         '''validate details configuration before anything else'''
         details_invalidation = self._details_validator.validate_details(details)
@@ -319,7 +508,7 @@ class GrammarManager(object):
         '''attempt to instantiate the rule'''
         test_instance = None
         try:
-            test_instance = rule_class()
+            test_instance = managed_rule.get_prototype()
         except:  # ignore warnings on this line-- it's supposed to be broad
             traceback.print_exc()
             return "{} rejected due to instantiation errors".format(class_name)
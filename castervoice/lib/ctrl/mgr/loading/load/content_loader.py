@@ -18,8 +18,14 @@ class ContentLoader(object):
     Pass result off to GrammarManager.
     """
 
-    def __init__(self, content_request_generator):
+    def __init__(self, content_request_generator, defer_disabled_rules=False):
+        """
+        :param content_request_generator: ContentRequestGenerator
+        :param defer_disabled_rules: if True, rule modules which aren't enabled aren't imported
+            by load_everything: their requests are returned as FullContentSet.deferred_rules
+        """
         self._content_request_generator = content_request_generator
+        self._defer_disabled_rules = defer_disabled_rules
 
     def load_everything(self, rules_config):
         # Generate all requests for both starter and user locations
@@ -27,26 +33,27 @@ class ContentLoader(object):
         user_dir = settings.SETTINGS["paths"]["USER_DIR"]
         user_rules_dir = user_dir + os.sep + "rules"
 
-        starter_content_requests = self._content_request_generator.get_all_content_modules(base_path)
-        user_content_requests = self._content_request_generator.get_all_content_modules(user_dir)
-
         # user content should trump starter content
         path.append(user_rules_dir)
         requests = {}
-        for item in starter_content_requests:
-            requests[item.module_name] = item
-        for item in user_content_requests:
-            requests[item.module_name] = item
+        for directory in [base_path, user_dir]:
+            for item in self._content_request_generator.iter_content_modules(directory):
+                requests[item.module_name] = item
 
         # categorize requests
+        enabled_rcns = set(rules_config.get_enabled_rcns_ordered())
         rule_requests = []
+        deferred_rule_requests = []
         transformer_requests = []
         hook_requests = []
         for module_name in requests:
             request = requests[module_name]
             if request.content_type == ContentType.GET_RULE and \
                     rules_config.load_is_allowed(request.content_class_name):
-                rule_requests.append(request)
+                if self._defer_disabled_rules and request.content_class_name not in enabled_rcns:
+                    deferred_rule_requests.append(request)
+                else:
+                    rule_requests.append(request)
             elif request.content_type == ContentType.GET_TRANSFORMER and \
                     request.module_name == "text_replacer":
                 transformer_requests.append(request)
@@ -58,7 +65,7 @@ class ContentLoader(object):
         transformers = self._process_requests(transformer_requests)
         hooks = self._process_requests(hook_requests)
 
-        return FullContentSet(rules, transformers, hooks)
+        return FullContentSet(rules, transformers, hooks, deferred_rule_requests)
 
     def idem_import_module(self, module_name, fn_name):
         """
@@ -97,13 +104,21 @@ class ContentLoader(object):
         not_user = ".caster" not in module.__file__
         return not_starter and not_user
 
+    def process_request(self, request):
+        """
+        Imports the content of a single request, e.g. a deferred rule.
+        :param request: ContentRequest
+        :return: the content, or None if it couldn't be imported
+        """
+        if request.directory not in path:
+            path.append(request.directory)
+        return self.idem_import_module(request.module_name, request.content_type)
+
     def _process_requests(self, requests):
         result = []
 
         for request in requests:
-            if request.directory not in path:
-                path.append(request.directory)
-            content_item = self.idem_import_module(request.module_name, request.content_type)
+            content_item = self.process_request(request)
             if content_item is not None:
                 result.append(content_item)
 
@@ -11,19 +11,29 @@ class ContentRequestGenerator(object):
     """
 
     def get_all_content_modules(self, directory):
-        relevant_modules = []
+        return list(self.iter_content_modules(directory))
+
+    def iter_content_modules(self, directory):
+        """
+        Like get_all_content_modules, but yields each request as soon as it's found.
+        :param directory: str
+        :return: generator of ContentRequest
+        """
         for dirpath, dirnames, filenames in self._walk(directory):
             for filename in filenames:
                 file_path = dirpath + os.sep + filename
                 content_type, content_class_name = self._scan_file(file_path)
-                if content_type is not None:
-                    module_name = filename[:-3]
-                    request = ContentRequest(content_type,
-                                             dirpath,
-                                             module_name,
-                                             content_class_name)
-                    relevant_modules.append(request)
-        return relevant_modules
+                request = ContentRequestGenerator._create_request(dirpath, filename,
+                                                                  content_type, content_class_name)
+                if request is not None:
+                    yield request
+
+    @staticmethod
+    def _create_request(dirpath, filename, content_type, content_class_name):
+        if content_type is None:
+            return None
+        module_name = filename[:-3]
+        return ContentRequest(content_type, dirpath, module_name, content_class_name)
 
     def _walk(self, directory):
         """File i/o broken out for testability"""
@@ -43,9 +53,7 @@ class ContentRequestGenerator(object):
         :param file_path: str
         :return: str
         """
-        if not file_path.endswith(".py"):
-            return None, None
-        if file_path.endswith("__init__.py"):
+        if not ContentRequestGenerator._may_have_content(file_path):
             return None, None
 
         content = self._get_file_lines(file_path)
@@ -77,6 +85,10 @@ class ContentRequestGenerator(object):
                     content_class_name = ccn
         return content_type, content_class_name
 
+    @staticmethod
+    def _may_have_content(file_path):
+        return file_path.endswith(".py") and not file_path.endswith("__init__.py")
+
     @staticmethod
     def _extract_class_name(line):
         class_name_match = re.search("return (.+?),", line)
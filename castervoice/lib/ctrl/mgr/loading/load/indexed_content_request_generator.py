@@ -0,0 +1,104 @@
+import os
+from multiprocessing.pool import ThreadPool
+
+from castervoice.lib import utilities
+from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
+
+
+class IndexedContentRequestGenerator(ContentRequestGenerator):
+    """
+    Generates the same requests as ContentRequestGenerator, but:
+
+    1. keeps an index of {file path: [mtime, size, content type, content class name]}
+       between restarts, so files which haven't changed since the last scan aren't read
+    2. reads the files which have changed (or are new) in a pool of threads
+    3. yields each request (in walk order) as soon as it's ready, rather than
+       after the whole directory has been scanned
+    """
+
+    _FORMAT = 1
+    _FORMAT_KEY = "format"
+    _FILES = "files"
+    _CHUNK_SIZE = 16
+
+    def __init__(self, index_path, threads=4):
+        """
+        :param index_path: str, path of the json file the index is saved to
+        :param threads: int, size of the scanning thread pool
+        """
+        self._index_path = index_path
+        self._threads = threads
+        self._index = None
+        self.hits = 0
+        self.misses = 0
+
+    def iter_content_modules(self, directory):
+        index = self._get_index()
+        scanned = {}
+        pool = ThreadPool(self._threads)
+        try:
+            results = pool.imap(self._scan_indexed_file, self._find_content_files(directory),
+                                IndexedContentRequestGenerator._CHUNK_SIZE)
+            for dirpath, filename, file_path, entry, was_read in results:
+                scanned[file_path] = entry
+                if was_read:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                request = ContentRequestGenerator._create_request(dirpath, filename, entry[2], entry[3])
+                if request is not None:
+                    yield request
+        finally:
+            pool.terminate()
+
+        # only reached if the whole directory was scanned
+        self._update_index(index, directory, scanned)
+
+    def _find_content_files(self, directory):
+        for dirpath, dirnames, filenames in self._walk(directory):
+            for filename in filenames:
+                if ContentRequestGenerator._may_have_content(filename):
+                    yield dirpath, filename
+
+    def _scan_indexed_file(self, dirpath_and_filename):
+        """
+        Runs on the pool's threads. Doesn't change the index.
+        :return: (dirpath, filename, file path, index entry, whether the file was read)
+        """
+        dirpath, filename = dirpath_and_filename
+        file_path = dirpath + os.sep + filename
+        mtime, size = self._stat(file_path)
+        entry = self._index.get(file_path)
+        if entry is not None and entry[0] == mtime and entry[1] == size:
+            return dirpath, filename, file_path, entry, False
+        content_type, content_class_name = self._scan_file(file_path)
+        return dirpath, filename, file_path, [mtime, size, content_type, content_class_name], True
+
+    def _update_index(self, index, directory, scanned):
+        prefix = directory.rstrip(os.sep) + os.sep
+        removed = [file_path for file_path in index
+                   if file_path.startswith(prefix) and file_path not in scanned]
+        changed = [file_path for file_path in scanned
+                   if index.get(file_path) != scanned[file_path]]
+        if len(removed) == 0 and len(changed) == 0:
+            return
+        for file_path in removed:
+            del index[file_path]
+        index.update(scanned)
+        utilities.save_json_file({
+            IndexedContentRequestGenerator._FORMAT_KEY: IndexedContentRequestGenerator._FORMAT,
+            IndexedContentRequestGenerator._FILES: index
+        }, self._index_path)
+
+    def _get_index(self):
+        if self._index is None:
+            data = utilities.load_json_file(self._index_path)
+            self._index = {}
+            if data.get(IndexedContentRequestGenerator._FORMAT_KEY) == IndexedContentRequestGenerator._FORMAT:
+                self._index = data.get(IndexedContentRequestGenerator._FILES, {})
+        return self._index
+
+    def _stat(self, file_path):
+        """File i/o broken out for testability"""
+        stat = os.stat(file_path)
+        return stat.st_mtime, stat.st_size
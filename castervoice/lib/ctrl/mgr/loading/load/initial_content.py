@@ -2,7 +2,9 @@ class FullContentSet(object):
     """
     Initial content, loaded once when Caster starts.
     """
-    def __init__(self, rules, transformers, hooks):
+    def __init__(self, rules, transformers, hooks, deferred_rules=None):
         self.rules = rules
         self.transformers = transformers
         self.hooks = hooks
+        # ContentRequests of rules which weren't imported because they aren't enabled
+        self.deferred_rules = deferred_rules if deferred_rules is not None else []
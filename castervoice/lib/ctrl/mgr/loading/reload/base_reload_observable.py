@@ -12,6 +12,7 @@ class BaseReloadObservable(object):
 
     def __init__(self):
         self._file_hashes = {}
+        self._file_stats = {}
         self._listeners = []
         self._deleted = set()
 
@@ -19,20 +20,58 @@ class BaseReloadObservable(object):
         self._listeners.append(listener)
 
     def register_watched_file(self, file_path):
+        self._file_stats[file_path] = BaseReloadObservable._get_stat_of_file(file_path)
         self._file_hashes[file_path] = BaseReloadObservable._get_hash_of_file(file_path)
 
+    def get_file_hash(self, file_path):
+        """
+        :param file_path: str
+        :return: the last known hash of a watched file, or None if the file isn't watched
+        """
+        return self._file_hashes.get(file_path)
+
     def _update(self):
-        file_paths = set(self._file_hashes.keys())
+        changes, missing = self._find_changes(list(self._file_hashes.keys()))
+        self._apply_changes(changes, missing)
+
+    def _find_changes(self, file_paths):
+        """
+        Stats the files, and only hashes the ones whose mtime or size changed.
+        Doesn't change anything, so it can run off the engine thread.
+
+        :param file_paths: list of watched file paths to check
+        :return: (list of (file path, stat, hash) for files whose stat changed, list of missing file paths)
+        """
+        changes = []
+        missing = []
         for file_path in file_paths:
-            if not os.path.exists(file_path):
-                self._print_not_found_message(file_path)
-                continue
+            current_stat = BaseReloadObservable._get_stat_of_file(file_path)
+            if current_stat is None:
+                missing.append(file_path)
+            elif current_stat != self._file_stats.get(file_path):
+                changes.append((file_path, current_stat, BaseReloadObservable._get_hash_of_file(file_path)))
+        return changes, missing
 
-            known_file_hash = self._file_hashes[file_path]
-            current_file_hash = BaseReloadObservable._get_hash_of_file(file_path)
-            if known_file_hash != current_file_hash:
+    def _apply_changes(self, changes, missing):
+        """
+        Notifies the listeners of the files whose contents changed. Runs on the engine thread.
+
+        :param changes: list of (file path, stat, hash), from _find_changes
+        :param missing: list of file paths, from _find_changes
+        """
+        for file_path in missing:
+            self._print_not_found_message(file_path)
+        changed_file_paths = []
+        for file_path, current_stat, current_file_hash in changes:
+            if file_path not in self._file_hashes:
+                continue
+            self._file_stats[file_path] = current_stat
+            if self._file_hashes[file_path] != current_file_hash:
                 self._file_hashes[file_path] = current_file_hash
-                self._notify_listeners(file_path)
+                changed_file_paths.append(file_path)
+        if len(changed_file_paths) > 0:
+            self._notify_listeners_of_batch(changed_file_paths)
+            for file_path in changed_file_paths:
                 printer.out("Reloaded {}".format(file_path))
 
     def _print_not_found_message(self, file_path):
@@ -48,6 +87,29 @@ class BaseReloadObservable(object):
         for listener in self._listeners:
             listener.receive(path_changed)
 
+    def _notify_listeners_of_batch(self, paths_changed):
+        """
+        Listeners which can handle all the changed files at once get them all at once.
+        """
+        for listener in self._listeners:
+            if hasattr(listener, "receive_batch"):
+                listener.receive_batch(paths_changed)
+            else:
+                for path_changed in paths_changed:
+                    listener.receive(path_changed)
+
+    @staticmethod
+    def _get_stat_of_file(file_path):
+        """
+        :param file_path:
+        :return: (mtime, size), or None if the file doesn't exist
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
     @staticmethod
     def _get_hash_of_file(file_path):
         """
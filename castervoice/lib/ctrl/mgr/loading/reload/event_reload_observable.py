@@ -0,0 +1,82 @@
+import threading
+
+from six.moves import queue
+from dragonfly import get_engine
+
+from castervoice.lib.ctrl.mgr.loading.reload.base_reload_observable import BaseReloadObservable
+from castervoice.lib.ctrl.mgr.loading.reload.file_watchers import create_file_watcher
+
+
+class EventReloadObservable(BaseReloadObservable):
+
+    def __init__(self, poll_seconds, watcher=None, debounce_seconds=0.5, delivery_seconds=0.5):
+        """
+        Event-based file watcher. A background thread waits for the file watcher
+        (inotify, or stat polling where that isn't available) to report changes,
+        waits until the changes stop coming (so that a burst of saves is one batch),
+        then stats and hashes the changed files. The engine thread only picks up
+        the finished batches.
+
+        :param poll_seconds: number, how long the watcher waits at a time; for the
+            stat watcher, this is the time between checking for updates
+        :param watcher: BaseFileWatcher impl; by default, the best available one
+        :param debounce_seconds: number, how long to wait for more changes before reloading
+        :param delivery_seconds: number, how often the engine thread checks for finished batches
+        """
+        super(EventReloadObservable, self).__init__()
+        self._poll_seconds = poll_seconds
+        self._watcher = watcher if watcher is not None else create_file_watcher()
+        self._debounce_seconds = debounce_seconds
+        self._delivery_seconds = delivery_seconds
+        self._batches = queue.Queue()
+        self._running = False
+        self._thread = None
+
+    def register_watched_file(self, file_path):
+        super(EventReloadObservable, self).register_watched_file(file_path)
+        self._watcher.watch(file_path)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._watch)
+        self._thread.daemon = True
+        self._thread.start()
+        get_engine().create_timer(lambda: self._deliver_batches(), self._delivery_seconds)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self._watcher.close()
+
+    def _watch(self):
+        while self._running:
+            self._watch_once()
+
+    def _watch_once(self):
+        """
+        Runs on the watching thread.
+        """
+        file_paths = self._watcher.wait(self._poll_seconds)
+        if len(file_paths) == 0:
+            return
+        # coalesce: keep collecting until there's a quiet period
+        while self._running:
+            more_file_paths = self._watcher.wait(self._debounce_seconds)
+            if len(more_file_paths) == 0:
+                break
+            file_paths |= more_file_paths
+        changes, missing = self._find_changes(sorted(file_paths))
+        if len(changes) + len(missing) > 0:
+            self._batches.put((changes, missing))
+
+    def _deliver_batches(self):
+        """
+        Runs on the engine thread.
+        """
+        while True:
+            try:
+                changes, missing = self._batches.get_nowait()
+            except queue.Empty:
+                return
+            self._apply_changes(changes, missing)
@@ -0,0 +1,201 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from castervoice.lib import printer
+from castervoice.lib.ctrl.mgr.errors.base_class_error import DontUseBaseClassError
+
+
+class BaseFileWatcher(object):
+    """
+    Tells an EventReloadObservable which watched files might have changed.
+    Its methods are called from the observable's watching thread (and watch()
+    also from the engine thread), so implementations must be thread safe.
+    """
+
+    def watch(self, file_path):
+        raise DontUseBaseClassError(self)
+
+    def wait(self, timeout):
+        """
+        Blocks for up to timeout seconds.
+        :param timeout: number, seconds
+        :return: set of watched file paths which might have changed (may be empty)
+        """
+        raise DontUseBaseClassError(self)
+
+    def close(self):
+        pass
+
+
+class StatFileWatcher(BaseFileWatcher):
+    """
+    Fallback for systems without inotify: stats every watched file
+    once per wait() and reports the ones whose mtime or size changed.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def watch(self, file_path):
+        with self._lock:
+            self._stats[file_path] = StatFileWatcher._stat(file_path)
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return self.check()
+
+    def check(self):
+        """
+        :return: set of watched file paths whose mtime or size changed since the last check
+        """
+        with self._lock:
+            known_stats = list(self._stats.items())
+        changed = set()
+        for file_path, known_stat in known_stats:
+            current_stat = StatFileWatcher._stat(file_path)
+            if current_stat != known_stat:
+                changed.add(file_path)
+                with self._lock:
+                    self._stats[file_path] = current_stat
+        return changed
+
+    @staticmethod
+    def _stat(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+
+class InotifyFileWatcher(BaseFileWatcher):
+    """
+    Linux only: the kernel reports changes to the watched files' directories,
+    so nothing is read while no files change. Directories rather than files are
+    watched because many editors save by writing a new file and renaming it.
+
+    Files which can't be watched with inotify (e.g. the user's inotify watch
+    limit has been reached, or their directory was deleted or moved) are
+    watched by a StatFileWatcher instead, checked on every wait(). If the
+    kernel's event queue overflowed, every watched file is reported.
+    """
+
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    _EVENT_HEADER = struct.Struct("iIII")
+    _libc = None
+
+    def __init__(self):
+        self._fd = InotifyFileWatcher._get_libc().inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+        self._lock = threading.Lock()
+        self._watch_descriptors = {}
+        self._watched_names = {}
+        self._stat_watcher = StatFileWatcher()
+        self._stat_watched = False
+
+    @staticmethod
+    def is_available():
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            InotifyFileWatcher._get_libc()
+        except (OSError, AttributeError):
+            return False
+        return True
+
+    @staticmethod
+    def _get_libc():
+        if InotifyFileWatcher._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_init.restype = ctypes.c_int
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_add_watch.restype = ctypes.c_int
+            InotifyFileWatcher._libc = libc
+        return InotifyFileWatcher._libc
+
+    def watch(self, file_path):
+        directory, name = os.path.split(os.path.abspath(file_path))
+        with self._lock:
+            if directory not in self._watched_names:
+                wd = InotifyFileWatcher._get_libc().inotify_add_watch(
+                    self._fd, directory.encode(sys.getfilesystemencoding()), InotifyFileWatcher._MASK)
+                if wd < 0:
+                    error = os.strerror(ctypes.get_errno())
+                    printer.out("Unable to watch {} for changes ({}), checking it every few seconds instead."
+                                .format(directory, error))
+                    self._watch_with_stat_watcher(file_path)
+                    return
+                self._watch_descriptors[wd] = directory
+                self._watched_names[directory] = {}
+            self._watched_names[directory][name] = file_path
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        changed = set()
+        if readable:
+            changed = self._parse_events(os.read(self._fd, 64 * 1024))
+        if self._stat_watched:
+            changed |= self._stat_watcher.check()
+        return changed
+
+    def _watch_with_stat_watcher(self, file_path):
+        self._stat_watcher.watch(file_path)
+        self._stat_watched = True
+
+    def _parse_events(self, buf):
+        changed = set()
+        offset = 0
+        header_size = InotifyFileWatcher._EVENT_HEADER.size
+        with self._lock:
+            while offset + header_size <= len(buf):
+                wd, mask, cookie, name_length = InotifyFileWatcher._EVENT_HEADER.unpack_from(buf, offset)
+                offset += header_size
+                name = buf[offset:offset + name_length].rstrip(b"\0").decode(sys.getfilesystemencoding())
+                offset += name_length
+                if mask & InotifyFileWatcher._IN_Q_OVERFLOW:
+                    # events were dropped: any of the files may have changed
+                    for watched_names in self._watched_names.values():
+                        changed.update(watched_names.values())
+                    continue
+                directory = self._watch_descriptors.get(wd)
+                if directory is None:
+                    continue
+                if mask & InotifyFileWatcher._IN_IGNORED:
+                    # the directory was deleted, moved or unmounted, so inotify stopped watching it
+                    del self._watch_descriptors[wd]
+                    for file_path in self._watched_names.pop(directory).values():
+                        self._watch_with_stat_watcher(file_path)
+                        changed.add(file_path)
+                elif name in self._watched_names[directory]:
+                    changed.add(self._watched_names[directory][name])
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_file_watcher():
+    """
+    :return: the best BaseFileWatcher impl available on this system
+    """
+    if InotifyFileWatcher.is_available():
+        try:
+            return InotifyFileWatcher()
+        except OSError:
+            pass
+    return StatFileWatcher()
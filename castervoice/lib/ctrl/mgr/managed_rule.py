@@ -1,17 +1,82 @@
+import copy
+
+
 class ManagedRule(object):
+    """
+    Owns one instance of its rule class, the prototype, which is built once
+    (per file version, since reloading a file creates a new ManagedRule) and
+    shared by validation and the activator. Anything which might change a rule
+    (transformers, grammars) gets a copy of the prototype instead.
+
+    A rule which is used under another name (a non-CCR rule's grammar uses the
+    name in its RuleDetails) is named through its constructor, so that instance
+    is built once too, besides the prototype.
+    """
+
+    # total number of rule instantiations by all ManagedRules
+    _instantiations = 0
 
     def __init__(self, rule_class, details):
         self._rule_class = rule_class
         self._details = details
+        self._prototype = None
+        self._named_prototype = None
 
     def get_rule_class_name(self):
         return self._rule_class.__name__
 
-    def get_rule_instance(self):
-        return self._rule_class()
+    def get_prototype(self):
+        """
+        The shared instance: don't change it, and don't add it to a grammar.
+        :return: instance of the rule class
+        """
+        if self._prototype is None:
+            ManagedRule._instantiations += 1
+            self._prototype = self._rule_class()
+        return self._prototype
+
+    def get_rule_instance(self, name=None):
+        """
+        :param name: str or None; the name the rule is constructed with
+        :return: a copy of the prototype (or of the instance with that name) which may be changed
+        """
+        if name is None:
+            return ManagedRule.detached_copy(self.get_prototype())
+        if self._named_prototype is None or self._named_prototype.name != name:
+            ManagedRule._instantiations += 1
+            self._named_prototype = self._rule_class(name=name)
+        return ManagedRule.detached_copy(self._named_prototype)
+
+    def invalidate_prototype(self):
+        """
+        For rules whose commands don't only come from their class (selfmod rules):
+        the next instance is built from scratch.
+        """
+        self._prototype = None
+        self._named_prototype = None
 
     def get_rule_class(self):
         return self._rule_class
 
     def get_details(self):
         return self._details
+
+    @staticmethod
+    def get_instantiation_count():
+        return ManagedRule._instantiations
+
+    @staticmethod
+    def detached_copy(rule):
+        """
+        A Dragonfly rule belongs to at most one grammar, so a copy is never in a
+        grammar. The copy shares the parsed spec elements, which is the expensive
+        part, but not the grammar state or the mapping/extras/defaults dicts.
+        """
+        rule_copy = copy.copy(rule)
+        rule_copy._grammar = None
+        rule_copy._active = None
+        rule_copy._enabled = True
+        for attribute in ["_mapping", "_extras", "_defaults"]:
+            if isinstance(getattr(rule_copy, attribute, None), dict):
+                setattr(rule_copy, attribute, getattr(rule_copy, attribute).copy())
+        return rule_copy
@@ -1,5 +1,21 @@
 import re
 
+# {rule class name: {spec: rdescript template}}; specs don't change between reloads
+_RDESCRIPT_TEMPLATES = {}
+
+
+def _register_rdescripts(mapping, rcn):
+    # a rule class was (re)loaded: only its current specs are kept, so reloads don't grow the table
+    templates = _RDESCRIPT_TEMPLATES.get(rcn, {})
+    _RDESCRIPT_TEMPLATES[rcn] = {spec: templates[spec] for spec in mapping if spec in templates}
+    _set_rdescripts(mapping, rcn)
+
+
+def _forget_rdescripts(rcn):
+    # e.g. a selfmod rule changed its specs
+    _RDESCRIPT_TEMPLATES.pop(rcn, None)
+
+
 def _set_rdescripts(mapping, rcn):
     for spec, action in mapping.items():
         # pylint: disable=no-member
@@ -8,7 +24,16 @@ def _set_rdescripts(mapping, rcn):
 
 def _set_the_rdescript(action, spec, rcn):
     if hasattr(action, "rdescript") and action.rdescript is None:
-        action.rdescript = _create_rdescript(spec, rcn)
+        action.rdescript = _get_rdescript(spec, rcn)
+
+
+def _get_rdescript(spec, rcn):
+    templates = _RDESCRIPT_TEMPLATES.setdefault(rcn, {})
+    rdescript = templates.get(spec)
+    if rdescript is None:
+        rdescript = _create_rdescript(spec, rcn)
+        templates[spec] = rdescript
+    return rdescript
 
 def _create_rdescript(spec, rcn):
     rule_name = rcn
@@ -1,5 +1,5 @@
 from dragonfly import Grammar, FuncContext
-from castervoice.lib.context import AppContext
+from castervoice.lib.context import AppContext, get_foreground_context_cache
 from castervoice.lib.ctrl.mgr.rule_maker.base_rule_maker import BaseRuleMaker
 
 
@@ -16,10 +16,10 @@ class MappingRuleMaker(BaseRuleMaker):
 
     def create_non_ccr_grammar(self, managed_rule):
         details = managed_rule.get_details()
-        rule_instance = managed_rule.get_rule_class()(name=details.name)
+        rule_instance = managed_rule.get_rule_instance(details.name)
 
         if not details.transformer_exclusion:
-            rule_instance = self._transformers_runner.transform_rule(rule_instance)
+            rule_instance = self._transformers_runner.transform_rule(rule_instance, details)
 
         self._smr_configurer.configure(rule_instance)
 
@@ -28,7 +28,8 @@ class MappingRuleMaker(BaseRuleMaker):
             context = FuncContext(function=details.function_context, executable=details.executable, title=details.title)
         else:
             if details.executable is not None or details.title is not None:
-                context = AppContext(executable=details.executable, title=details.title)
+                context = get_foreground_context_cache().cached(AppContext(executable=details.executable,
+                                                                           title=details.title))
         self._name_uniquefier += 1
         counter = "g" + str(self._name_uniquefier)
         grammar_name = counter if details.grammar_name is None else details.grammar_name + counter
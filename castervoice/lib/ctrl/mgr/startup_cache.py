@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import sys
+
+from castervoice.lib import settings, utilities, version
+from castervoice.lib.ctrl.mgr.loading.reload.base_reload_observable import BaseReloadObservable
+
+
+class StartupCache(object):
+    """
+    Remembers, across restarts, the results of the parts of loading rules which
+    don't involve the rules' actions (those are code, so they can't be saved):
+
+    1. validation: whether each rule file's rule was valid, keyed by the file's
+       modification time and size
+    2. merge layouts: for a set of prepared CCR rules, which rules the compatibility
+       checker found incompatible with which, and which rules went into each merged
+       rule -- so a warm start can build each merged rule in one go instead of
+       checking and merging rule by rule
+    3. triggers: what each rule is called in "enable/disable X", keyed like the
+       validations -- so a rule which was valid doesn't have to be instantiated until
+       it's enabled, and rules which aren't enabled don't have to be imported at all
+
+    Rule files are only stat'ed, not read: a file which was edited is a different
+    version of the file. (A changed module which a rule file imports isn't, which
+    is why the GrammarManager revalidates a rule which turns out to fail when
+    it's instantiated.)
+
+    Everything in the cache also depends on the "environment": the Caster version,
+    the settings, words.txt and the transformers config. If any of those changed,
+    the whole cache is discarded.
+
+    Only what was used during the last startup (and since then) is kept, so the
+    file doesn't grow. Merge layouts found after startup (e.g. from enabling a
+    rule) are saved by save_changes.
+    """
+
+    _FORMAT = 3
+    _ENVIRONMENT = "environment"
+    _VALIDATIONS = "validations"
+    _LAYOUTS = "layouts"
+    _TRIGGERS = "triggers"
+
+    def __init__(self, cache_path):
+        """
+        :param cache_path: str, path of the json file the cache is saved to
+        """
+        self._cache_path = cache_path
+        self._environment = None
+        self._validations = {}
+        self._layouts = {}
+        self._triggers = {}
+        self._used_validations = {}
+        self._used_layouts = {}
+        self._used_triggers = {}
+        self._changed = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        self._environment = StartupCache._get_environment_hash()
+        data = utilities.load_json_file(self._cache_path)
+        if data.get(StartupCache._ENVIRONMENT) == self._environment:
+            self._validations = data.get(StartupCache._VALIDATIONS, {})
+            self._layouts = data.get(StartupCache._LAYOUTS, {})
+            self._triggers = data.get(StartupCache._TRIGGERS, {})
+
+    def save(self):
+        utilities.save_json_file({
+            StartupCache._ENVIRONMENT: self._environment,
+            StartupCache._VALIDATIONS: self._used_validations,
+            StartupCache._LAYOUTS: self._used_layouts,
+            StartupCache._TRIGGERS: self._used_triggers
+        }, self._cache_path)
+        self._changed = False
+
+    def save_changes(self):
+        """
+        Saves, if anything has been put in the cache since the last save.
+        """
+        if self._changed:
+            self.save()
+
+    def get_invalidation(self, rule_class, details):
+        """
+        :param rule_class: the rule class being registered
+        :param details: RuleDetails
+        :return: (found (boolean), invalidation message (str) or None)
+        """
+        key = self._get_validation_key(rule_class, details)
+        if key is None or key not in self._validations:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        invalidation = self._validations[key]
+        self._used_validations[key] = invalidation
+        return True, invalidation
+
+    def put_invalidation(self, rule_class, details, invalidation):
+        key = self._get_validation_key(rule_class, details)
+        if key is not None:
+            self._validations[key] = invalidation
+            self._used_validations[key] = invalidation
+            self._changed = True
+
+    def drop_invalidation(self, rule_class, details):
+        """
+        Forgets a rule's validation, e.g. because the rule can't be instantiated
+        anymore (the cache only knows about the rule's own file, not what it imports).
+        """
+        key = self._get_validation_key(rule_class, details)
+        if key is not None:
+            self._validations.pop(key, None)
+            self._used_validations.pop(key, None)
+            self._changed = True
+
+    def get_trigger(self, rule_class_name, file_path):
+        """
+        :param rule_class_name: str
+        :param file_path: str, path of the rule's file
+        :return: str, or None if the rule's file has changed or was never seen
+        """
+        key = StartupCache._get_file_key(rule_class_name, file_path)
+        if key is None or key not in self._triggers:
+            self.misses += 1
+            return None
+        self.hits += 1
+        trigger = self._triggers[key]
+        self._used_triggers[key] = trigger
+        return trigger
+
+    def put_trigger(self, rule_class_name, file_path, trigger):
+        key = StartupCache._get_file_key(rule_class_name, file_path)
+        if key is not None:
+            self._triggers[key] = trigger
+            self._used_triggers[key] = trigger
+            self._changed = True
+
+    def get_merge_layout(self, key):
+        """
+        :param key: str from get_merge_layout_key
+        :return: dict, or None
+        """
+        if key not in self._layouts:
+            self.misses += 1
+            return None
+        self.hits += 1
+        layout = self._layouts[key]
+        self._used_layouts[key] = layout
+        return layout
+
+    def put_merge_layout(self, key, layout):
+        """
+        :param key: str from get_merge_layout_key
+        :param layout: dict of json-compatible data
+        """
+        self._layouts[key] = layout
+        self._used_layouts[key] = layout
+        self._changed = True
+
+    @staticmethod
+    def get_merge_layout_key(sorted_rules, rcns_to_details, *implementations):
+        """
+        The compatibility checkers and merging strategies only look at specs (and,
+        for app rules, contexts), so this is what identifies a merge.
+
+        :param sorted_rules: list of prepared MergeRules, in merge order
+        :param rcns_to_details: map of {rule class name: RuleDetails}
+        :param implementations: the compat checker, merging strategy, etc.
+        :return: str
+        """
+        description = [[StartupCache._describe_implementation(implementation) for implementation in implementations]]
+        for rule in sorted_rules:
+            rcn = rule.get_rule_class_name()
+            details = rcns_to_details[rcn]
+            description.append([rcn, sorted(rule._mapping.keys()), sorted(rule._extras.keys()),
+                                details.declared_ccrtype, details.executable, details.title,
+                                details.function_context is not None])
+        return StartupCache._hash(json.dumps(description, default=str))
+
+    @staticmethod
+    def _describe_implementation(implementation):
+        if hasattr(implementation, "get_description"):
+            return implementation.get_description()
+        return type(implementation).__name__
+
+    def _get_validation_key(self, rule_class, details):
+        if details.watch_exclusion:
+            return None
+        file_version = StartupCache._get_file_version(details.get_filepath())
+        if file_version is None:
+            return None
+        return "{}|{}|{}".format(rule_class.__name__, details.name, file_version)
+
+    @staticmethod
+    def _get_file_key(rule_class_name, file_path):
+        file_version = StartupCache._get_file_version(file_path)
+        if file_version is None:
+            return None
+        return "{}|{}".format(rule_class_name, file_version)
+
+    @staticmethod
+    def _get_file_version(file_path):
+        """
+        :param file_path: str or None
+        :return: str identifying the file's current version (mtime and size), or None if there's no file
+        """
+        if file_path is None:
+            return None
+        stat = BaseReloadObservable._get_stat_of_file(file_path)
+        if stat is None:
+            return None
+        return "{!r}|{}".format(*stat)
+
+    @staticmethod
+    def _get_environment_hash():
+        environment = [StartupCache._FORMAT, version.__version__, sys.version,
+                       json.dumps(settings.SETTINGS, sort_keys=True, default=str)]
+        for path in [settings.settings(["paths", "GDEF_FILE"], ""),
+                     settings.settings(["paths", "TRANSFORMERS_CONFIG_PATH"], "")]:
+            environment.append(BaseReloadObservable._get_hash_of_file(path) if os.path.isfile(path) else None)
+        return StartupCache._hash(json.dumps(environment))
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
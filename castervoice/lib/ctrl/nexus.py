@@ -2,18 +2,23 @@ from castervoice.lib.ctrl.mgr.grammar_container.basic_grammar_container import B
 from castervoice.lib.ctrl.mgr.ccr_toggle import CCRToggle
 from castervoice.lib.ctrl.mgr.companion.companion_config import CompanionConfig
 from castervoice.lib.ctrl.mgr.grammar_activator import GrammarActivator
+from castervoice.lib.ctrl.mgr.loading.reload.event_reload_observable import EventReloadObservable
 from castervoice.lib.ctrl.mgr.loading.reload.manual_reload_observable import ManualReloadObservable
 from castervoice.lib.ctrl.mgr.loading.reload.timer_reload_observable import TimerReloadObservable
 from castervoice.lib.ctrl.mgr.rule_maker.mapping_rule_maker import MappingRuleMaker
 from castervoice.lib.ctrl.mgr.rules_config import RulesConfig
+from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
 from castervoice.lib.ctrl.mgr.validation.combo.combo_validation_delegator import ComboValidationDelegator
 from castervoice.lib.ctrl.mgr.validation.combo.non_empty_validator import RuleNonEmptyValidator
 from castervoice.lib.ctrl.mgr.validation.combo.rule_family_validator import RuleFamilyValidator
 from castervoice.lib.ctrl.mgr.validation.combo.treerule_validator import TreeRuleValidator
 from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_conflict_index import SpecConflictIndex
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_expander import SpecExpander
 from castervoice.lib.merge.ccrmerging2.hooks.hooks_config import HooksConfig
 from castervoice.lib.merge.ccrmerging2.hooks.hooks_runner import HooksRunner
 from castervoice.lib.merge.ccrmerging2.sorting.config_ruleset_sorter import ConfigBasedRuleSetSorter
+from castervoice.lib.merge.ccrmerging2.transformers.transformed_rule_cache import TransformedRuleCache
 from castervoice.lib.merge.ccrmerging2.transformers.transformers_config import TransformersConfig
 from castervoice.lib.merge.ccrmerging2.transformers.transformers_runner import TransformersRunner
 from castervoice.lib.merge.mergerule import MergeRule
@@ -26,12 +31,15 @@ from castervoice.lib.ctrl.mgr.validation.rules.mergerule_validator import IsMerg
 from castervoice.lib.ctrl.mgr.validation.rules.not_treerule_validator import NotTreeRuleValidator
 from castervoice.lib.ctrl.mgr.validation.rules.selfmod_validator import CCRSelfModifyingRuleValidator
 from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.hmc_response_receiver import HMCResponseReceiver
 from castervoice.lib.merge.selfmod.smr_configurer import SelfModRuleConfigurer
 from castervoice.lib.merge.state.stack import CasterState
 from castervoice.lib.ctrl.mgr.grammar_manager import GrammarManager
 from castervoice.lib.ctrl.mgr.validation.rules.rule_validation_delegator import CCRRuleValidationDelegator
 from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.incremental_ccrmerger2 import IncrementalCCRMerger2
 from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.ccrmerging2.repeat_rule_cache import RepeatRuleCache
 
 
 class Nexus:
@@ -49,6 +57,9 @@ class Nexus:
         '''rpc class for interacting with Caster UI elements via xmlrpclib'''
         self.comm = Communicator()
 
+        '''receives Caster UI elements' responses as soon as they're complete (starts with the first one)'''
+        self.hmc_responses = HMCResponseReceiver()
+
         '''tracks both which rules are enabled and the rules' order'''
         rules_config = RulesConfig()
 
@@ -60,12 +71,19 @@ class Nexus:
         hooks_runner = HooksRunner(hooks_config)
         smrc.set_hooks_runner(hooks_runner)
 
+        '''the thing that signals that a rule file has changed; it also knows the files' hashes'''
+        reload_observable = Nexus._create_reload_observable()
+
         '''does transformations on rules when rules are activated'''
         transformers_config = TransformersConfig()
-        transformers_runner = TransformersRunner(transformers_config)
+        rule_cache = TransformedRuleCache(lambda file_path: reload_observable.get_file_hash(file_path))
+        transformers_runner = TransformersRunner(transformers_config, rule_cache)
+
+        '''remembers validation and merge results between restarts'''
+        startup_cache = Nexus._create_startup_cache()
 
         '''the ccrmerger -- only merges MergeRules'''
-        self._merger = Nexus._create_merger(smrc, transformers_runner)
+        self._merger = Nexus._create_merger(smrc, transformers_runner, startup_cache)
 
         '''unified loading mechanism for [rules, transformers, hooks] 
         from [caster starter locations, user dir]'''
@@ -77,7 +95,7 @@ class Nexus:
         '''the grammar manager -- probably needs to get broken apart more'''
         self._grammar_manager = Nexus._create_grammar_manager(self._merger,
             self._content_loader, hooks_runner, rules_config, smrc, mapping_rule_maker,
-            transformers_runner)
+            transformers_runner, reload_observable, startup_cache)
 
         '''ACTION TIME:'''
         self._load_and_register_all_content(rules_config, hooks_runner, transformers_runner)
@@ -91,6 +109,7 @@ class Nexus:
         """
         content = self._content_loader.load_everything(rules_config)
         [self._grammar_manager.register_rule(rc, d) for rc, d in content.rules]
+        [self._grammar_manager.register_deferred_rule(r) for r in content.deferred_rules]
         [transformers_runner.add_transformer(t) for t in content.transformers]
         [hooks_runner.add_hook(h) for h in content.hooks]
         self._grammar_manager.load_activation_grammars()
@@ -121,7 +140,7 @@ class Nexus:
 
     @staticmethod
     def _create_grammar_manager(merger, content_loader, hooks_runner, rule_config, smrc,
-                                mapping_rule_maker, transformers_runner):
+                                mapping_rule_maker, transformers_runner, observable, startup_cache):
         """
         This is where settings should be used to alter the dependency injection being done.
         Setting things to alternate implementations can live here.
@@ -133,6 +152,8 @@ class Nexus:
         :param smrc
         :param mapping_rule_maker
         :param transformers_runner
+        :param observable: BaseReloadObservable impl
+        :param startup_cache: StartupCache or None
         :return:
         """
 
@@ -142,11 +163,6 @@ class Nexus:
         details_validator = Nexus._create_details_validator()
         combo_validator = Nexus._create_combo_validator()
 
-        timer = settings.SETTINGS["grammar_reloading"]["reload_timer_seconds"]
-        observable = TimerReloadObservable(timer)
-        if settings.SETTINGS["grammar_reloading"]["reload_trigger"] == "manual":
-            observable = ManualReloadObservable()
-
         grammars_container = BasicGrammarContainer()
 
         activator = GrammarActivator(lambda rule: isinstance(rule, MergeRule))
@@ -167,16 +183,48 @@ class Nexus:
                             smrc,
                             transformers_runner,
                             companion_config,
-                            combo_validator)
+                            combo_validator,
+                            startup_cache)
         return gm
 
     @staticmethod
-    def _create_merger(smrc, transformers_runner):
-        compat_checker = SimpleCompatibilityChecker()
+    def _create_reload_observable():
+        timer = settings.SETTINGS["grammar_reloading"]["reload_timer_seconds"]
+        observable = TimerReloadObservable(timer)
+        if settings.SETTINGS["grammar_reloading"]["reload_trigger"] == "manual":
+            observable = ManualReloadObservable()
+        elif settings.SETTINGS["grammar_reloading"]["reload_trigger"] == "event":
+            observable = EventReloadObservable(timer)
+        return observable
+
+    @staticmethod
+    def _create_startup_cache():
+        if not settings.settings(["miscellaneous", "startup_cache"], True):
+            return None
+        startup_cache = StartupCache(settings.SETTINGS["paths"]["STARTUP_CACHE_PATH"])
+        startup_cache.load()
+        return startup_cache
+
+    @staticmethod
+    def _create_merger(smrc, transformers_runner, startup_cache=None):
+        spec_expander = None
+        if settings.settings(["miscellaneous", "ccr_expand_spec_conflicts"], False):
+            spec_expander = SpecExpander()
+        compat_checker = SimpleCompatibilityChecker(SpecConflictIndex(spec_expander))
         merge_strategy = ClassicMergingStrategy()
         max_repetitions = settings.settings(["miscellaneous", "max_ccr_repetitions"])
-
-        return CCRMerger2(transformers_runner, compat_checker, merge_strategy, max_repetitions, smrc)
+        share_global_rule = settings.settings(["miscellaneous", "ccr_share_global_rule"], False)
+        repeat_rule_cache = None
+        repeat_rule_cache_size = int(settings.settings(["miscellaneous", "ccr_rule_cache_size"], 16))
+        if repeat_rule_cache_size > 0:
+            repeat_rule_cache = RepeatRuleCache(repeat_rule_cache_size)
+        repetition_segment_size = int(settings.settings(["miscellaneous", "ccr_repetition_segment_size"], 0))
+
+        merger_class = CCRMerger2
+        if settings.settings(["miscellaneous", "incremental_ccr_merge"], True):
+            merger_class = IncrementalCCRMerger2
+        return merger_class(transformers_runner, compat_checker, merge_strategy, max_repetitions, smrc, startup_cache,
+                            share_global_rule, repeat_rule_cache, repetition_segment_size)
 
     def set_ccr_active(self, active):
         self._grammar_manager.set_ccr_active(active)
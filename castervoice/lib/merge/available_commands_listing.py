@@ -0,0 +1,49 @@
+from castervoice.lib import available_commands_tracker, printer, settings
+
+
+class AvailableCommandsListing(object):
+    """
+    What "list available commands" prints for one merged rule. Keeps a
+    reference to the merged rule's specs and only builds the text when the
+    command is spoken, so a merge doesn't build the listing of every merged
+    rule just for the last one to be kept.
+
+    If there are more commands than fit on a page (the
+    available_commands_page_size setting, 0 for no pages), each time the
+    command is spoken lists the next page.
+    """
+
+    def __init__(self, specs):
+        """
+        :param specs: sorted list of specs; not copied
+        """
+        self._specs = specs
+        self._next_page = 0
+
+    def get_page_count(self, page_size):
+        if page_size <= 0:
+            return 1
+        return max(1, -(-len(self._specs) // page_size))
+
+    def get_page(self, page, page_size):
+        """
+        :param page: int, from 0
+        :param page_size: int, 0 for everything on one page
+        :return: str
+        """
+        if page_size <= 0:
+            return "\n".join(self._specs)
+        page_count = self.get_page_count(page_size)
+        header = "Available commands, page {} of {}:".format(page + 1, page_count)
+        return "\n".join([header] + self._specs[page * page_size:(page + 1) * page_size])
+
+    def list_commands(self):
+        page_size = int(settings.settings(["miscellaneous", "available_commands_page_size"], 0))
+        if self._next_page >= self.get_page_count(page_size):
+            self._next_page = 0
+        commands = self.get_page(self._next_page, page_size)
+        self._next_page += 1
+
+        tracker = available_commands_tracker.get_instance()
+        tracker.set_available_commands(commands)
+        printer.out(tracker.get_available_commands())
@@ -0,0 +1,82 @@
+from dragonfly import Context
+
+from castervoice.lib.context import get_foreground_context_cache
+
+
+class CCRContextIndex(object):
+    """
+    Decides which CCR grammars are active: each CCR app rule's grammar is active
+    where its context matches, and the global CCR grammar where none of them match.
+
+    The engine asks every grammar's context at the start of every utterance, so
+    as the negation of all of the app contexts, the global grammar's context used
+    to match every app context again each time. Here, every CCR grammar's context
+    matches the app contexts through the ForegroundContextCache, like the other
+    grammars' AppContexts, so each app context is only matched when the
+    foreground window changes.
+    """
+
+    def __init__(self, app_contexts, context_cache=None):
+        """
+        :param app_contexts: list of contexts, one per CCR app rule, in merge order
+        :param context_cache: ForegroundContextCache, or None for the shared one
+        """
+        self._app_contexts = app_contexts
+        self._context_cache = context_cache if context_cache is not None else get_foreground_context_cache()
+
+    def create_contexts(self):
+        """
+        :return: list of contexts: the global CCR grammar's, then one per app context
+        """
+        contexts = [IndexedCCRContext(self, None)]
+        for index in range(self.get_app_context_count()):
+            contexts.append(IndexedCCRContext(self, index))
+        return contexts
+
+    def get_app_context(self, index):
+        return self._app_contexts[index]
+
+    def get_app_context_count(self):
+        return len(self._app_contexts)
+
+    def app_context_matches(self, index, executable, title, handle):
+        return self._context_cache.matches(self._app_contexts[index], executable, title, handle)
+
+    def any_app_context_matches(self, executable, title, handle):
+        for context in self._app_contexts:
+            if self._context_cache.matches(context, executable, title, handle):
+                return True
+        return False
+
+
+class IndexedCCRContext(Context):
+    """
+    The context of one CCR grammar, matched by a CCRContextIndex.
+    """
+
+    def __init__(self, context_index, app_index):
+        """
+        :param context_index: CCRContextIndex
+        :param app_index: int, the app context's index; None for the global CCR grammar
+        """
+        super(IndexedCCRContext, self).__init__()
+        self._context_index = context_index
+        self._app_index = app_index
+        if app_index is None:
+            self._str = "none of %s" % ", ".join(str(context_index.get_app_context(index))
+                                                 for index in range(context_index.get_app_context_count()))
+        else:
+            self._str = str(context_index.get_app_context(app_index))
+
+    def get_app_context(self):
+        """
+        :return: the app context this context matches, or None for the global CCR grammar's
+        """
+        if self._app_index is None:
+            return None
+        return self._context_index.get_app_context(self._app_index)
+
+    def matches(self, executable, title, handle):
+        if self._app_index is None:
+            return not self._context_index.any_app_context_matches(executable, title, handle)
+        return self._context_index.app_context_matches(self._app_index, executable, title, handle)
@@ -1,18 +1,27 @@
+import collections
+
 from dragonfly.grammar.elements import RuleRef, Alternative, Repetition
 from dragonfly.grammar.rule_compound import CompoundRule
-from dragonfly import FuncContext
+from dragonfly import FuncContext, MappingRule, Rule
 from castervoice.lib.const import CCRType
 from castervoice.lib.context import AppContext
 from castervoice.lib.ctrl.mgr.rules_enabled_diff import RulesEnabledDiff
+from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
+from castervoice.lib.merge.ccrmerging2.ccr_context_index import CCRContextIndex
+from castervoice.lib.merge.ccrmerging2.compatibility.compat_result import CompatibilityResult
 from castervoice.lib.merge.ccrmerging2.merge_result import MergeResult
+from castervoice.lib.merge.ccrmerging2.merging.merge_rule_builder import MergeRuleBuilder
 
 
 class CCRMerger2(object):
     _ORIGINAL = "original"
     _SEQ = "caster_base_sequence"
     _TERMINAL = "terminal"
+    _LAYOUT_COMPAT = "compat"
+    _LAYOUT_MERGED = "merged"
 
-    def __init__(self, transformers_runner, compatibility_checker, merging_strategy, max_repetitions, smr_configurer):
+    def __init__(self, transformers_runner, compatibility_checker, merging_strategy, max_repetitions, smr_configurer,
+                 startup_cache=None, share_global_rule=False, repeat_rule_cache=None, repetition_segment_size=None):
         """
         5-Step Merge Process
         ====================
@@ -27,6 +36,12 @@ class CCRMerger2(object):
         :param merging_strategy: BaseMergingStrategy impl
         :param max_repetitions
         :param smr_configurer
+        :param startup_cache: StartupCache or None; remembers steps 3 and 4 between restarts
+        :param share_global_rule: bool; if True, the merged global rule is loaded once, in one grammar
+            with all of the repeat rules, and the app repeat rules only add their app rule to it
+        :param repeat_rule_cache: RepeatRuleCache or None; reuses the repeat rules of merged rules seen before
+        :param repetition_segment_size: int or None; if set, the repetition is compiled as a short repetition
+            of segments, each a repetition of up to this many commands, instead of as one long repetition
         """
         self._transformers_runner = transformers_runner
         self._compatibility_checker = compatibility_checker
@@ -35,6 +50,17 @@ class CCRMerger2(object):
         self._sequence = 0
         self._max_repetitions = int(max_repetitions)
         self._smr_configurer = smr_configurer
+        self._startup_cache = startup_cache
+        self._share_global_rule = share_global_rule
+        self._repeat_rule_cache = repeat_rule_cache
+        self._repetition_segment_size = repetition_segment_size
+        # repeat rules taken from the cache by the merge in progress
+        self._reused_repeat_rules = set()
+        # layout of the merge in progress from the startup cache, or the one being recorded for it
+        self._layout = None
+        self._new_layout = None
+        # accumulated specs of the global rules, shared by the app merged rules of a cached layout
+        self._layout_base = None
 
     def merge_rules(self, managed_rules, rule_sorter):
         """
@@ -43,26 +69,34 @@ class CCRMerger2(object):
         :return: MergeResult
         """
         pre_merge_rcns = [mr.get_rule_class_name() for mr in managed_rules]
+        self._reused_repeat_rules = set()
         rcns_to_details = CCRMerger2._rule_details_dict(managed_rules)
-        instantiated_rules = self._instantiate_and_configure_rules(managed_rules)
 
         # 1: run transformers over rules
-        transformed_rules = self._run_transformers(instantiated_rules, rcns_to_details)
+        transformed_rules = self._prepare_rules(managed_rules, rcns_to_details)
         # 2: sort rules into the order they'll be merged in
         sorted_rules = rule_sorter.sort_rules(transformed_rules)
         # 3: compute compatibility results for all rules vs all rules in O(n) for total specs
-        compat_results = self._compatibility_checker.compatibility_check(sorted_rules)
-        # 4: create one merged rule for each context, plus the no-contexts merged rule
+        layout_key = self._start_layout(sorted_rules, rcns_to_details)
+        compat_results = self._check_compatibility(sorted_rules)
         app_crs, non_app_crs = self._separate_app_rules(compat_results, rcns_to_details)
-        merged_rules = self._create_merged_rules(app_crs, non_app_crs)
-        # 5: turn the merged rules into repeat rules
-        repeat_rules = [self._create_repeat_rule(merged_rule) for merged_rule in merged_rules]
         contexts = CCRMerger2._create_contexts(app_crs, rcns_to_details)
+        if self._share_global_rule and len(app_crs) > 0:
+            # 4 & 5: one merged global rule, referenced by every repeat rule
+            rules_and_contexts = self._create_shared_repeat_rules(app_crs, non_app_crs, contexts)
+            self._finish_layout(layout_key)
+        else:
+            # 4: create one merged rule for each context, plus the no-contexts merged rule
+            merged_rules = self._create_merged_rules(app_crs, non_app_crs)
+            self._finish_layout(layout_key)
+            # 5: turn the merged rules into repeat rules
+            repeat_rules = [self._create_repeat_rule(merged_rule) for merged_rule in merged_rules]
+            rules_and_contexts = list(zip(repeat_rules, contexts))
 
-        rules_and_contexts = list(zip(repeat_rules, contexts))
         enabled_ordered_rcns = [cr.rule_class_name() for cr in compat_results]
         diff = CCRMerger2._calculate_post_merge_diff(pre_merge_rcns, enabled_ordered_rcns)
-        return MergeResult(rules_and_contexts, enabled_ordered_rcns, diff)
+        return MergeResult(rules_and_contexts, enabled_ordered_rcns, diff,
+                           single_grammar=self._share_global_rule and len(app_crs) > 0)
 
     @staticmethod
     def _calculate_post_merge_diff(pre_merge_rcns, post_merge_rcns):
@@ -88,6 +122,36 @@ class CCRMerger2(object):
 
         return RulesEnabledDiff(newly_enabled, newly_disabled)
 
+    def get_ko_report(self):
+        """
+        Which rules knocked out which in the last merge which ran the
+        compatibility checker (merges replayed from the startup cache don't).
+
+        :return: {rule class name: set of rule class names}, or None if the checker can't say
+        """
+        if not hasattr(self._compatibility_checker, "get_ko_report"):
+            return None
+        return self._compatibility_checker.get_ko_report()
+
+    def invalidate_rule(self, rule_class_name):
+        """
+        Signals that any state kept for the rule is stale (e.g. a selfmod rule
+        changed its own commands). Nothing is kept between merges here.
+
+        :param rule_class_name: str
+        """
+
+    def _prepare_rules(self, managed_rules, rcns_to_details):
+        """
+        Instantiates, configures and transforms the managed rules.
+
+        :param managed_rules: list of ManagedRule
+        :param rcns_to_details: map of {rule class name: rule details}
+        :return: list of MergeRule
+        """
+        instantiated_rules = self._instantiate_and_configure_rules(managed_rules)
+        return self._run_transformers(instantiated_rules, rcns_to_details)
+
     def _instantiate_and_configure_rules(self, managed_rules):
         instantiated_rules = []
         for mr in managed_rules:
@@ -100,9 +164,9 @@ class CCRMerger2(object):
     def _run_transformers(self, instantiated_rules, rcns_to_details):
         transformed_rules = []
         for rule in instantiated_rules:
-            has_exclusion = rcns_to_details[rule.get_rule_class_name()].transformer_exclusion
-            if not has_exclusion:
-                rule = self._transformers_runner.transform_rule(rule)
+            details = rcns_to_details[rule.get_rule_class_name()]
+            if not details.transformer_exclusion:
+                rule = self._transformers_runner.transform_rule(rule, details)
             transformed_rules.append(rule)
         return transformed_rules
 
@@ -124,43 +188,165 @@ class CCRMerger2(object):
 
     def _create_merged_rules(self, app_crs, non_app_crs):
         merged_rules = []
-        merged_non_app_crs_rule = self._merging_strategy.merge_into_single(non_app_crs)
+        merged_non_app_crs_rule = self._merge_into_single(non_app_crs)
         if merged_non_app_crs_rule is not None:
             merged_rules.append(merged_non_app_crs_rule)
         for app_cr in app_crs:
             with_one_app = list(non_app_crs)
             with_one_app.append(app_cr)
-            merged_rules.append(self._merging_strategy.merge_into_single(with_one_app))
+            merged_rules.append(self._merge_into_single(with_one_app))
         return merged_rules
 
+    def _create_shared_repeat_rules(self, app_crs, non_app_crs, contexts):
+        """
+        Instead of N+1 merged rules which each contain all of the global specs,
+        the merged global rule is prepared once and every repeat rule refers to it;
+        an app repeat rule also refers to its (unmerged) app rule. Since a rule
+        can only be in one grammar, the repeat rules get the contexts, and all of
+        them go in one grammar.
+
+        An app rule which KOs any global rule can't use the shared global rule,
+        so it gets a fully merged rule of its own, like in the unshared layout.
+
+        :param app_crs: list of CompatibilityResult for app rules
+        :param non_app_crs: list of CompatibilityResult for non-app rules
+        :param contexts: list of contexts, from _create_contexts
+        :return: list of (RepeatRule, None)
+        """
+        merged_non_app_crs_rule = self._merge_into_single(non_app_crs)
+        shared_rule = None
+        repeat_rules = []
+        if merged_non_app_crs_rule is not None:
+            shared_rule = merged_non_app_crs_rule.prepare_for_merger(name=self._get_new_rule_name("Global"),
+                                                                    exported=False)
+            repeat_rules.append(self._build_repeat_rule([shared_rule], contexts[0]))
+
+        non_app_rcns = set(cr.rule_class_name() for cr in non_app_crs)
+        for app_cr, context in zip(app_crs, contexts[1:]):
+            if shared_rule is not None and app_cr.incompatible_rule_class_names().isdisjoint(non_app_rcns):
+                app_rule = CCRMerger2._prepare_app_rule(app_cr.rule(), self._get_new_rule_name("App"))
+                repeat_rules.append(self._build_repeat_rule([shared_rule, app_rule], context))
+            else:
+                merged_rule = self._merge_into_single(list(non_app_crs) + [app_cr])
+                prepared_rule = merged_rule.prepare_for_merger(name=self._get_new_rule_name("Merged"),
+                                                               exported=False)
+                repeat_rules.append(self._build_repeat_rule([prepared_rule], context))
+        return [(repeat_rule, None) for repeat_rule in repeat_rules]
+
+    @staticmethod
+    def _prepare_app_rule(app_rule, name):
+        """
+        Like MergeRule.prepare_for_merger(), but without "list available commands",
+        which the shared global rule already has.
+        """
+        ordered_mapping = collections.OrderedDict()
+        for spec in sorted(app_rule._mapping.keys()):
+            ordered_mapping[spec] = app_rule._mapping[spec]
+        return MappingRule(name=name, mapping=ordered_mapping, extras=app_rule.get_extras(),
+                           defaults=app_rule.get_defaults(), exported=False)
+
+    def _merge_into_single(self, compat_results):
+        """
+        :param compat_results: list of CompatibilityResult
+        :return: MergeRule
+        """
+        if self._layout is None and self._new_layout is None:
+            return self._merging_strategy.merge_into_single(compat_results)
+
+        merge_key = " ".join(cr.rule_class_name() for cr in compat_results)
+        if self._layout is not None and merge_key not in self._layout[CCRMerger2._LAYOUT_MERGED]:
+            # recorded with share_global_rule on: not every merged rule was needed
+            return self._merging_strategy.merge_into_single(compat_results)
+        if self._layout is not None:
+            return self._merge_in_one_pass(self._layout[CCRMerger2._LAYOUT_MERGED][merge_key], compat_results)
+        selected = self._merging_strategy.select_rules(compat_results)
+        self._new_layout[CCRMerger2._LAYOUT_MERGED][merge_key] = [cr.rule_class_name() for cr in selected]
+        return self._merging_strategy.merge_into_single(compat_results)
+
+    def _start_layout(self, sorted_rules, rcns_to_details):
+        """
+        Looks up the startup cache for a previous merge of exactly these rules.
+        Only merging strategies which can say which rules they select can be cached.
+
+        :param sorted_rules: list of prepared MergeRules, in merge order
+        :param rcns_to_details: map of {rule class name: rule details}
+        :return: str key of the layout, or None if the merge can't be cached
+        """
+        self._layout = None
+        self._new_layout = None
+        if self._startup_cache is None or not hasattr(self._merging_strategy, "select_rules"):
+            return None
+        key = StartupCache.get_merge_layout_key(sorted_rules, rcns_to_details,
+                                                self._compatibility_checker, self._merging_strategy)
+        self._layout = self._startup_cache.get_merge_layout(key)
+        if self._layout is None:
+            self._new_layout = {CCRMerger2._LAYOUT_COMPAT: [], CCRMerger2._LAYOUT_MERGED: {}}
+        return key
+
+    def _finish_layout(self, key):
+        if self._new_layout is not None:
+            self._startup_cache.put_merge_layout(key, self._new_layout)
+        self._layout = None
+        self._new_layout = None
+        self._layout_base = None
+
+    def _check_compatibility(self, sorted_rules):
+        """
+        :param sorted_rules: list of prepared MergeRules, in merge order
+        :return: list of CompatibilityResult
+        """
+        if self._layout is not None:
+            rules = {rule.get_rule_class_name(): rule for rule in sorted_rules}
+            return [CompatibilityResult(rules[rcn], frozenset(incompatible_rcns))
+                    for rcn, incompatible_rcns in self._layout[CCRMerger2._LAYOUT_COMPAT]]
+
+        compat_results = self._compatibility_checker.compatibility_check(sorted_rules)
+        if self._new_layout is not None:
+            self._new_layout[CCRMerger2._LAYOUT_COMPAT] = [[cr.rule_class_name(),
+                                                            sorted(cr.incompatible_rule_class_names())]
+                                                           for cr in compat_results]
+        return compat_results
+
+    def _merge_in_one_pass(self, selected_rcns, compat_results):
+        """
+        Builds the same merged rule as merging the selected rules one by one,
+        but only parses the combined specs once.
+
+        :param selected_rcns: list of str, the rules which the merging strategy selected
+        :param compat_results: list of CompatibilityResult
+        :return: MergeRule
+        """
+        rules = {cr.rule_class_name(): cr.rule() for cr in compat_results}
+        selected = [rules[rcn] for rcn in selected_rcns]
+        if self._layout_base is None or not self._layout_base.is_prefix_of(selected):
+            self._layout_base = MergeRuleBuilder.from_rules(selected)
+            return self._layout_base.build()
+        return MergeRuleBuilder.from_rules(selected, self._layout_base).build()
+
     @staticmethod
     def _create_contexts(app_crs, rcns_to_details):
         """
-        Returns a list of contexts, AppContexts based on 'executable', FuncContext, one for each
-        app rule, and if more than zero app rules, the negation context for the
-        global ccr rule. (Global rule should be active when none of the other
-        contexts are.) If there are zero app rules, [None] will be returned
-        so the result can be zipped.
+        Returns a list of contexts, one for each app rule (matching the AppContext based
+        on 'executable', or the FuncContext), and if more than zero app rules, the context
+        for the global ccr rule, which matches when none of the others do. All of them
+        are looked up in one CCRContextIndex. If there are zero app rules, [None] will
+        be returned so the result can be zipped.
 
         :param app_crs: list of CompatibilityResult for app rules
         :param rcns_to_details: map of {rule class name: rule details}
         :return:
         """
-        contexts = []
-        negation_context = None
+        if len(app_crs) == 0:
+            return [None]
+        app_contexts = []
         for cr in app_crs:
             details = rcns_to_details[cr.rule_class_name()]
             if details.function_context is not None:
                 context = FuncContext(function=details.function_context, executable=details.executable, title=details.title)
             else:
                 context = AppContext(executable=details.executable, title=details.title)
-            contexts.append(context)
-            if negation_context is None:
-                negation_context = ~context
-            else:
-                negation_context &= ~context
-        contexts.insert(0, negation_context)
-        return contexts
+            app_contexts.append(context)
+        return CCRContextIndex(app_contexts).create_contexts()
 
     @staticmethod
     def _rule_details_dict(managed_rules):
@@ -174,10 +360,30 @@ class CCRMerger2(object):
         return result
 
     def _create_repeat_rule(self, merge_rule):
-        merge_rule = merge_rule.prepare_for_merger()
-        alts = [RuleRef(rule=merge_rule)]  # +[RuleRef(rule=sm) for sm in selfmod]
+        if self._repeat_rule_cache is None:
+            return self._build_repeat_rule([merge_rule.prepare_for_merger()])
+
+        key = (self._max_repetitions, self._repetition_segment_size, CCRMerger2._get_content_key(merge_rule))
+        entry = self._repeat_rule_cache.get(key)
+        if entry is not None and entry[0] not in self._reused_repeat_rules:
+            repeat_rule = entry[0]
+            self._reused_repeat_rules.add(repeat_rule)
+            return repeat_rule
+
+        prepared_rule = merge_rule.prepare_for_merger()
+        repeat_rule = self._build_repeat_rule([prepared_rule])
+        self._repeat_rule_cache.put(key, repeat_rule, repeat_rule.dependencies(set()))
+        return repeat_rule
+
+    def _build_repeat_rule(self, prepared_rules, context=None):
+        """
+        :param prepared_rules: list of rules which the repeat rule can repeat
+        :param context: the repeat rule's own context; only used when all repeat rules are in one grammar
+        :return: RepeatRule
+        """
+        alts = [RuleRef(rule=prepared_rule) for prepared_rule in prepared_rules]
         single_action = Alternative(alts)
-        sequence = Repetition(single_action, min=1, max=self._max_repetitions, name=CCRMerger2._SEQ)
+        sequence, segmented = self._create_sequence(single_action)
         original = Alternative(alts, name=CCRMerger2._ORIGINAL)
         terminal = Alternative(alts, name=CCRMerger2._TERMINAL)
 
@@ -193,12 +399,74 @@ class CCRMerger2(object):
                 _terminal = extras[CCRMerger2._TERMINAL] if CCRMerger2._TERMINAL in extras else None
                 if _original is not None: _original.execute()
                 if _sequence is not None:
+                    if segmented:
+                        _sequence = [action for segment in _sequence for action in segment]
                     for action in _sequence:
                         action.execute()
                 if _terminal is not None: _terminal.execute()
 
-        return RepeatRule(name=self._get_new_rule_name())
+        repeat_rule = RepeatRule(name=self._get_new_rule_name(), context=context)
+        # lets the grammar container keep a loaded grammar which has exactly the same content
+        repeat_rule.content_key = (str(context), self._max_repetitions, self._repetition_segment_size,
+                                   tuple(CCRMerger2._get_content_key(prepared_rule) for prepared_rule in prepared_rules))
+        return repeat_rule
+
+    def _create_sequence(self, single_action):
+        """
+        A Repetition is compiled as one nested optional copy of its child per
+        repetition, so the compiled repeat rule grows with max_repetitions (for
+        engines which inline rule references, times the size of the merged rule).
+        Split into segments, N commands in a row take about
+        N / segment size + segment size copies instead, and the user can keep
+        speaking past the end of a segment: the next segment picks up the
+        sequence. Segments are only used if they divide max_repetitions evenly,
+        so the number of commands which can be spoken in a row doesn't change:
+        the largest such segment size up to the configured one is used.
+        Short repetitions aren't split.
+
+        :param single_action: element matching one command
+        :return: (the sequence element, whether its value is a list of segments)
+        """
+        segment_size = CCRMerger2._get_segment_size(self._max_repetitions, self._repetition_segment_size or 0)
+        if segment_size is None:
+            return Repetition(single_action, min=1, max=self._max_repetitions, name=CCRMerger2._SEQ), False
+
+        segment_rule = Rule(name=self._get_new_rule_name("RepeaterSegment"),
+                            element=Repetition(single_action, min=1, max=segment_size), exported=False)
+        segment_count = self._max_repetitions // segment_size
+        return Repetition(RuleRef(rule=segment_rule), min=1, max=segment_count, name=CCRMerger2._SEQ), True
+
+    @staticmethod
+    def _get_segment_size(max_repetitions, max_segment_size):
+        """
+        Repetition(min=1, max=m) matches up to m children, except that max=2 only
+        matches one, so segments and the number of segments must both be at least 3.
+
+        :param max_repetitions: int
+        :param max_segment_size: int, 0 for no segments
+        :return: the largest segment size which divides max_repetitions, or None
+        """
+        for segment_size in range(min(max_segment_size, max_repetitions // 3), 2, -1):
+            if max_repetitions % segment_size == 0:
+                return segment_size
+        return None
+
+    @staticmethod
+    def _get_content_key(prepared_rule):
+        """
+        Equal for two prepared rules only if they have the same specs, with the
+        same action and extra objects (so a reloaded rule never looks unchanged).
+        "list available commands" is left out: it's a new action every time.
+
+        :param prepared_rule: MappingRule
+        :return: tuple
+        """
+        mapping = tuple(sorted((spec, id(action)) for spec, action in prepared_rule._mapping.items()
+                               if spec != "list available commands"))
+        extras = tuple(sorted((name, id(extra)) for name, extra in prepared_rule._extras.items()))
+        defaults = tuple(sorted((name, repr(value)) for name, value in prepared_rule._defaults.items()))
+        return mapping, extras, defaults
 
-    def _get_new_rule_name(self):
+    def _get_new_rule_name(self, prefix="Repeater"):
         self._sequence += 1
-        return "Repeater{}".format(str(self._sequence))
+        return "{}{}".format(prefix, str(self._sequence))
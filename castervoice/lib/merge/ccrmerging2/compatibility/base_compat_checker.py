@@ -8,3 +8,10 @@ class BaseCompatibilityChecker(object):
 
     def compatibility_check(self, mergerules):
         raise DontUseBaseClassError(self)
+
+    def get_ko_report(self):
+        """
+        :return: {rule class name: set of rule class names} of the last check: for each
+            rule, the rules which knocked it out / which it is incompatible with
+        """
+        raise DontUseBaseClassError(self)
@@ -1,5 +1,6 @@
 from castervoice.lib.merge.ccrmerging2.compatibility.base_compat_checker import BaseCompatibilityChecker
 from castervoice.lib.merge.ccrmerging2.compatibility.compat_result import CompatibilityResult
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_conflict_index import SpecConflictIndex
 
 
 class SimpleCompatibilityChecker(BaseCompatibilityChecker):
@@ -9,25 +10,33 @@ class SimpleCompatibilityChecker(BaseCompatibilityChecker):
     provided order.
     """
 
+    def __init__(self, conflict_index=None):
+        """
+        :param conflict_index: SpecConflictIndex or None; may be shared with other checkers
+        """
+        self._conflict_index = conflict_index if conflict_index is not None else SpecConflictIndex()
+        self._ko_report = {}
+
     def compatibility_check(self, mergerules):
-        all_specs = set()
+        mergerules = list(mergerules)
+        self._conflict_index.update(mergerules)
+        kept_rcns = set()
         results = []
+        self._ko_report = {}
 
-        for rule in reversed(list(mergerules)):
-            rule_specs = frozenset(rule.get_mapping().keys())
-            if SimpleCompatibilityChecker._intersection_exists(rule_specs, all_specs):
+        for rule in reversed(mergerules):
+            rcn = rule.get_rule_class_name()
+            knocked_out_by = self._conflict_index.get_conflicts(rcn, kept_rcns)
+            if len(knocked_out_by) > 0:
+                self._ko_report[rcn] = knocked_out_by
                 continue
-            all_specs.update(rule_specs)
+            kept_rcns.add(rcn)
             results.append(CompatibilityResult(rule, frozenset()))
 
         return list(reversed(results))
 
-    @staticmethod
-    def _intersection_exists(set_a, set_b):
-        """
-        Lazy/fast intersection.
-        """
-        for a in set_a:
-            if a in set_b:
-                return True
-        return False
+    def get_ko_report(self):
+        return dict(self._ko_report)
+
+    def get_description(self):
+        return "{}:{}".format(type(self).__name__, self._conflict_index.get_description())
@@ -0,0 +1,109 @@
+class SpecConflictIndex(object):
+    """
+    Remembers the specs of every rule it has seen, and which rules share
+    specs with which, across merges. A rule is only (re)indexed when the
+    index is given a different rule object for its rule class name (e.g. a
+    newly prepared rule after a reload), so with a merger which keeps its
+    prepared rules, enabling or disabling a rule only costs work proportional
+    to that rule's specs and conflicts.
+
+    Rules stay indexed after they're disabled; conflicts are only reported
+    between the rules asked about.
+
+    With a SpecExpander, specs are indexed by their expansions, so rules also
+    conflict if any of their specs can be spoken the same way.
+    """
+
+    def __init__(self, spec_expander=None):
+        """
+        :param spec_expander: SpecExpander or None to compare specs as they are written
+        """
+        self._spec_expander = spec_expander
+        # {rule class name: (rule, frozenset of specs or expansions)}
+        self._rules = {}
+        # {spec: set of rule class names}
+        self._specs_to_rcns = {}
+        # {rule class name: {conflicting rule class name: number of shared specs}}
+        self._conflicts = {}
+        self.indexed_rule_count = 0
+        # specs (or expansions) indexed, in total: the cost of indexing
+        self.indexed_spec_count = 0
+
+    def update(self, rules):
+        """
+        Indexes any of the rules which aren't indexed yet, or which have
+        been replaced by a different rule object.
+
+        :param rules: collection of MergeRule
+        """
+        for rule in rules:
+            rcn = rule.get_rule_class_name()
+            entry = self._rules.get(rcn)
+            if entry is None or entry[0] is not rule:
+                self._index(rcn, rule)
+
+    def remove(self, rule_class_name):
+        if rule_class_name not in self._rules:
+            return
+        specs = self._rules.pop(rule_class_name)[1]
+        for spec in specs:
+            rcns = self._specs_to_rcns[spec]
+            rcns.discard(rule_class_name)
+            if len(rcns) == 0:
+                del self._specs_to_rcns[spec]
+            for other_rcn in rcns:
+                self._remove_conflict(other_rcn, rule_class_name)
+        del self._conflicts[rule_class_name]
+
+    def get_conflicts(self, rule_class_name, among=None):
+        """
+        :param rule_class_name: str
+        :param among: collection of rule class names to limit the result to, or None for all indexed rules
+        :return: set of the rule class names of the rules which share any spec with the rule
+        """
+        conflicts = self._conflicts.get(rule_class_name, {})
+        if among is None:
+            return set(conflicts)
+        return set(rcn for rcn in conflicts if rcn in among)
+
+    def get_description(self):
+        """
+        :return: str, how specs are compared
+        """
+        if self._spec_expander is None:
+            return "exact"
+        return "expanded:{}".format(self._spec_expander.get_max_expansions())
+
+    def get_shared_specs(self, rule_class_name, other_rule_class_name):
+        """
+        :return: sorted list of the specs (or expansions) which both rules have
+        """
+        if rule_class_name not in self._rules or other_rule_class_name not in self._rules:
+            return []
+        return sorted(self._rules[rule_class_name][1] & self._rules[other_rule_class_name][1])
+
+    def _index(self, rcn, rule):
+        self.remove(rcn)
+        specs = frozenset(rule.get_mapping().keys())
+        if self._spec_expander is not None:
+            specs = frozenset(expansion for spec in specs for expansion in self._spec_expander.expand(spec))
+        self._rules[rcn] = (rule, specs)
+        self._conflicts[rcn] = {}
+        for spec in specs:
+            rcns = self._specs_to_rcns.setdefault(spec, set())
+            for other_rcn in rcns:
+                self._add_conflict(rcn, other_rcn)
+                self._add_conflict(other_rcn, rcn)
+            rcns.add(rcn)
+        self.indexed_rule_count += 1
+        self.indexed_spec_count += len(specs)
+
+    def _add_conflict(self, rcn, other_rcn):
+        conflicts = self._conflicts[rcn]
+        conflicts[other_rcn] = conflicts.get(other_rcn, 0) + 1
+
+    def _remove_conflict(self, rcn, other_rcn):
+        conflicts = self._conflicts[rcn]
+        conflicts[other_rcn] -= 1
+        if conflicts[other_rcn] == 0:
+            del conflicts[other_rcn]
@@ -0,0 +1,114 @@
+import re
+
+
+class SpecExpander(object):
+    """
+    Expands a dragonfly spec into every sequence of words (and extra/list
+    references) it can be spoken as, so that specs which are written
+    differently but overlap when spoken ("go [to] line <n>" and
+    "go to line <n>") can be found to conflict.
+
+    References stay as they are written: "<n>" only overlaps with "<n>".
+
+    A spec with more than max_expansions expansions (or which can't be
+    parsed) isn't expanded; it only conflicts with exactly the same spec, as
+    if it weren't expanded at all.
+    """
+
+    _TOKEN = re.compile(r"\s*(<[^>]*>|\{[^}]*\}|[\[\]()|]|[^\s\[\]()|<>{}]+)")
+
+    def __init__(self, max_expansions=256):
+        """
+        :param max_expansions: int, the most expansions to produce for one spec
+        """
+        self._max_expansions = max_expansions
+        # {spec: frozenset of expansions}
+        self._cache = {}
+        # specs which weren't expanded
+        self.unexpanded_specs = set()
+
+    def get_max_expansions(self):
+        return self._max_expansions
+
+    def expand(self, spec):
+        """
+        :param spec: str
+        :return: frozenset of str: the expansions, words separated by single spaces
+        """
+        if spec in self._cache:
+            return self._cache[spec]
+
+        expansions = None
+        tokens = SpecExpander._tokenize(spec)
+        if tokens is not None:
+            try:
+                sequences, position = self._parse_alternatives(tokens, 0)
+                # tokens left over: an unbalanced ")" or "]"
+                if position == len(tokens):
+                    expansions = frozenset(" ".join(sequence) for sequence in sequences if len(sequence) > 0)
+            except _Unexpandable:
+                pass
+        if expansions is None:
+            self.unexpanded_specs.add(spec)
+        if not expansions:
+            expansions = frozenset([" ".join(spec.split())])
+
+        self._cache[spec] = expansions
+        return expansions
+
+    @staticmethod
+    def _tokenize(spec):
+        tokens = []
+        position = 0
+        spec = spec.strip()
+        while position < len(spec):
+            match = SpecExpander._TOKEN.match(spec, position)
+            if match is None:
+                return None
+            tokens.append(match.group(1))
+            position = match.end()
+        return tokens
+
+    def _parse_alternatives(self, tokens, position):
+        """
+        alternatives := sequence ("|" sequence)*
+
+        :return: (list of tuples of words, position after the alternatives)
+        """
+        sequences, position = self._parse_sequence(tokens, position)
+        alternatives = list(sequences)
+        while position < len(tokens) and tokens[position] == "|":
+            sequences, position = self._parse_sequence(tokens, position + 1)
+            alternatives.extend(sequences)
+            self._check_size(len(alternatives))
+        return alternatives, position
+
+    def _parse_sequence(self, tokens, position):
+        """
+        sequence := ("[" alternatives "]" | "(" alternatives ")" | word)*
+        """
+        sequences = [()]
+        while position < len(tokens) and tokens[position] not in ("|", "]", ")"):
+            token = tokens[position]
+            if token in ("[", "("):
+                closing = "]" if token == "[" else ")"
+                inner, position = self._parse_alternatives(tokens, position + 1)
+                if position >= len(tokens) or tokens[position] != closing:
+                    raise _Unexpandable()  # unbalanced
+                position += 1
+                if token == "[":
+                    inner = [()] + inner
+            else:
+                inner = [(token,)]
+                position += 1
+            self._check_size(len(sequences) * len(inner))
+            sequences = [sequence + part for sequence in sequences for part in inner]
+        return sequences, position
+
+    def _check_size(self, size):
+        if size > self._max_expansions:
+            raise _Unexpandable()
+
+
+class _Unexpandable(Exception):
+    pass
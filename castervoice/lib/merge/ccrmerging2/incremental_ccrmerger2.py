@@ -0,0 +1,98 @@
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+
+
+class _PreparedRule(object):
+    def __init__(self, managed_rule, rule, serial):
+        """
+        :param managed_rule: the ManagedRule the prepared rule was made from
+        :param rule: instantiated, configured and transformed MergeRule
+        :param serial: int, unique per prepared rule; used in merge keys
+        """
+        self.managed_rule = managed_rule
+        self.rule = rule
+        self.serial = serial
+
+
+class IncrementalCCRMerger2(CCRMerger2):
+    """
+    A CCRMerger2 which remembers work done in previous merges.
+
+    Enabling or disabling one rule only changes one rule in the set being merged,
+    so this merger keeps:
+    1. the prepared (instantiated/configured/transformed) copy of every rule it
+       has seen, for as long as the same ManagedRule is registered for that rule
+       class name (re-registration on file reload creates a new ManagedRule), and
+    2. the merged rule of each context from the previous merge, keyed by exactly
+       which prepared rules went into it and which rules they were incompatible with.
+
+    The result of a merge is identical to CCRMerger2's: only the rules and merged
+    rules which the delta actually touches get rebuilt.
+    """
+
+    def __init__(self, transformers_runner, compatibility_checker, merging_strategy, max_repetitions, smr_configurer,
+                 startup_cache=None, share_global_rule=False, repeat_rule_cache=None, repetition_segment_size=None):
+        super(IncrementalCCRMerger2, self).__init__(transformers_runner, compatibility_checker, merging_strategy,
+                                                    max_repetitions, smr_configurer, startup_cache, share_global_rule,
+                                                    repeat_rule_cache, repetition_segment_size)
+        # {rule class name: _PreparedRule}
+        self._prepared_rules = {}
+        # {merge key: MergeRule} -- only the merged rules produced by the last merge
+        self._merged_rules = {}
+        self._current_merged_rules = {}
+        self._serial = 0
+
+    def merge_rules(self, managed_rules, rule_sorter):
+        self._current_merged_rules = {}
+        result = super(IncrementalCCRMerger2, self).merge_rules(managed_rules, rule_sorter)
+        # anything not used by this merge can't be reused by the next one
+        self._merged_rules = self._current_merged_rules
+        self._current_merged_rules = {}
+        return result
+
+    def invalidate_rule(self, rule_class_name):
+        if rule_class_name in self._prepared_rules:
+            del self._prepared_rules[rule_class_name]
+
+    def _prepare_rules(self, managed_rules, rcns_to_details):
+        prepared = []
+        for mr in managed_rules:
+            rcn = mr.get_rule_class_name()
+            entry = self._prepared_rules.get(rcn)
+            if entry is None or entry.managed_rule is not mr:
+                rule = super(IncrementalCCRMerger2, self)._prepare_rules([mr], rcns_to_details)[0]
+                self._serial += 1
+                entry = _PreparedRule(mr, rule, self._serial)
+                self._prepared_rules[rcn] = entry
+            prepared.append(entry.rule)
+        return prepared
+
+    def _merge_into_single(self, compat_results):
+        key = self._get_merge_key(compat_results)
+        if key is None:
+            return super(IncrementalCCRMerger2, self)._merge_into_single(compat_results)
+
+        if key in self._current_merged_rules:
+            merged_rule = self._current_merged_rules[key]
+        elif key in self._merged_rules:
+            merged_rule = self._merged_rules[key]
+        else:
+            merged_rule = super(IncrementalCCRMerger2, self)._merge_into_single(compat_results)
+        self._current_merged_rules[key] = merged_rule
+        return merged_rule
+
+    def _get_merge_key(self, compat_results):
+        """
+        The merging strategy is deterministic for its (ordered) input, so a merged rule
+        can be reused if the same prepared rules with the same incompatibilities are
+        passed to it in the same order.
+
+        :param compat_results: list of CompatibilityResult
+        :return: tuple, or None if any rule didn't come from this merger's prepared rules
+        """
+        key = []
+        for cr in compat_results:
+            entry = self._prepared_rules.get(cr.rule_class_name())
+            if entry is None or entry.rule is not cr.rule():
+                return None
+            key.append((entry.serial, frozenset(cr.incompatible_rule_class_names())))
+        return tuple(key)
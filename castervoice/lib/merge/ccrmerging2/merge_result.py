@@ -1,11 +1,14 @@
 class MergeResult(object):
 
-    def __init__(self, ccr_rules_and_contexts, all_rule_class_names, rules_enabled_diff):
+    def __init__(self, ccr_rules_and_contexts, all_rule_class_names, rules_enabled_diff, single_grammar=False):
         """
         :param ccr_rules_and_contexts: 1-n RepeatRules and 0-n AppContexts
         :param all_rule_class_names: list of str
         :param rules_enabled_diff: RulesEnabledDiff
+        :param single_grammar: bool; if True, the RepeatRules share rules, so they must all go
+            in one grammar, and they have their own contexts (the AppContexts are all None)
         """
         self.ccr_rules_and_contexts = ccr_rules_and_contexts
         self.all_rule_class_names = all_rule_class_names
         self.rules_enabled_diff = rules_enabled_diff
+        self.single_grammar = single_grammar
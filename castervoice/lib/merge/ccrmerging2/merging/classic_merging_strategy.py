@@ -1,4 +1,5 @@
 from castervoice.lib.merge.ccrmerging2.merging.base_merging_strategy import BaseMergingStrategy
+from castervoice.lib.merge.ccrmerging2.merging.merge_rule_builder import MergeRuleBuilder
 
 
 class ClassicMergingStrategy(BaseMergingStrategy):
@@ -6,6 +7,11 @@ class ClassicMergingStrategy(BaseMergingStrategy):
     This strategy KOs any incompatible rules.
     """
 
+    def __init__(self):
+        # the accumulated specs of a previous merge: the N app merged rules
+        # all start with the same global rules, so those are only added once
+        self._base = None
+
     def merge_into_single(self, sorted_checked_rules):
         """
         Merge any rules which aren't KO'd by their peers.
@@ -14,6 +20,17 @@ class ClassicMergingStrategy(BaseMergingStrategy):
         :param sorted_checked_rules: list of CompatibilityResult
         :return: MergeRule
         """
+        selected_rules = [compat_result.rule() for compat_result in self.select_rules(sorted_checked_rules)]
+        if self._base is None or not self._base.is_prefix_of(selected_rules):
+            self._base = MergeRuleBuilder.from_rules(selected_rules)
+            return self._base.build()
+        return MergeRuleBuilder.from_rules(selected_rules, self._base).build()
+
+    def select_rules(self, sorted_checked_rules):
+        """
+        :param sorted_checked_rules: list of CompatibilityResult
+        :return: list of the CompatibilityResults which aren't KO'd, in merge order
+        """
 
         length = len(sorted_checked_rules)
         rule_range = range(0, length)
@@ -25,20 +42,20 @@ class ClassicMergingStrategy(BaseMergingStrategy):
             indices_map[compat_result.rule_class_name()] = index
 
         # rules with higher indices (activated "later") get priority
-        merged_rule = None
+        selected = []
         for index in rule_range:
             compat_result = sorted_checked_rules[index]
             ko = False
             rule_index = indices_map[compat_result.rule_class_name()]
             # this looks like O(n^2), and it is for the rule graph, but it's O(n) for specs:
             for incompat_rcn in compat_result.incompatible_rule_class_names():
+                # (e.g. an app rule, when merging the global rules)
+                if incompat_rcn not in indices_map:
+                    continue
                 incompat_index = indices_map[incompat_rcn]
                 if incompat_index > rule_index:
                     ko = True
                     break
             if not ko:
-                if merged_rule is None:
-                    merged_rule = compat_result.rule()
-                else:
-                    merged_rule = merged_rule.merge(compat_result.rule())
-        return merged_rule
+                selected.append(compat_result)
+        return selected
@@ -0,0 +1,86 @@
+import collections
+
+from castervoice.lib.merge.mergerule import MergeRule
+
+
+class MergeRuleBuilder(object):
+    """
+    Accumulates the specs, extras and defaults of any number of MergeRules and
+    builds a single MergeRule out of them, so the combined specs are only
+    parsed once. (MergeRule.merge() builds a new rule for every merged rule,
+    which makes merging n rules one at a time O(n^2) for total specs.)
+
+    Later rules win conflicts, exactly as with MergeRule.merge().
+
+    A builder can be copied, so that the work done for a common prefix of rules
+    (e.g. the global CCR rules) is shared by every merged rule which starts with it.
+    """
+
+    def __init__(self):
+        self._rules = []
+        self._mapping = {}
+        self._extras = collections.OrderedDict()
+        self._defaults = {}
+
+    @staticmethod
+    def from_rules(rules, base=None):
+        """
+        :param rules: list of MergeRule, in merge order
+        :param base: MergeRuleBuilder or None; reused if its rules are a prefix of the rules
+        :return: MergeRuleBuilder
+        """
+        if base is not None and base.is_prefix_of(rules):
+            builder = base.copy()
+            rules = rules[len(base._rules):]
+        else:
+            builder = MergeRuleBuilder()
+        for rule in rules:
+            builder.add(rule)
+        return builder
+
+    def add(self, rule):
+        """
+        :param rule: MergeRule
+        :return: this builder
+        """
+        self._rules.append(rule)
+        self._mapping.update(rule.get_mapping())
+        for extra in rule.get_extras():
+            self._extras[extra.name] = extra
+        self._defaults.update(rule.get_defaults())
+        return self
+
+    def is_prefix_of(self, rules):
+        """
+        :param rules: list of MergeRule
+        :return: bool, whether the same rule instances were added to this builder,
+            in the same order, as the first rules of the list
+        """
+        if len(self._rules) > len(rules):
+            return False
+        for added_rule, rule in zip(self._rules, rules):
+            if added_rule is not rule:
+                return False
+        return True
+
+    def copy(self):
+        builder = MergeRuleBuilder()
+        builder._rules = list(self._rules)
+        builder._mapping = self._mapping.copy()
+        builder._extras = self._extras.copy()
+        builder._defaults = self._defaults.copy()
+        return builder
+
+    def build(self):
+        """
+        Doesn't change the builder, so it can be built again or copied afterwards.
+
+        :return: MergeRule, or None if no rules were added
+        """
+        if len(self._rules) == 0:
+            return None
+        if len(self._rules) == 1:
+            return self._rules[0]
+        return MergeRule(mapping=self._mapping.copy(),
+                         extras=list(self._extras.values()),
+                         defaults=self._defaults.copy())
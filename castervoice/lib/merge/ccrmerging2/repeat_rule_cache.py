@@ -0,0 +1,70 @@
+import collections
+
+
+class RepeatRuleCache(object):
+    """
+    Remembers the most recently built repeat rules (with the rules they refer
+    to), so that when a merged rule comes back (e.g. a rule is disabled
+    and then enabled again), the same rule objects are loaded again instead of
+    new ones being built: building one parses every spec, and the engine then
+    compiles exactly the same grammar as before (which Kaldi's own compiled FST
+    cache can recognize).
+
+    Least recently used entries are evicted once there are more than max_size.
+    """
+
+    def __init__(self, max_size):
+        """
+        :param max_size: int, how many repeat rules to keep
+        """
+        self._max_size = max_size
+        # {content key: (RepeatRule, list of the rules it refers to)}
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        A repeat rule can only be in one grammar, so a rule which is still in
+        a loaded grammar isn't returned. The returned rules are enabled again
+        (emptying their last grammar disabled them).
+
+        :param key: the merged rule's content key
+        :return: (RepeatRule, list of the rules it refers to), or None
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None or RepeatRuleCache._is_in_use(entry[0]):
+            if entry is not None:
+                self._entries[key] = entry
+            self.misses += 1
+            return None
+        self._entries[key] = entry  # now the most recently used
+        self.hits += 1
+        for rule in [entry[0]] + entry[1]:
+            RepeatRuleCache._reset_state(rule)
+        return entry
+
+    def put(self, key, repeat_rule, dependencies):
+        self._entries.pop(key, None)
+        self._entries[key] = (repeat_rule, dependencies)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _reset_state(rule):
+        # Rule.enable() would try to activate the rule in its old, unloaded grammar
+        rule._enabled = True
+        rule._active = None
+
+    @staticmethod
+    def _is_in_use(repeat_rule):
+        grammar = repeat_rule.grammar
+        return grammar is not None and grammar.loaded
@@ -16,25 +16,25 @@ def _preserve(spec):
     p.original = spec
 
     angles_mode = False
-    preserved_word = ""
-    cleaned_spec = ""
+    preserved_word = []
+    cleaned_spec = []
     for c in spec:
         if c == '<':
             angles_mode = True
-            cleaned_spec += "<?"
+            cleaned_spec.append("<?")
             continue
         elif c == '>':
             angles_mode = False
-            p.extras.append(preserved_word)
-            preserved_word = ""
-            cleaned_spec += ">"
+            p.extras.append("".join(preserved_word))
+            preserved_word = []
+            cleaned_spec.append(">")
             continue
         elif angles_mode:
-            preserved_word += c
+            preserved_word.append(c)
         else:
-            cleaned_spec += c
-    p.cleaned = cleaned_spec
-    p.altered = cleaned_spec
+            cleaned_spec.append(c)
+    p.cleaned = "".join(cleaned_spec)
+    p.altered = p.cleaned
 
     return p
 
@@ -61,16 +61,14 @@ def _spec_override_from_config(rule, definitions):
     '''SPECS'''
     mapping = rule._mapping.copy()
     specs_changed = False
+    specs_replacer = definitions.get_specs_replacer()
     for spec in list(mapping.keys()):
+        if len(specs_replacer) == 0:
+            break
         action = mapping[spec]
 
         pspec = _preserve(spec)
-
-        for original in definitions.specs.keys():
-            if original in pspec.altered:
-                new = definitions.specs[original]
-                pspec.altered = pspec.altered.replace(original, new)
-
+        pspec.altered = specs_replacer.replace(pspec.altered)
         pspec.altered = _restore(pspec)
 
         if spec == pspec.altered:
@@ -84,21 +82,21 @@ def _spec_override_from_config(rule, definitions):
     extras_list = list(rule._extras.values())
     resulting_extras_list = list(extras_list)
     extras_changed = False
+    extras_replacer = definitions.get_extras_replacer()
     for extra in extras_list:
         # only choices; no need to bother with dictation or integers
-        if isinstance(extra, Choice):
+        if isinstance(extra, Choice) and len(extras_replacer) > 0:
             choices_dict_copy = extra._choices.copy()  # operate on this copy of the choices dict
             choices_dict_copy_keys = set(choices_dict_copy.keys())
             replaced_a_choice_key = False
             for choices_key in choices_dict_copy_keys:  # ex: "dunce make" = key, something else = value
-                for replaceable_text in definitions.extras.keys():  # ex: "dunce" is key, "down" is the value
-                    if replaceable_text in choices_key:  # ex: "dunce" is in "dunce make"
-                        replaced_a_choice_key = True
-                        value = choices_dict_copy[choices_key]
-                        del choices_dict_copy[choices_key]
-                        replacement = definitions.extras[replaceable_text]
-                        choices_key = choices_key.replace(replaceable_text, replacement)
-                        choices_dict_copy[choices_key] = value
+                # ex: "dunce" is in "dunce make", "dunce" -> "down" makes "down make"
+                for new_choices_key in extras_replacer.replace_in_steps(choices_key):
+                    replaced_a_choice_key = True
+                    value = choices_dict_copy[choices_key]
+                    del choices_dict_copy[choices_key]
+                    choices_key = new_choices_key
+                    choices_dict_copy[choices_key] = value
             if replaced_a_choice_key:
                 extras_changed = True
                 new_choice = Choice(extra.name, choices_dict_copy)
@@ -108,21 +106,16 @@ def _spec_override_from_config(rule, definitions):
     '''DEFAULTS'''
     defaults = rule._defaults.copy()
     defaults_changed = False
-    if len(defaults) > 0:
+    defaults_replacer = definitions.get_defaults_replacer()
+    if len(defaults) > 0 and len(defaults_replacer) > 0:
         for default_key in list(defaults.keys()):  #
             value = defaults[default_key]
             if isinstance(value, six.string_types):
                 '''only replace strings; also,
                 only replace values, not keys:
                 default_key should not be changed - it will never be spoken'''
-                nvalue = value  # new value
-                replaced_a_choice_key = False
-                for old in definitions.defaults.keys():  # 'old' is the target word(s) in the old 'value'
-                    new = definitions.defaults[old]
-                    if old in nvalue:
-                        nvalue = nvalue.replace(old, new)
-                        replaced_a_choice_key = True
-                if replaced_a_choice_key:
+                nvalue = defaults_replacer.replace(value)  # new value
+                if nvalue != value:
                     defaults[default_key] = nvalue
                     defaults_changed = True
 
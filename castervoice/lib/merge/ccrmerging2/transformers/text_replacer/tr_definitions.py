@@ -1,8 +1,39 @@
+from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.tr_replacer import TRReplacer
+
+
 class TRDefinitions(object):
     def __init__(self, specs, extras, defaults):
         self.specs = specs
         self.extras = extras
         self.defaults = defaults
+        self._replacers = {}
 
     def __len__(self):
         return len(self.specs) + len(self.extras) + len(self.defaults)
+
+    def compile(self):
+        """
+        Compiles all three groups of definitions up front.
+        """
+        self.get_specs_replacer()
+        self.get_extras_replacer()
+        self.get_defaults_replacer()
+
+    def get_specs_replacer(self):
+        return self._get_replacer("specs", self.specs)
+
+    def get_extras_replacer(self):
+        return self._get_replacer("extras", self.extras)
+
+    def get_defaults_replacer(self):
+        return self._get_replacer("defaults", self.defaults)
+
+    def _get_replacer(self, group, definitions):
+        """
+        The definitions dicts are public and may be changed after parsing,
+        so a compiled replacer is only reused while its dict is unchanged.
+        """
+        snapshot = tuple(definitions.items())
+        if group not in self._replacers or self._replacers[group][0] != snapshot:
+            self._replacers[group] = (snapshot, TRReplacer(definitions))
+        return self._replacers[group][1]
@@ -13,7 +13,9 @@ class TRParser(object):
 
     def create_definitions(self):
         lines = self._get_lines()
-        return self._parse_lines(lines)
+        definitions = self._parse_lines(lines)
+        definitions.compile()
+        return definitions
 
     def _get_lines(self):
         words_txt_path = settings.settings(["paths", "GDEF_FILE"])
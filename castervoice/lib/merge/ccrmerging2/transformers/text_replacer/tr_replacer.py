@@ -0,0 +1,198 @@
+import heapq
+import re
+
+
+class TRReplacer(object):
+    """
+    Compiled form of one group of text replacement definitions
+    ({source: target}, in words.txt order).
+
+    The text replacer has always applied definitions one after the other,
+    each with its own `in` check and str.replace, so every string was scanned
+    once per definition. TRReplacer instead:
+
+    - if the definitions can't interfere with each other (no source overlaps or
+      contains another, and no replacement can form a later source), makes all
+      replacements in a single regex pass
+    - otherwise finds every source in the string in a single regex pass and
+      applies only those definitions, in order, rescanning the string after
+      any replacement which could have formed a later source (if that keeps
+      happening, it's cheaper to just check the remaining definitions in order)
+
+    Either way the result is the same as applying all definitions in order.
+    """
+
+    _MAX_RESCANS = 3
+
+    def __init__(self, definitions):
+        """
+        :param definitions: dict of {source (str): target (str)}, ordered
+        """
+        self._sources = list(definitions.keys())
+        self._targets = [definitions[source] for source in self._sources]
+        self._indices = {source: i for i, source in enumerate(self._sources)}
+        self._contained = {}
+
+        # an empty source matches everywhere: only the original behavior makes sense of that
+        self._sequential_only = "" in self._indices
+        self._finder = None
+        self._replacer = None
+        self._forms_later = []
+        self._independent = False
+        if len(self._sources) > 0 and not self._sequential_only:
+            pattern = TRReplacer._get_trie_pattern(self._sources)
+            # the lookahead reports the longest source at every position, overlapping or not
+            self._finder = re.compile("(?=(" + pattern + "))")
+            self._replacer = re.compile(pattern)
+            self._compile_interference()
+
+    def __len__(self):
+        return len(self._sources)
+
+    def replace(self, text):
+        """
+        :param text: str
+        :return: text with all definitions applied
+        """
+        if len(self._sources) == 0:
+            return text
+        if self._independent:
+            return self._replacer.sub(lambda m: self._targets[self._indices[m.group(0)]], text)
+        steps = self.replace_in_steps(text)
+        return steps[-1] if len(steps) > 0 else text
+
+    def replace_in_steps(self, text):
+        """
+        :param text: str
+        :return: list of what the text became after each definition which applied
+            to it, in order; empty if no definition applied
+        """
+        steps = []
+        if len(self._sources) == 0:
+            return steps
+        if self._sequential_only:
+            for i in range(len(self._sources)):
+                text = self._apply(i, text, steps)
+            return steps
+
+        pending = list(self._find(text))
+        heapq.heapify(pending)
+        last = -1
+        rescans = 0
+        while len(pending) > 0:
+            i = heapq.heappop(pending)
+            if i <= last:
+                continue
+            last = i
+            applied = len(steps)
+            text = self._apply(i, text, steps)
+            if len(steps) == applied or not self._forms_later[i]:
+                continue
+            if rescans == TRReplacer._MAX_RESCANS:
+                for j in range(i + 1, len(self._sources)):
+                    text = self._apply(j, text, steps)
+                break
+            rescans += 1
+            for j in self._find(text):
+                if j > i:
+                    heapq.heappush(pending, j)
+        return steps
+
+    def _apply(self, i, text, steps):
+        source = self._sources[i]
+        if source in text:
+            text = text.replace(source, self._targets[i])
+            steps.append(text)
+        return text
+
+    def _find(self, text):
+        """
+        :return: set of indices of all sources occurring in the text
+        """
+        found = set()
+        for longest in set(self._finder.findall(text)):
+            # any shorter source at the same position is inside the longest one
+            found.update(self._get_contained(longest))
+        return found
+
+    def _get_contained(self, source):
+        if source not in self._contained:
+            self._contained[source] = frozenset(self._indices[s] for s in TRReplacer._substrings(source)
+                                                if s in self._indices)
+        return self._contained[source]
+
+    def _compile_interference(self):
+        """
+        Works out which replacements could form a later source (any new occurrence
+        of a source has to include part of the replacement), and whether a single
+        pass gives the same result as applying the definitions in order: no source
+        contains or overlaps another, and no replacement can form a later source.
+        """
+        # for each proper prefix/suffix and substring of any source: the latest source which has it
+        latest_with_prefix, latest_with_suffix, latest_with_substring = {}, {}, {}
+        owners_of_prefix = {}
+        for i, source in enumerate(self._sources):
+            for prefix in TRReplacer._proper_prefixes(source):
+                latest_with_prefix[prefix] = i
+                owners_of_prefix.setdefault(prefix, set()).add(i)
+            for suffix in TRReplacer._proper_suffixes(source):
+                latest_with_suffix[suffix] = i
+            for substring in TRReplacer._substrings(source):
+                latest_with_substring[substring] = i
+
+        self._forms_later = []
+        sources_interfere = False
+        for i, source in enumerate(self._sources):
+            if len(self._get_contained(source)) > 1 or \
+                    any(j != i for suffix in TRReplacer._proper_suffixes(source)
+                        for j in owners_of_prefix.get(suffix, ())):
+                sources_interfere = True
+
+            target = self._targets[i]
+            self._forms_later.append(
+                target == "" or
+                latest_with_substring.get(target, -1) > i or
+                any(self._indices.get(s, -1) > i for s in TRReplacer._substrings(target)) or
+                any(latest_with_prefix.get(s, -1) > i for s in TRReplacer._proper_suffixes(target)) or
+                any(latest_with_suffix.get(s, -1) > i for s in TRReplacer._proper_prefixes(target)))
+
+        self._independent = not sources_interfere and not any(self._forms_later)
+
+    @staticmethod
+    def _get_trie_pattern(sources):
+        """
+        A plain alternation of hundreds of sources makes the regex engine try
+        every source at every position. Sharing prefixes the way a trie does
+        lets it rule out most sources after one character. Optional groups are
+        greedy, so the longest source at a position matches.
+        """
+        trie = {}
+        for source in sources:
+            node = trie
+            for c in source:
+                node = node.setdefault(c, {})
+            node[None] = True  # a source ends here
+        return TRReplacer._get_node_pattern(trie)
+
+    @staticmethod
+    def _get_node_pattern(node):
+        children = [re.escape(c) + TRReplacer._get_node_pattern(child)
+                    for c, child in sorted((c, child) for c, child in node.items() if c is not None)]
+        if len(children) == 0:
+            return ""
+        pattern = children[0] if len(children) == 1 else "(?:" + "|".join(children) + ")"
+        if None in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    @staticmethod
+    def _proper_prefixes(text):
+        return [text[:length] for length in range(1, len(text))]
+
+    @staticmethod
+    def _proper_suffixes(text):
+        return [text[-length:] for length in range(1, len(text))]
+
+    @staticmethod
+    def _substrings(text):
+        return set(text[start:end] for start in range(len(text)) for end in range(start + 1, len(text) + 1))
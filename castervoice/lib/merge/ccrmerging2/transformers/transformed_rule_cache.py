@@ -0,0 +1,110 @@
+import collections
+
+from castervoice.lib import settings
+from castervoice.lib.ctrl.mgr.loading.reload.base_reload_observable import BaseReloadObservable
+from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+from castervoice.lib.merge.selfmod.selfmodrule import BaseSelfModifyingRule
+
+
+class TransformedRuleCache(object):
+    """
+    Remembers the output of the transformers pipeline so that a rule which
+    hasn't changed doesn't have to be transformed again, whether it's being
+    merged again or its file was reloaded without changes.
+
+    The key of a transformed rule is:
+    (rule class, hash of the rule's module file, hash of words.txt, active transformers)
+
+    words.txt is stat'ed on every lookup and rehashed when it changed, so editing
+    it during a session is noticed.
+
+    Modules which the rule's file imports aren't part of the key. This matches
+    reloading: a rule is only reloaded when its own file changes, and reloading
+    it doesn't re-import the modules it imports. So a transformed rule is never
+    older than what a reload would produce.
+
+    Rules which can't be keyed this way are never cached:
+    - rules whose file isn't watched (internal rules generated at runtime)
+    - selfmod rules, whose commands come from their own config rather than their file
+    """
+
+    _DEFAULT_MAX_SIZE = 256
+
+    def __init__(self, file_hash_fn, max_size=_DEFAULT_MAX_SIZE):
+        """
+        :param file_hash_fn: function which takes a file path and returns its known hash or None
+        :param max_size: int, least recently used rules are evicted past this number
+        """
+        self._file_hash_fn = file_hash_fn
+        self._max_size = max_size
+        self._cache = collections.OrderedDict()
+        self._gdef_stat = None
+        self._gdef_hash = ""
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, rule, details, transformers):
+        """
+        :param rule: the instantiated, untransformed rule
+        :param details: RuleDetails
+        :param transformers: list of active BaseRuleTransformer
+        :return: tuple, or None if the rule can't be cached
+        """
+        if details.watch_exclusion or isinstance(rule, BaseSelfModifyingRule):
+            return None
+        file_path = details.get_filepath()
+        file_hash = self._file_hash_fn(file_path) if file_path is not None else None
+        if file_hash is None:
+            return None
+
+        rule_class = rule.__class__
+        transformer_names = tuple(t.get_class_name() for t in transformers)
+        return (rule_class.__module__, rule_class.__name__, details.name,
+                file_hash, self._get_gdef_hash(), transformer_names)
+
+    def get(self, key):
+        """
+        :param key: tuple from get_key
+        :return: a copy of the cached transformed rule, or None
+        """
+        if key not in self._cache:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # re-insert: most recently used rules are at the end
+        rule = self._cache.pop(key)
+        self._cache[key] = rule
+        return TransformedRuleCache._detached_copy(rule)
+
+    def put(self, key, rule):
+        if key in self._cache:
+            del self._cache[key]
+        self._cache[key] = TransformedRuleCache._detached_copy(rule)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+    @staticmethod
+    def _detached_copy(rule):
+        """
+        A Dragonfly rule belongs to at most one grammar, and the grammar container
+        disables the rules of grammars it throws away, so the cache never hands out
+        (or keeps) a rule which is in a grammar.
+        """
+        return ManagedRule.detached_copy(rule)
+
+    def _get_gdef_hash(self):
+        """
+        :return: hash of words.txt, or "" if there's none; only rehashed when its mtime or size changed
+        """
+        gdef_file = settings.settings(["paths", "GDEF_FILE"], "")
+        gdef_stat = BaseReloadObservable._get_stat_of_file(gdef_file) if gdef_file else None
+        if gdef_stat != self._gdef_stat:
+            self._gdef_stat = gdef_stat
+            self._gdef_hash = "" if gdef_stat is None else BaseReloadObservable._get_hash_of_file(gdef_file)
+        return self._gdef_hash
@@ -11,9 +11,14 @@ from castervoice.lib.merge.mergerule import MergeRule
 
 class TransformersRunner(ActivationRuleGenerator):
 
-    def __init__(self, config):
+    def __init__(self, config, rule_cache=None):
+        """
+        :param config: TransformersConfig
+        :param rule_cache: TransformedRuleCache, optional
+        """
         self._transformers_config = config
         self._transformers = []
+        self._rule_cache = rule_cache
 
     def add_transformer(self, transformer_class):
         transformer = None
@@ -52,7 +57,26 @@ class TransformersRunner(ActivationRuleGenerator):
 
         return TransformersActivationRule, details
 
-    def transform_rule(self, rule_instance):
+    def transform_rule(self, rule_instance, details=None):
+        """
+        :param rule_instance: rule to transform
+        :param details: RuleDetails; if provided, the transformed rule may come from/go to the cache
+        :return: transformed rule
+        """
+        cache_key = None
+        if self._rule_cache is not None and details is not None:
+            cache_key = self._rule_cache.get_key(rule_instance, details, self._transformers)
+            if cache_key is not None:
+                cached_rule = self._rule_cache.get(cache_key)
+                if cached_rule is not None:
+                    return cached_rule
+
+        r = self._run_transformers(rule_instance)
+        if cache_key is not None:
+            self._rule_cache.put(cache_key, r)
+        return r
+
+    def _run_transformers(self, rule_instance):
         r = rule_instance
         orig_class = TransformersRunner._get_rule_class(r)
         for transformer in self._transformers:
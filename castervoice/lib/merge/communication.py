@@ -1,25 +1,94 @@
+import os
+import time
+
 import six
 if six.PY2:
     import xmlrpclib # pylint: disable=import-error
 else:
     import xmlrpc.client as xmlrpclib
 
+from castervoice.lib import settings
+from castervoice.lib.merge.framed_rpc import FramedProxy
+
 class Communicator:
     LOCALHOST = "127.0.0.1"
+    # servers which aren't CasterRPCServers (the Sikuli server runs in Sikuli's own Jython)
+    XMLRPC_ONLY = ["sikuli"]
+    # how long is_alive remembers whether a server is up
+    LIVENESS_SECONDS = 2
+    # environment variable h_launch gives a homunculus: the id it sends back with its response
+    HMC_LAUNCH_ID_VARIABLE = "CASTER_HMC_LAUNCH_ID"
 
     def __init__(self):
         self.coms = {}
         self.com_registry = {
             "hmc": 1338,
+            "hmc_response": 1340,
             "grids": 1339,
             "sikuli": 8000
         }
+        # {name: (whether it answered, time checked)}
+        self._liveness = {}
 
     def get_com(self, name):
+        """
+        The proxies are kept, along with their connections: framed (see
+        framed_rpc) for Caster's own servers, unless the framed_rpc setting
+        is off, and XML-RPC otherwise.
+        """
         try:  # try a ping
             return self.coms[name]
         except Exception:
-            com = xmlrpclib.ServerProxy(
-                "http://" + Communicator.LOCALHOST + ":" + str(self.com_registry[name]))
+            if name not in Communicator.XMLRPC_ONLY and settings.settings(["miscellaneous", "framed_rpc"], True):
+                com = FramedProxy(Communicator.LOCALHOST, self.com_registry[name])
+            else:
+                com = xmlrpclib.ServerProxy(
+                    "http://" + Communicator.LOCALHOST + ":" + str(self.com_registry[name]))
             self.coms[name] = com
             return com
+
+    def is_alive(self, name):
+        """
+        Health check: whether the server answers a ping. The answer is
+        remembered for LIVENESS_SECONDS, so checking before every call
+        doesn't double the calls.
+
+        :param name: str, a name in the com registry
+        :return: bool
+        """
+        now = time.time()
+        if name in self._liveness:
+            alive, checked_time = self._liveness[name]
+            if now - checked_time < Communicator.LIVENESS_SECONDS:
+                return alive
+        try:
+            alive = bool(self.get_com(name).ping())
+        except Exception:
+            alive = False
+        self._liveness[name] = (alive, now)
+        return alive
+
+    def push_hmc_response(self, get_message, launch_id=None):
+        """
+        Used by a homunculus (pop-up window) once it's complete: sends its
+        response to Caster straight away, if Caster is listening for it,
+        rather than waiting for Caster to ask for it.
+
+        :param get_message: the homunculus' get_message function
+        :param launch_id: int, or None for the id h_launch gave the homunculus
+        :return: bool, whether Caster received the response
+        """
+        completed_time = time.time()
+        if launch_id is None:
+            launch_id = os.environ.get(Communicator.HMC_LAUNCH_ID_VARIABLE)
+            if launch_id is None:  # not launched by h_launch, so Caster isn't waiting for it
+                return False
+            launch_id = int(launch_id)
+        # don't get the message (which starts closing the window) if Caster isn't listening
+        if not self.is_alive("hmc_response"):
+            return False
+        try:
+            self.get_com("hmc_response").respond(get_message(), completed_time, launch_id)
+            return True
+        except Exception:
+            return False
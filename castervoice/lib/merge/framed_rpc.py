@@ -0,0 +1,252 @@
+'''
+Remote calls between Caster and its own windows (homunculi, mouse grids,
+the settings window) without XML or a new HTTP connection per call.
+
+A FramedProxy keeps one connection open to a CasterRPCServer and sends each
+call as a length-prefixed JSON message: a 4 byte big-endian length, then
+{"method": name, "params": [...]}. The reply is {"result": ...} or
+{"error": "..."}. A CasterRPCServer also still answers XML-RPC (with
+keep-alive) on the same port, for clients which can't frame messages, so
+a FramedProxy falls back to XML-RPC for servers which answer the framed
+handshake with HTTP.
+
+A CasterRPCServer handles each connection on its own thread, but calls the
+registered functions (e.g. a window's Tk handlers) one at a time, as a
+single-threaded server would.
+'''
+import json
+import socket
+import struct
+import threading
+import time
+
+import six
+if six.PY2:
+    from SimpleXMLRPCServer import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler  # pylint: disable=import-error
+    from SocketServer import ThreadingMixIn  # pylint: disable=import-error
+    import xmlrpclib  # pylint: disable=import-error
+else:
+    from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler  # pylint: disable=no-name-in-module
+    from socketserver import ThreadingMixIn
+    import xmlrpc.client as xmlrpclib
+
+# sent by the client when it connects, and sent back by the server; an HTTP request can't start with
+# it, and a plain XML-RPC server answers it with an HTTP error, since it's a whole (bad) request line
+HANDSHAKE = b"CRPC\r\n"
+_LENGTH = struct.Struct(">I")
+# how long to wait for more of a handshake which arrived in pieces
+_PEEK_INTERVAL = 0.005
+
+
+class FramedRPCError(Exception):
+    '''the remote function raised an exception (as xmlrpclib.Fault is for XML-RPC)'''
+
+
+def write_frame(write, message):
+    '''
+    :param write: function which writes bytes
+    :param message: JSON serializable object
+    '''
+    data = json.dumps(message).encode("utf-8")
+    write(_LENGTH.pack(len(data)) + data)
+
+
+def read_frame(read_file):
+    '''
+    :param read_file: file-like object to read bytes from
+    :return: the message, or None if the connection closed before one started
+    '''
+    header = _read_exactly(read_file, _LENGTH.size)
+    if header is None:
+        return None
+    data = _read_exactly(read_file, _LENGTH.unpack(header)[0])
+    if data is None:
+        raise socket.error("connection closed in the middle of a message")
+    return json.loads(data.decode("utf-8"))
+
+
+def _read_exactly(read_file, size):
+    data = b""
+    while len(data) < size:
+        chunk = read_file.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep XML-RPC connections open too
+
+    def handle(self):
+        if self._starts_with_handshake():
+            self._handle_framed()
+        else:
+            SimpleXMLRPCRequestHandler.handle(self)
+
+    def _starts_with_handshake(self):
+        '''
+        Only peeks, so that an HTTP request is left for the XML-RPC handler. The
+        handshake may arrive in pieces, so this waits until either all of it has
+        arrived or what has can't be the start of it.
+        (MSG_WAITALL can't be combined with MSG_PEEK on Windows.)
+        '''
+        while True:
+            data = self.request.recv(len(HANDSHAKE), socket.MSG_PEEK)
+            if len(data) == len(HANDSHAKE) or not HANDSHAKE.startswith(data) or not data:
+                return data == HANDSHAKE
+            time.sleep(_PEEK_INTERVAL)
+
+    def _handle_framed(self):
+        self.rfile.read(len(HANDSHAKE))
+        try:
+            self.wfile.write(HANDSHAKE)
+            self.wfile.flush()
+        except socket.error:  # the client gave up waiting (e.g. this server only just started serving)
+            return
+        while True:
+            request = read_frame(self.rfile)
+            if request is None:
+                return
+            try:
+                response = {"result": self.server._dispatch(request["method"], request["params"])}
+            except Exception as e:
+                response = {"error": "{}: {}".format(type(e).__name__, e)}
+            try:
+                write_frame(self.wfile.write, response)
+            except (TypeError, ValueError) as e:  # the result isn't JSON serializable
+                write_frame(self.wfile.write, {"error": "{}: {}".format(type(e).__name__, e)})
+            self.wfile.flush()
+
+
+class CasterRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    '''
+    A SimpleXMLRPCServer which also answers framed calls, keeps connections
+    open, handles each connection on its own thread (so one client keeping
+    its connection open doesn't block the others) and always has a "ping"
+    function, for health checks. The registered functions are still called
+    one at a time, so they don't have to be thread safe.
+    '''
+    daemon_threads = True
+
+    def __init__(self, address):
+        SimpleXMLRPCServer.__init__(self, address, requestHandler=_RequestHandler,
+                                    logRequests=False, allow_none=True)
+        self._dispatch_lock = threading.Lock()
+        self.register_function(lambda: True, "ping")
+
+    def _dispatch(self, method, params):
+        with self._dispatch_lock:
+            return SimpleXMLRPCServer._dispatch(self, method, params)
+
+
+class FramedProxy(object):
+    '''
+    Calls functions on a CasterRPCServer like xmlrpclib.ServerProxy does,
+    over one kept-open connection. If the connection has been closed since
+    the last call (e.g. the window was closed and opened again), it
+    reconnects and tries once more.
+
+    If the server doesn't answer the handshake within handshake_seconds
+    (e.g. it's bound its port but hasn't started serving yet), that call is
+    made with XML-RPC, and the next call tries the handshake again. Only a
+    server which answers the handshake with HTTP gets every call from then
+    on with XML-RPC.
+    '''
+
+    def __init__(self, host, port, handshake_seconds=1.0):
+        self._address = (host, port)
+        self._handshake_seconds = handshake_seconds
+        self._socket = None
+        self._read_file = None
+        self._xmlrpc_proxy = None
+        self._xmlrpc_only = False
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Method(self, name)
+
+    def is_framed(self):
+        ''':return: bool, False once this has fallen back to XML-RPC for good'''
+        return not self._xmlrpc_only
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+            if self._xmlrpc_proxy is not None:
+                self._xmlrpc_proxy("close")()
+
+    def _call(self, method, params):
+        with self._lock:
+            if self._xmlrpc_only:
+                return getattr(self._get_xmlrpc_proxy(), method)(*params)
+            reused = self._socket is not None
+            try:
+                response = self._send(method, params)
+            except socket.error:
+                self._disconnect()
+                if not reused:
+                    raise
+                response = self._send(method, params)
+            if response is None:  # no framed connection this time
+                return getattr(self._get_xmlrpc_proxy(), method)(*params)
+            if "error" in response:
+                raise FramedRPCError(response["error"])
+            return response["result"]
+
+    def _send(self, method, params):
+        if self._socket is None and not self._connect():
+            return None
+        write_frame(self._socket.sendall, {"method": method, "params": list(params)})
+        response = read_frame(self._read_file)
+        if response is None:
+            raise socket.error("connection closed before the response")
+        return response
+
+    def _connect(self):
+        ''':return: bool, whether the server answered the handshake'''
+        sock = socket.create_connection(self._address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        read_file = sock.makefile("rb")
+        try:
+            sock.settimeout(self._handshake_seconds)
+            sock.sendall(HANDSHAKE)
+            answer = _read_exactly(read_file, len(HANDSHAKE))
+        except socket.timeout:
+            answer = None
+        if answer != HANDSHAKE:
+            read_file.close()
+            sock.close()
+            if answer is not None:  # it answered, but with HTTP: it only speaks XML-RPC
+                self._xmlrpc_only = True
+            return False
+        sock.settimeout(None)
+        self._socket = sock
+        self._read_file = read_file
+        return True
+
+    def _get_xmlrpc_proxy(self):
+        if self._xmlrpc_proxy is None:
+            self._xmlrpc_proxy = xmlrpclib.ServerProxy("http://{}:{}".format(*self._address))
+        return self._xmlrpc_proxy
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._read_file.close()
+            self._socket.close()
+            self._socket = None
+            self._read_file = None
+
+
+class _Method(object):
+    def __init__(self, proxy, name):
+        self._proxy = proxy
+        self._name = name
+
+    def __getattr__(self, name):
+        return _Method(self._proxy, self._name + "." + name)
+
+    def __call__(self, *params):
+        return self._proxy._call(self._name, params)
@@ -0,0 +1,108 @@
+import collections
+import itertools
+import threading
+import time
+
+from castervoice.lib import printer
+from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.framed_rpc import CasterRPCServer
+
+
+class HMCResponseReceiver(object):
+    """
+    Listens (on its own thread) for homunculus (pop-up window) responses,
+    which the homunculus sends as soon as it's complete
+    (see Communicator.push_hmc_response), so that Caster doesn't have to
+    keep asking the homunculus for its response.
+
+    Every launch gets an id, which the homunculus sends back with its
+    response, so that an action only ever takes the response of the window
+    it launched, even if an older window answers late.
+
+    Responses wait here until the action waiting for one takes it, on the
+    engine thread. has_response() is cheap enough to check on every
+    scheduler tick.
+    """
+
+    # responses nothing took for this long (e.g. their action was cancelled) are dropped
+    _UNTAKEN_SECONDS = 60
+
+    def __init__(self, port=None):
+        """
+        :param port: int, or None for the Communicator's "hmc_response" port
+        """
+        self._port = port if port is not None else Communicator().com_registry["hmc_response"]
+        self._server = None
+        self._launch_ids = itertools.count(1)
+        self._last_launch_id = None
+        # {launch id: (response, time the homunculus completed)}
+        self._responses = {}
+        self._lock = threading.Lock()
+        # seconds from the homunculus completing to its response being taken, most recent last
+        self.latencies = collections.deque(maxlen=50)
+
+    def start(self):
+        """
+        Starts listening, if it isn't already.
+
+        :return: bool, whether it's listening
+        """
+        if self._server is not None:
+            return True
+        try:
+            self._server = CasterRPCServer((Communicator.LOCALHOST, self._port))
+        except Exception as e:
+            printer.out("Unable to listen for homunculus responses, polling instead: {}".format(e))
+            return False
+        self._server.register_function(self._respond, "respond")
+        server_thread = threading.Thread(target=self._server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        return True
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def is_listening(self):
+        return self._server is not None
+
+    def new_launch(self):
+        """
+        :return: int, the id the homunculus being launched sends back with its response
+        """
+        now = time.time()
+        with self._lock:
+            for launch_id, (_, completed_time) in list(self._responses.items()):
+                if now - completed_time > HMCResponseReceiver._UNTAKEN_SECONDS:
+                    del self._responses[launch_id]
+            self._last_launch_id = next(self._launch_ids)
+            return self._last_launch_id
+
+    def get_last_launch_id(self):
+        """
+        :return: int, or None if nothing has been launched
+        """
+        return self._last_launch_id
+
+    def has_response(self, launch_id):
+        return launch_id in self._responses
+
+    def take_response(self, launch_id):
+        """
+        :param launch_id: int from new_launch
+        :return: the response of that launch's homunculus, or None if it hasn't arrived
+        """
+        with self._lock:
+            if launch_id not in self._responses:
+                return None
+            response, completed_time = self._responses.pop(launch_id)
+        self.latencies.append(time.time() - completed_time)
+        return response
+
+    def _respond(self, response, completed_time, launch_id=None):
+        with self._lock:
+            self._responses[launch_id] = (response, completed_time)
+        return True
@@ -2,8 +2,8 @@ import collections
 
 from dragonfly import Function, MappingRule
 
-from castervoice.lib import available_commands_tracker, printer
 from castervoice.lib.ctrl.mgr.rule_formatter import _set_rdescripts
+from castervoice.lib.merge.available_commands_listing import AvailableCommandsListing
 from castervoice.lib.merge.ccrmerging2.pronounceable import Pronounceable
 
 
@@ -23,7 +23,8 @@ class MergeRule(MappingRule, Pronounceable):
         _mapping = mapping or self.mapping.copy()
         _extras = extras or self.extras[:]
         _defaults = defaults or self.defaults.copy()
-        _set_rdescripts(_mapping, _name)
+        if type(self) is not MergeRule:  # merged rules' actions already have their rdescripts
+            _set_rdescripts(_mapping, _name)
         #
         super(MergeRule, self).__init__(name=_name,
                                         mapping=_mapping,
@@ -61,7 +62,7 @@ class MergeRule(MappingRule, Pronounceable):
     def get_pronunciation(self):
         return self.pronunciation if self.pronunciation is not None else self._name
 
-    def prepare_for_merger(self):
+    def prepare_for_merger(self, name=None, exported=True):
         """
         The OrderedDict is an optimization for Kaldi engine,
         won't make a difference to other engines.
@@ -69,6 +70,8 @@ class MergeRule(MappingRule, Pronounceable):
         This is also the appropriate place to add the "list available commands"
         command, since this happens post-merge.
 
+        :param name: str or None; needed if there's more than one prepared rule in a grammar
+        :param exported: bool; False if the rule should only be usable through a RuleRef
         :return: MergeRule
         """
 
@@ -79,10 +82,8 @@ class MergeRule(MappingRule, Pronounceable):
         for spec in ordered_specs:
             ordered_dict[spec] = self._mapping[spec]
 
-        act = available_commands_tracker.get_instance()
-        act.set_available_commands("\n".join(ordered_specs))
         # TODO: bring back metarule
-        ordered_dict["list available commands"] = Function(lambda: printer.out(act.get_available_commands()))
+        ordered_dict["list available commands"] = Function(AvailableCommandsListing(ordered_specs).list_commands)
 
         extras_copy = self.get_extras()
         defaults_copy = self.get_defaults()
@@ -92,7 +93,7 @@ class MergeRule(MappingRule, Pronounceable):
             extras = extras_copy
             defaults = defaults_copy
 
-        return PreparedRule()
+        return PreparedRule(name=name, exported=exported)
 
     def get_rule_class_name(self):
         return self.__class__.__name__
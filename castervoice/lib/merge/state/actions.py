@@ -92,21 +92,59 @@ class AsynchronousAction(ContextSeeker):
         self.nexus().state.add(StackItemAsynchronous(self, data))
 
     @staticmethod
-    def hmc_complete(data_function):
+    def hmc_complete(data_function, launch_id=None):
         ''' returns a function which applies the passed in function to
         the data returned by the pop-up window - the returned function
         will be called by AsynchronousAction's timer repeatedly,
-        to see if the data is available yet'''
+        to see if the data is available yet; if Caster is listening for
+        pop-up window responses, it's woken as soon as the data arrives,
+        and it doesn't need to ask the pop-up window for it, only ping it
+        now and then, to stop waiting if it was closed without a response.
+        launch_id is what h_launch.launch returned, or a function which
+        returns it (for actions which launch a window every time they
+        execute), or None for the window launched most recently'''
+        tries = {"tries": 0, "launch_id": None}
+
+        def get_launch_id():
+            if callable(launch_id):
+                current_id = launch_id()
+            elif launch_id is not None:
+                current_id = launch_id
+            else:
+                current_id = tries["launch_id"] or control.nexus().hmc_responses.get_last_launch_id()
+            if current_id != tries["launch_id"]:  # a new window: count its tries from 0
+                tries["tries"] = 0
+                tries["launch_id"] = current_id
+            return current_id
 
         def check_complete():
-            data = None
-            try:
-                data = control.nexus().comm.get_com("hmc").get_message()
+            current_id = get_launch_id()
+            if current_id is not None:  # Caster was listening when the window was launched
+                data = control.nexus().hmc_responses.take_response(current_id)
                 if data is None:
+                    return AsynchronousAction.hmc_closed(control.nexus(), tries)
+            else:
+                try:
+                    data = control.nexus().comm.get_com("hmc").get_message()
+                    if data is None:
+                        return False
+                except Exception:
                     return False
-            except Exception:
-                return False
             data_function(data)
             return True
 
+        check_complete.wake = lambda: control.nexus().hmc_responses.has_response(get_launch_id())
         return check_complete
+
+    @staticmethod
+    def hmc_closed(nexus, tries):
+        ''' for actions waiting for a pushed pop-up window response: counts
+        (in tries["tries"]) the checks in a row at which the pop-up window
+        didn't answer a ping, and returns True at the 10th, when it's taken
+        to have been closed without a response (e.g. with its X button); a
+        window which was only just launched may not answer straight away'''
+        if nexus.comm.is_alive("hmc"):
+            tries["tries"] = 0
+            return False
+        tries["tries"] += 1
+        return tries["tries"] > 9
@@ -24,19 +24,25 @@ class BoxAction(AsynchronousAction):
                  box_type=settings.QTYPE_DEFAULT,
                  box_settings={},
                  log_failure=False):
-        _ = {"tries": 0}
+        _ = {"tries": 0, "launch_id": None}
         self._ = _  # signals to the stack to cease waiting, return True terminates
 
         def check_for_response():
-            try:
-                _data = self.nexus().comm.get_com("hmc").get_message()
-            except Exception:
-                if log_failure: utilities.simple_log()
-                _["tries"] += 1
-                if _["tries"] > 9:
-                    return True  # try 10 times max if there's no Homonculus response
-                else:
-                    return False
+            if _["launch_id"] is not None:  # Caster was listening when the Homunculus was launched
+                _data = self.nexus().hmc_responses.take_response(_["launch_id"])
+                if _data is None:
+                    # try 10 times max if the Homunculus doesn't answer a ping
+                    return AsynchronousAction.hmc_closed(self.nexus(), _)
+            else:
+                try:
+                    _data = self.nexus().comm.get_com("hmc").get_message()
+                except Exception:
+                    if log_failure: utilities.simple_log()
+                    _["tries"] += 1
+                    if _["tries"] > 9:
+                        return True  # try 10 times max if there's no Homonculus response
+                    else:
+                        return False
             if _data is None: return False
             try:
                 _data.append(
@@ -47,6 +53,8 @@ class BoxAction(AsynchronousAction):
                 if log_failure: utilities.simple_log()
             return True
 
+        check_for_response.wake = lambda: self.nexus().hmc_responses.has_response(_["launch_id"])
+
         AsynchronousAction.__init__(
             self,  # cannot block, if it does, it'll block its own confirm command
             [L(S(["cancel"], check_for_response))],
@@ -62,7 +70,7 @@ class BoxAction(AsynchronousAction):
     def _execute(self, data=None):
         self._["tries"] = 0  # reset
         self._["dragonfly_data"] = data
-        h_launch.launch(self.box_type, data=self.encode_box_settings())
+        self._["launch_id"] = h_launch.launch(self.box_type, data=self.encode_box_settings())
         self.nexus().state.add(StackItemAsynchronous(self, data))
 
     def encode_box_settings(self):
@@ -101,7 +109,8 @@ class ConfirmAction(AsynchronousAction):
                  instructions="instructions missing",
                  nexus=None):
         self.set_nexus(nexus)
-        on_complete = AsynchronousAction.hmc_complete(lambda data: receive_response(data))
+        on_complete = AsynchronousAction.hmc_complete(lambda data: receive_response(data),
+                                                      lambda: mutable_integer["launch_id"])
         AsynchronousAction.__init__(
             self, [L(S(["cancel"], on_complete))], 1, 60, rdescript,
             False)  # cannot block, if it does, it'll block its own confirm command
@@ -110,7 +119,7 @@ class ConfirmAction(AsynchronousAction):
         self.rspec = rspec
         self.instructions = instructions
 
-        mutable_integer = {"value": 0}
+        mutable_integer = {"value": 0, "launch_id": None}
 
         def receive_response(
                 data):  # signals to the stack to cease waiting, return True terminates
@@ -132,7 +141,7 @@ class ConfirmAction(AsynchronousAction):
         confirm_stack_item = StackItemConfirm(self, data)
         confirm_stack_item.shared_state(self.mutable_integer)
 
-        h_launch.launch(
+        self.mutable_integer["launch_id"] = h_launch.launch(
             settings.QTYPE_CONFIRM,
             data=settings.HMC_SEPARATOR.join(self.instructions.split(" ")))
         self.nexus().state.add(confirm_stack_item)
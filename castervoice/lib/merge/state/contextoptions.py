@@ -26,6 +26,19 @@ class ContextSet:  # ContextSet
         self.consume = consume
         self.use_spoken = use_spoken
         self.use_rspec = use_rspec
+        self._trigger_set = None
+
+    def is_triggered_by(self, rspec):
+        """
+        ContextSets are shared by every stack item made from the same action,
+        so the triggers are hashed once, the first time they are needed.
+
+        :param rspec: str, the spec of another command
+        :return: bool
+        """
+        if self._trigger_set is None:
+            self._trigger_set = frozenset(self.specTriggers)
+        return rspec in self._trigger_set
 
 
 class ContextLevel:  # ContextLevel
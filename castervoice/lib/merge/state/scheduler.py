@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import time
+
+from dragonfly import get_engine
+
+from castervoice.lib import utilities
+
+
+class AsynchronousScheduler(object):
+    """
+    Runs the functions of every running AsynchronousAction (and anything
+    else which needs to run a function every N seconds until it's done) from
+    one engine timer, rather than each one creating its own.
+
+    Every task has its own interval and deadline (the next time it's due); the
+    engine timer ticks every tick_seconds while there are tasks, and runs the
+    ones which are due, soonest first. A task which falls behind isn't run
+    more than once per tick to catch up. A task can also have a wake function,
+    checked every tick, which makes it run at that tick rather than at its
+    deadline (e.g. when a response it's waiting for has arrived). The engine
+    timer is stopped when the last task finishes, so nothing runs while
+    there's nothing to do.
+    """
+
+    def __init__(self, tick_seconds=0.1, timer_factory=None, clock=None):
+        """
+        :param tick_seconds: number, how often the engine timer runs while there are tasks
+        :param timer_factory: function(callback, seconds) which starts a repeating timer
+            (with a stop method), or None for the engine's timers
+        :param clock: function which returns the time in seconds, or None for time.time
+        """
+        self._tick_seconds = tick_seconds
+        self._timer_factory = timer_factory
+        self._clock = clock or time.time
+        self._timer = None
+        # heap of (deadline, sequence number, task)
+        self._deadlines = []
+        self._sequence = itertools.count()
+        self._active = set()
+        self.runs = 0
+        self.wakes = 0
+        self.cancellations = 0
+
+    def schedule(self, function, interval, wake=None):
+        """
+        :param function: function with no parameters, run every interval seconds until the task is cancelled
+        :param interval: number, seconds between runs
+        :param wake: function with no parameters which returns whether to run the task
+            now rather than at its deadline, or None
+        :return: ScheduledTask
+        """
+        task = ScheduledTask(function, interval, wake)
+        self._active.add(task)
+        self._push(task, self._clock() + interval)
+        if self._timer is None:
+            factory = self._timer_factory or get_engine().create_timer
+            self._timer = factory(self._tick, self._tick_seconds)
+        return task
+
+    def cancel(self, task):
+        """
+        Stops a task. Cancelling a task which has already stopped does nothing.
+        """
+        if task not in self._active:
+            return
+        self._active.remove(task)
+        task.cancelled = True
+        self.cancellations += 1
+        if len(self._active) == 0:
+            self._stop_timer()
+
+    def get_active_task_count(self):
+        return len(self._active)
+
+    def _push(self, task, deadline):
+        task.deadline = deadline
+        heapq.heappush(self._deadlines, (deadline, next(self._sequence), task))
+
+    def _tick(self):
+        now = self._clock()
+        due = []
+        while len(self._deadlines) > 0 and self._deadlines[0][0] <= now:
+            deadline, _, task = heapq.heappop(self._deadlines)
+            # a task which was woken has a newer deadline
+            if not task.cancelled and task.deadline == deadline:
+                due.append(task)
+        for task in self._active:
+            if task.wake is not None and task not in due and task.wake():
+                self.wakes += 1
+                due.append(task)
+        for task in due:
+            # an earlier task in this tick may have cancelled it
+            if not task.cancelled:
+                self._push(task, now + task.interval)
+                self._run(task)
+        if len(self._active) == 0:
+            self._deadlines = []
+
+    def _run(self, task):
+        self.runs += 1
+        try:
+            task.function()
+        except Exception:
+            utilities.simple_log()
+
+    def _stop_timer(self):
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self._deadlines = []
+
+
+class ScheduledTask(object):
+    __slots__ = ("function", "interval", "wake", "deadline", "cancelled")
+
+    def __init__(self, function, interval, wake):
+        self.function = function
+        self.interval = interval
+        self.wake = wake
+        self.deadline = None
+        self.cancelled = False
@@ -3,6 +3,8 @@ Created on Jun 7, 2015
 
 @author: dave
 '''
+import collections
+
 import six
 if six.PY2:
     import Queue
@@ -11,16 +13,19 @@ else:
 
 from dragonfly import RecognitionHistory
 
-from castervoice.lib import settings, utilities
+from castervoice.lib import printer, settings, utilities
+from castervoice.lib.merge.state.scheduler import AsynchronousScheduler
 from castervoice.lib.merge.state.stackitems import StackItemSeeker, \
     StackItemRegisteredAction, StackItemAsynchronous, StackItemConfirm
 
 
 class CasterState:
     def __init__(self):
-        self.stack = ContextStack(self)
+        self.stack = ContextStack(self, settings.settings(["miscellaneous", "context_stack_size"], 30))
         self.blocker = None
         self.waiting = Queue.Queue()
+        # runs the functions of asynchronous actions
+        self.scheduler = AsynchronousScheduler()
 
     def add(self, stack_item):
         if self.blocker is None:
@@ -51,13 +56,24 @@ class CasterState:
 
     def terminate_asynchronous(self, success):
         ''' only for use with Dragonfly Function actions which can't return true or false but need spoken parameters'''
-        self.blocker.execute(success)
+        if self.blocker is not None:
+            self.blocker.execute(success)
 
 
 class ContextStack:
-    def __init__(self, state):
-        self.list = []
-        self.max_list_size = 30
+    def __init__(self, state, max_list_size=30):
+        """
+        :param state: CasterState
+        :param max_list_size: int, how many stack items to remember (at least 1);
+            a forward seeker which falls off the end of the stack stops seeking
+        """
+        self.max_list_size = int(max_list_size)
+        if self.max_list_size < 1:
+            printer.out("context_stack_size must be at least 1, not {}: using 1.".format(self.max_list_size))
+            self.max_list_size = 1
+        self.list = collections.deque(maxlen=self.max_list_size)
+        # the forward seekers and asynchronous actions in the stack which aren't complete yet, oldest first
+        self._incomplete = []
         self.state = state
 
     def add(self, stack_item):
@@ -68,6 +84,7 @@ class ContextStack:
             seeker = stack_item
             stack_size = len(self.list)
             seekback_size = len(seeker.back)
+            recent_items = list(self.list)[-seekback_size:]
 
             for i in range(0, seekback_size):
                 '''determine whether the seeker should default'''
@@ -81,7 +98,7 @@ class ContextStack:
                 '''satisfy the current level'''
                 prior_stack_item = None
                 if no_default:
-                    prior_stack_item = self.list[-seekback_size:][index]
+                    prior_stack_item = recent_items[index]
                 seeker.satisfy_level(index, True, prior_stack_item)
                 seeker.get_parameters(index, prior_stack_item)
         ''' case: there are forward seekers in the stack --
@@ -110,7 +127,7 @@ class ContextStack:
                     seeker.get_parameters(unsatisfied, stack_item)
 
                 if seeker_is_satisfied:
-                    seeker_executions.append(lambda: seeker.execute(False))
+                    seeker_executions.append(seeker)
 
         stack_item_is_forward_seeker = stack_item.type == StackItemSeeker.TYPE and stack_item.forward is not None
         stack_item_is_continuer = ContextStack.is_asynchronous(stack_item.type)
@@ -122,20 +139,23 @@ class ContextStack:
             stack_item.begin()
             stack_item.put_time_action()
         ''' forward seeker executions occur after unconsumed triggers -- moved here for more consistent behavior '''
-        for seeker_execution in seeker_executions:
-            seeker_execution()
+        for seeker in seeker_executions:
+            seeker.execute(False)
 
-        self.list.append(stack_item)
-        if len(self.list) > self.max_list_size:  # make this number configurable
-            self.list.remove(self.list[0])
+        if len(self.list) == self.max_list_size:
+            self._forget(self.list[0])
+        self.list.append(stack_item)  # the deque drops the oldest item when full
+        if not stack_item.complete:
+            self._incomplete.append(stack_item)
 
     def get_incomplete_seekers(self):
-        incomplete = []
-        for i in range(0, len(self.list)):
-            if not self.list[
-                    i].complete:  # no need to check type because only forward seekers will be incomplete
-                incomplete.append(self.list[i])
-        return incomplete
+        # no need to check type because only forward seekers will be incomplete
+        self._incomplete = [stack_item for stack_item in self._incomplete if not stack_item.complete]
+        return list(self._incomplete)
+
+    def _forget(self, stack_item):
+        if not stack_item.complete and stack_item in self._incomplete:
+            self._incomplete.remove(stack_item)
 
     @staticmethod
     def is_asynchronous(action_type):
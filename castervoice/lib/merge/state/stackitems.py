@@ -3,12 +3,16 @@ Created on Jun 7, 2015
 
 @author: dave
 '''
-from dragonfly import Pause, ActionBase, get_engine
+from dragonfly import Pause, ActionBase
 
 from castervoice.lib import printer, settings
 
 
-class StackItem:
+class StackItem(object):
+    # Stack items are created for every recognition, so they're kept compact:
+    # subclasses list their attributes in __slots__ rather than having a __dict__.
+    __slots__ = ("type", "complete", "consumed", "rspec")
+
     def __init__(self, type):
         assert type in [
             StackItemRegisteredAction.TYPE, StackItemSeeker.TYPE,
@@ -25,6 +29,7 @@ class StackItem:
 
 class StackItemRegisteredAction(StackItem):
     TYPE = "raction"
+    __slots__ = ("dragonfly_data", "base", "rdescript", "rundo", "show", "preserved", "nexus")
 
     def __init__(self, registered_action, data, type=TYPE):
         StackItem.__init__(self, type)
@@ -59,7 +64,7 @@ class StackItemRegisteredAction(StackItem):
         return self.preserved
 
     def put_time_action(self):
-        self.preserve()
+        # the stack has already preserved the spoken words
         if settings.SETTINGS["miscellaneous"]["print_rdescripts"] and self.show:
             # formats rdescript with the given data
             try:
@@ -74,6 +79,7 @@ class StackItemRegisteredAction(StackItem):
 
 class StackItemSeeker(StackItemRegisteredAction):
     TYPE = "seeker"
+    __slots__ = ("back", "forward", "reverse", "param_spoken", "param_rspec")
 
     def __init__(self, seeker, data, type=TYPE):
         StackItemRegisteredAction.__init__(self, seeker, data, type)
@@ -154,7 +160,7 @@ class StackItemSeeker(StackItemRegisteredAction):
             if stack_item is not None:
                 for context_set in context_level.sets:
                     # stack_item must have a spec
-                    if stack_item.rspec in context_set.specTriggers or "*" in context_set.specTriggers:
+                    if context_set.is_triggered_by(stack_item.rspec) or context_set.is_triggered_by("*"):
                         context_level.satisfied = True
                         self.fillCL(context_level, context_set)
                         break
@@ -172,6 +178,7 @@ class StackItemSeeker(StackItemRegisteredAction):
 
 class StackItemAsynchronous(StackItemSeeker):
     TYPE = "continuer"
+    __slots__ = ("closure", "repetitions", "time_in_seconds", "blocking", "task")
 
     def __init__(self, continuer, data, type=TYPE):
         StackItemSeeker.__init__(self, continuer, data, type)
@@ -183,7 +190,7 @@ class StackItemAsynchronous(StackItemSeeker):
 
         self.time_in_seconds = continuer.time_in_seconds
         self.blocking = continuer.blocking
-        self.timer = None
+        self.task = None
 
     def satisfy_level(
             self, level_index, is_back, stack_item
@@ -192,7 +199,7 @@ class StackItemAsynchronous(StackItemSeeker):
         if not context_level.satisfied:
             if stack_item is not None:
                 context_set = context_level.sets[0]
-                if stack_item.rspec in context_set.specTriggers:  # stack_item must have a spec
+                if context_set.is_triggered_by(stack_item.rspec):  # stack_item must have a spec
                     context_level.satisfied = True
 
     def get_triggers(self):
@@ -218,12 +225,13 @@ class StackItemAsynchronous(StackItemSeeker):
 
     def clean(self):
         StackItemSeeker.clean(self)
-        self.timer.stop()
-        self.timer = None
+        if self.task is not None:
+            self.nexus.state.scheduler.cancel(self.task)
+            self.task = None
         self.closure = None
 
     def begin(self):
-        '''here pass along a closure to the timer multiplexer'''
+        '''here pass along a closure to the state's scheduler'''
         execute_context_levels = self.executeCL
         context_level = self.forward[0]
         repetitions = self.repetitions
@@ -241,12 +249,15 @@ class StackItemAsynchronous(StackItemSeeker):
                     execute(False)
 
         self.closure = closure
-        self.timer = get_engine().create_timer(self.closure, self.time_in_seconds)
+        # e.g. an action waiting for a homunculus response can be woken when it arrives
+        wake = getattr(context_level.result.f, "wake", None)
+        self.task = self.nexus.state.scheduler.schedule(self.closure, self.time_in_seconds, wake)
         self.closure()
 
 
 class StackItemConfirm(StackItemAsynchronous):
     TYPE = "confirm"
+    __slots__ = ("hmc_response", "mutable_integer")
 
     def __init__(self, confirm, data, type=TYPE):
         StackItemAsynchronous.__init__(self, confirm, data, type)
@@ -271,6 +271,10 @@ def _get_defaults():
                 str(Path(_USER_DIR).joinpath("log.txt")),
             "SAVED_CLIPBOARD_PATH":
                 str(Path(_USER_DIR).joinpath("data/clipboard.json")),
+            "STARTUP_CACHE_PATH":
+                str(Path(_USER_DIR).joinpath("data/startup_cache.json")),
+            "CONTENT_INDEX_PATH":
+                str(Path(_USER_DIR).joinpath("data/content_index.json")),
             "SIKULI_SCRIPTS_PATH":
                 str(Path(_USER_DIR).joinpath("sikuli")),
             "GIT_REPO_LOCAL_REMOTE_PATH":
@@ -369,6 +373,16 @@ def _get_defaults():
             "dev_commands": True,
             "keypress_wait": 50,  # milliseconds
             "max_ccr_repetitions": 16,
+            "incremental_ccr_merge": True,
+            "ccr_share_global_rule": False,
+            "ccr_expand_spec_conflicts": False,
+            "ccr_repetition_segment_size": 0,
+            "ccr_rule_cache_size": 16,
+            "available_commands_page_size": 0,
+            "context_stack_size": 30,
+            "startup_cache": True,
+            "content_scan_index": True,
+            "defer_disabled_rules": True,
             "atom_palette_wait": 30,  # hundredths of a second
             "integer_remap_opt_in": False,
             "short_integer_opt_out": False,
@@ -377,13 +391,15 @@ def _get_defaults():
             "history_playback_delay_secs": 1.0,
             "legion_vertical_columns": 30,
             "use_aenea": False,
+            "framed_rpc": True,
             "hmc": True,
+            "hmc_push_responses": True,
             "ccr_on": True,
             "dragonfly_pause_default":  0.003,  # dragonfly _pause_default 0.02 is too slow! Caster default 0.003
         },
         # Grammar reloading section
         "grammar_reloading": {
-            "reload_trigger": "timer",  # manual or timer
+            "reload_trigger": "timer",  # manual, timer or event
             "reload_timer_seconds": 5,  # seconds
         },
 
@@ -58,9 +58,9 @@ class BaseAliasRule(BaseSelfModifyingRule):
             if spec:
                 self._refresh(spec, str(text))
             else:
-                h_launch.launch(settings.QTYPE_INSTRUCTIONS, data="Enter_spec_for_command|")
+                launch_id = h_launch.launch(settings.QTYPE_INSTRUCTIONS, data="Enter_spec_for_command|")
                 on_complete = AsynchronousAction.hmc_complete(
-                    lambda data: self._refresh(data[0].replace("\n", ""), text))
+                    lambda data: self._refresh(data[0].replace("\n", ""), text), launch_id)
                 AsynchronousAction(
                     [L(S(["cancel"], on_complete))],
                     time_in_seconds=0.5,
@@ -43,8 +43,8 @@ class HistoryRule(BaseSelfModifyingRule):
             formatted += "[s]"
         formatted = formatted.encode("unicode_escape")
         # use a response window to get a spec and word sequences for the new macro
-        h_launch.launch(settings.QTYPE_RECORDING, data=formatted)
-        on_complete = AsynchronousAction.hmc_complete(lambda data: self._add_recorded_macro(data))
+        launch_id = h_launch.launch(settings.QTYPE_RECORDING, data=formatted)
+        on_complete = AsynchronousAction.hmc_complete(lambda data: self._add_recorded_macro(data), launch_id)
         AsynchronousAction([L(S(["cancel"], on_complete))],
                            time_in_seconds=0.5,
                            repetitions=300,
@@ -13,10 +13,11 @@ contexts = {
 
 def get_application():
     window = Window.get_foreground()
+    context_cache = context.get_foreground_context_cache()
     # Check all contexts. Return the name of the first one that matches or
     # "standard" if none matched.
-    for name, context in contexts.items():
-        if context.matches(window.executable, window.title, window.handle):
+    for name, app_context in contexts.items():
+        if context_cache.matches(app_context, window.executable, window.title, window.handle):
             return name
     return "standard"
 
@@ -0,0 +1,53 @@
+'''
+Times matching the contexts of the CCR grammars at the start of each
+utterance, as the engine does, with 30 CCR app rules: the global grammar's
+negation context (~app1 & ~app2 & ...) plus the 30 AppContexts, against
+the contexts looked up in a CCRContextIndex.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_ccr_contexts
+'''
+import time
+
+from dragonfly import AppContext
+
+from castervoice.lib.context import ForegroundContextCache
+from castervoice.lib.merge.ccrmerging2.ccr_context_index import CCRContextIndex
+
+
+def _create_windows(app_count):
+    windows = [("C:\\Program Files\\app{0}\\app{0}.exe".format(index), "document {} - App {}".format(index, index))
+               for index in range(app_count)]
+    windows += [("C:\\Windows\\explorer.exe", "Downloads"), ("C:\\Program Files\\other\\other.exe", "Other")]
+    return windows
+
+
+def _time_utterances(contexts, windows, utterances, utterances_per_window):
+    start = time.time()
+    for utterance in range(utterances):
+        executable, title = windows[(utterance // utterances_per_window) % len(windows)]
+        for context in contexts:
+            context.matches(executable, title, 1)
+    return time.time() - start
+
+
+def run_benchmark(app_count=30, utterances=20000, utterances_per_window=(1, 10)):
+    app_contexts = [AppContext(executable="app{}.exe".format(index), title="app {}".format(index))
+                    for index in range(app_count)]
+    negation_context = None
+    for context in app_contexts:
+        negation_context = ~context if negation_context is None else negation_context & ~context
+    windows = _create_windows(app_count)
+
+    print("{} CCR app contexts, {} utterances:".format(app_count, utterances))
+    for per_window in utterances_per_window:
+        original = _time_utterances([negation_context] + app_contexts, windows, utterances, per_window)
+        cache = ForegroundContextCache()
+        index = CCRContextIndex(app_contexts, cache)
+        indexed = _time_utterances(index.create_contexts(), windows, utterances, per_window)
+        print("  window changes every {:2} utterance(s): negation context {:7.1f} ms, index {:7.1f} ms -> {:4.1f}x"
+              " ({} misses)".format(per_window, original * 1000, indexed * 1000, original / indexed, cache.misses))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,115 @@
+'''
+Compares the two CCR grammar layouts for 20 global CCR rules and 10 app
+CCR rules: one grammar per context, each with its own fully merged rule
+(the default), against one grammar where every repeat rule refers to a
+single shared merged global rule (share_global_rule). For each layout, it
+times merging and loading the grammars into the text engine, measures the
+memory the loaded grammars keep, and counts the specs the engine gets.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_ccr_grammar_sharing
+'''
+import gc
+import time
+import tracemalloc
+
+from dragonfly import Dictation, Grammar, ShortIntegerRef, get_engine
+from mock import Mock
+
+from castervoice.lib.const import CCRType
+from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.ccrmerging2.sorting.config_ruleset_sorter import ConfigBasedRuleSetSorter
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+
+
+def _create_managed_rules(prefix, rule_count, specs_per_rule, ccrtype):
+    managed_rules = []
+    for index in range(rule_count):
+        mapping = {"{} {} command {} [<n>]".format(prefix.lower(), index, i): NullAction()
+                   for i in range(specs_per_rule)}
+        mapping["{} {} say <text>".format(prefix.lower(), index)] = NullAction()
+        rule_class = type("{}Rule{}".format(prefix, index), (MergeRule,), {
+            "mapping": mapping,
+            "extras": [Dictation("text"), ShortIntegerRef("n", 1, 50)],
+            "defaults": {"n": 1}
+        })
+        executable = "app{}".format(index) if ccrtype == CCRType.APP else None
+        details = RuleDetails(ccrtype=ccrtype, executable=executable, transformer_exclusion=True)
+        managed_rules.append(ManagedRule(rule_class, details))
+    return managed_rules
+
+
+def _create_grammars(merge_result):
+    '''
+    The same as GrammarManager._remerge_ccr_rules().
+    '''
+    if merge_result.single_grammar:
+        grammar = Grammar(name="ccr-shared")
+        for rule, _ in merge_result.ccr_rules_and_contexts:
+            grammar.add_rule(rule)
+        return [grammar]
+    grammars = []
+    for index, (rule, context) in enumerate(merge_result.ccr_rules_and_contexts):
+        grammar = Grammar(name="ccr-{}".format(index), context=context)
+        grammar.add_rule(rule)
+        grammars.append(grammar)
+    return grammars
+
+
+def _count_specs(grammars):
+    count = 0
+    for grammar in grammars:
+        for rule in grammar.rules:
+            if hasattr(rule, "_mapping"):
+                count += len(rule._mapping)
+    return count
+
+
+def _measure(managed_rules, share_global_rule):
+    merger = CCRMerger2(Mock(), SimpleCompatibilityChecker(), ClassicMergingStrategy(), 16, Mock(),
+                        share_global_rule=share_global_rule)
+    sorter = ConfigBasedRuleSetSorter([mr.get_rule_class_name() for mr in managed_rules])
+    for mr in managed_rules:
+        mr.get_prototype()  # rule classes are instantiated the same way in both layouts
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    merge_result = merger.merge_rules(managed_rules, sorter)
+    merged = time.time()
+    grammars = _create_grammars(merge_result)
+    for grammar in grammars:
+        grammar.load()
+    loaded = time.time()
+    gc.collect()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    spec_count = _count_specs(grammars)
+    for grammar in grammars:
+        grammar.unload()
+    return merged - start, loaded - merged, memory, len(grammars), spec_count
+
+
+def run_benchmark(global_rule_count=20, app_rule_count=10, specs_per_rule=50):
+    get_engine("text")
+    managed_rules = _create_managed_rules("Global", global_rule_count, specs_per_rule, CCRType.GLOBAL) + \
+        _create_managed_rules("App", app_rule_count, specs_per_rule, CCRType.APP)
+    print("{} global + {} app rules, {} specs each:".format(global_rule_count, app_rule_count, specs_per_rule + 1))
+    results = []
+    for label, share_global_rule in (("one grammar per context", False), ("shared global rule", True)):
+        merge, load, memory, grammar_count, spec_count = _measure(managed_rules, share_global_rule)
+        results.append((merge + load, memory))
+        print("  {:24} merge {:7.1f} ms, load {:6.1f} ms, {:6.1f} MB kept, {} grammar(s), {} specs".format(
+            label + ":", merge * 1000, load * 1000, memory / 1024.0 / 1024.0, grammar_count, spec_count))
+    print("  -> {:4.1f}x faster, {:4.1f}x less memory".format(results[0][0] / results[1][0],
+                                                              results[0][1] / float(results[1][1])))
+
+
+if __name__ == '__main__':
+    run_benchmark()
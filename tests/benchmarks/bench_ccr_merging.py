@@ -0,0 +1,80 @@
+'''
+Times step 4 of the CCR merge (creating the global merged rule plus one
+merged rule per app rule) for 20 global CCR rules and 10 app CCR rules:
+merging the selected rules one at a time with MergeRule.merge(), as the
+classic merging strategy used to, against building each merged rule in
+one pass with the global rules' specs shared between the app rules.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_ccr_merging
+'''
+import time
+
+from dragonfly import Dictation, ShortIntegerRef, get_engine
+from mock import Mock
+
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.compatibility.compat_result import CompatibilityResult
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+
+
+class _ChainedMergingStrategy(ClassicMergingStrategy):
+    """
+    The classic merging strategy as it was before merging in one pass.
+    """
+
+    def merge_into_single(self, sorted_checked_rules):
+        merged_rule = None
+        for compat_result in self.select_rules(sorted_checked_rules):
+            if merged_rule is None:
+                merged_rule = compat_result.rule()
+            else:
+                merged_rule = merged_rule.merge(compat_result.rule())
+        return merged_rule
+
+
+def _create_rules(prefix, rule_count, specs_per_rule):
+    rules = []
+    for index in range(rule_count):
+        name = "{}Rule{}".format(prefix, index)
+        mapping = {"{} {} command {} [<n>]".format(prefix.lower(), index, i): NullAction()
+                   for i in range(specs_per_rule)}
+        mapping["{} {} say <text>".format(prefix.lower(), index)] = NullAction()
+        rule_class = type(name, (MergeRule,), {
+            "mapping": mapping,
+            "extras": [Dictation("text"), ShortIntegerRef("n", 1, 50)],
+            "defaults": {"n": 1}
+        })
+        rules.append(rule_class())
+    return rules
+
+
+def _time_merge(merging_strategy, app_crs, non_app_crs, repeats):
+    merger = CCRMerger2(Mock(), Mock(), merging_strategy, 16, Mock())
+    start = time.time()
+    for _ in range(repeats):
+        merged_rules = merger._create_merged_rules(app_crs, non_app_crs)
+    return (time.time() - start) / repeats, merged_rules
+
+
+def run_benchmark(global_rule_count=20, app_rule_count=10, specs_per_rule=(20, 50), repeats=1):
+    get_engine("text")
+    for spec_count in specs_per_rule:
+        non_app_crs = [CompatibilityResult(rule, set())
+                       for rule in _create_rules("Global", global_rule_count, spec_count)]
+        app_crs = [CompatibilityResult(rule, set()) for rule in _create_rules("App", app_rule_count, spec_count)]
+
+        chained, chained_rules = _time_merge(_ChainedMergingStrategy(), app_crs, non_app_crs, repeats)
+        one_pass, one_pass_rules = _time_merge(ClassicMergingStrategy(), app_crs, non_app_crs, repeats)
+        assert [sorted(r.get_mapping()) for r in chained_rules] == [sorted(r.get_mapping()) for r in one_pass_rules]
+
+        print("{} global + {} app rules, {} specs each ({} merged rules):".format(
+            global_rule_count, app_rule_count, spec_count + 1, len(one_pass_rules)))
+        print("  merged one at a time: {:8.1f} ms".format(chained * 1000))
+        print("  merged in one pass:   {:8.1f} ms -> {:4.1f}x".format(one_pass * 1000, chained / one_pass))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,91 @@
+'''
+Times loading (compiling) a merged CCR rule's repeat rule in the text engine
+and recognizing an utterance of max_ccr_repetitions commands, for several
+values of max_ccr_repetitions: one long repetition against a repetition of
+segments (ccr_repetition_segment_size). Also reports how many elements the
+repeat rule itself compiles to, with each referenced rule compiled once; the
+merged rule's own size doesn't depend on max_ccr_repetitions. The text engine
+doesn't compile grammars, so its load times only show the Python side.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_ccr_repetitions
+'''
+import time
+
+from dragonfly import Function, Grammar, RuleRef, ShortIntegerRef, get_engine
+from mock import Mock
+
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.mergerule import MergeRule
+
+
+_NUMBERS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+
+
+def _spoken_index(index):
+    return "".join(chr(ord("a") + int(digit)) for digit in str(index))
+
+
+def _create_rule(spec_count):
+    mapping = {"command {} [<n>]".format(_spoken_index(index)): Function(lambda: None)
+               for index in range(spec_count)}
+    rule_class = type("BenchRule", (MergeRule,), {
+        "mapping": mapping,
+        "extras": [ShortIntegerRef("n", 1, 50)],
+        "defaults": {"n": 1}
+    })
+    return rule_class()
+
+
+def _element_count(element):
+    # a referenced rule is compiled once, on its own
+    if isinstance(element, RuleRef):
+        return 1
+    return 1 + sum(_element_count(child) for child in element.children)
+
+
+def _repetition_size(repeat_rule):
+    """
+    Elements compiled for the repeat rule and its segment rules, but not for
+    the merged rule, whose size doesn't depend on max_ccr_repetitions.
+    """
+    rules = [repeat_rule] + [rule for rule in repeat_rule.dependencies(set())
+                             if rule.name.startswith("RepeaterSegment")]
+    return sum(_element_count(rule.element) for rule in rules)
+
+
+def _time_repetitions(merge_rule, max_repetitions, segment_size, utterances):
+    merger = CCRMerger2(Mock(), Mock(), Mock(), max_repetitions, Mock(), repetition_segment_size=segment_size)
+    repeat_rule = merger._create_repeat_rule(merge_rule)
+    grammar = Grammar("bench repetitions")
+    grammar.add_rule(repeat_rule)
+
+    start = time.time()
+    grammar.load()
+    load_time = time.time() - start
+    try:
+        words = " ".join("command {} {}".format(_spoken_index(index * 7), _NUMBERS[index % 9])
+                         for index in range(max_repetitions))
+        start = time.time()
+        for _ in range(utterances):
+            get_engine().mimic(words)
+        recognition_time = (time.time() - start) / utterances
+    finally:
+        grammar.unload()
+    return load_time, recognition_time, _repetition_size(repeat_rule)
+
+
+def run_benchmark(spec_count=500, repetitions=(4, 8, 16, 32, 64), segment_size=4, utterances=20):
+    get_engine("text")
+    merge_rule = _create_rule(spec_count)
+    print("merged rule with {} specs, {} utterances of max_ccr_repetitions commands:".format(spec_count, utterances))
+    for max_repetitions in repetitions:
+        for segments in (None, segment_size):
+            load_time, recognition_time, size = _time_repetitions(merge_rule, max_repetitions, segments, utterances)
+            print("  max {:2} {:13}: load {:5.1f} ms, recognition {:6.2f} ms, repetition elements {:4}".format(
+                max_repetitions, "segments of {}".format(segments) if segments else "flat",
+                load_time * 1000, recognition_time * 1000, size))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,95 @@
+'''
+Measures how many move_mouse style calls per second Caster can make to one
+of its windows' servers: XML-RPC with a new HTTP connection per call (as
+with a SimpleXMLRPCServer), XML-RPC over a kept-open connection to a
+CasterRPCServer, and framed calls (length-prefixed JSON) over a kept-open
+connection to a CasterRPCServer. Also times Communicator.is_alive health
+checks, with the liveness cache and without it.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_communicator
+'''
+import socket
+import threading
+import time
+
+import six
+if six.PY2:
+    from SimpleXMLRPCServer import SimpleXMLRPCServer  # pylint: disable=import-error
+    import xmlrpclib  # pylint: disable=import-error
+else:
+    from xmlrpc.server import SimpleXMLRPCServer  # pylint: disable=no-name-in-module
+    import xmlrpc.client as xmlrpclib
+
+from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.framed_rpc import CasterRPCServer, FramedProxy
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind((Communicator.LOCALHOST, 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def _start(server):
+    server.register_function(lambda x, y: None, "move_mouse")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def _calls_per_second(proxy, calls):
+    start = time.time()
+    for i in range(calls):
+        proxy.move_mouse(i % 1920, i % 1080)
+    return calls / (time.time() - start)
+
+
+def run_benchmark(calls=2000, health_checks=2000):
+    xmlrpc_port = _free_port()
+    caster_port = _free_port()
+    xmlrpc_server = _start(SimpleXMLRPCServer((Communicator.LOCALHOST, xmlrpc_port), logRequests=False,
+                                              allow_none=True))
+    caster_server = _start(CasterRPCServer((Communicator.LOCALHOST, caster_port)))
+    url = "http://{}:{}"
+    keep_alive_proxy = xmlrpclib.ServerProxy(url.format(Communicator.LOCALHOST, caster_port))
+    framed_proxy = FramedProxy(Communicator.LOCALHOST, caster_port)
+    try:
+        print("{} move_mouse calls:".format(calls))
+        results = [
+            ("XML-RPC, new connection per call", xmlrpclib.ServerProxy(url.format(Communicator.LOCALHOST, xmlrpc_port))),
+            ("XML-RPC, kept-open connection", keep_alive_proxy),
+            ("framed, kept-open connection", framed_proxy)]
+        baseline = None
+        for name, proxy in results:
+            rate = _calls_per_second(proxy, calls)
+            baseline = baseline or rate
+            print("  {:34}: {:7.0f} calls/s -> {:4.1f}x".format(name, rate, rate / baseline))
+
+        comm = Communicator()
+        comm.com_registry["grids"] = caster_port
+        start = time.time()
+        for _ in range(health_checks):
+            comm.get_com("grids").ping()
+        uncached = (time.time() - start) / health_checks
+        start = time.time()
+        for _ in range(health_checks):
+            comm.is_alive("grids")
+        cached = (time.time() - start) / health_checks
+        print("{} health checks:".format(health_checks))
+        print("  ping every time: {:7.1f} us, is_alive (cached for {} s): {:5.1f} us".format(
+            uncached * 1000000, Communicator.LIVENESS_SECONDS, cached * 1000000))
+        comm.get_com("grids").close()
+    finally:
+        keep_alive_proxy("close")()
+        framed_proxy.close()
+        for server in (xmlrpc_server, caster_server):
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,100 @@
+'''
+Times scanning a synthetic tree of rule files (plus some helper modules and
+non-python files) for content requests: the original generator, the indexed
+generator with an empty index (every file read, in a thread pool), and the
+indexed generator with an up-to-date index (no file read).
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_content_scanning
+'''
+import os
+import shutil
+import tempfile
+import time
+
+from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
+from castervoice.lib.ctrl.mgr.loading.load.indexed_content_request_generator import \
+    IndexedContentRequestGenerator
+
+_RULE_TEMPLATE = '''from dragonfly import Dictation, MappingRule, ShortIntegerRef
+
+from castervoice.lib.actions import Key, Text
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.lib.merge.state.short import R
+
+
+class {name}(MappingRule):
+    mapping = {{
+{mapping}
+    }}
+    extras = [
+        Dictation("text"),
+        ShortIntegerRef("n", 1, 50),
+    ]
+    defaults = {{"n": 1}}
+
+
+def get_rule():
+    return {name}, RuleDetails(name="{spoken}", executable="{spoken}")
+'''
+
+_HELPER_TEMPLATE = '''import os
+
+
+def helper_{index}(text):
+    # not a rule: no get_rule function
+    return os.path.join("{index}", text)
+'''
+
+
+def _create_tree(root, rule_count, files_per_directory=20):
+    for index in range(rule_count):
+        directory = os.path.join(root, "app_{}".format(index // files_per_directory))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+            open(os.path.join(directory, "__init__.py"), "w").close()
+            with open(os.path.join(directory, "README.md"), "w") as f:
+                f.write("notes\n")
+        mapping = "\n".join('        "command {0} {1}": R(Key("c-{1}")),'.format(index, i) for i in range(40))
+        with open(os.path.join(directory, "rule_{}.py".format(index)), "w") as f:
+            f.write(_RULE_TEMPLATE.format(name="Rule{}".format(index), spoken="app {}".format(index),
+                                          mapping=mapping))
+        if index % 4 == 0:
+            with open(os.path.join(directory, "helper_{}.py".format(index)), "w") as f:
+                f.write(_HELPER_TEMPLATE.format(index=index))
+
+
+def _time_scan(generator, root):
+    start = time.time()
+    count = sum(1 for _ in generator.iter_content_modules(root))
+    return time.time() - start, count
+
+
+def run_benchmark(rule_counts=(1000, 3000), threads=(1, 4, 8)):
+    for rule_count in rule_counts:
+        root = tempfile.mkdtemp()
+        try:
+            _create_tree(root, rule_count)
+            index_path = os.path.join(root, "content_index.json")
+            print("{} rule files:".format(rule_count))
+
+            unindexed, count = _time_scan(ContentRequestGenerator(), root)
+            print("  original:                  {:7.1f} ms ({} requests)".format(unindexed * 1000, count))
+            for thread_count in threads:
+                if os.path.isfile(index_path):
+                    os.remove(index_path)
+                cold, count = _time_scan(IndexedContentRequestGenerator(index_path, thread_count), root)
+                print("  empty index,  {} thread(s): {:7.1f} ms ({} requests)".format(
+                    thread_count, cold * 1000, count))
+
+            # a new generator, as after a restart: the index is loaded from the file
+            generator = IndexedContentRequestGenerator(index_path)
+            warm, count = _time_scan(generator, root)
+            print("  full index:                {:7.1f} ms ({} requests, {} files read) -> {:4.1f}x".format(
+                warm * 1000, count, generator.misses, unindexed / warm))
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,89 @@
+'''
+Drives synthetic recognitions through CasterState.add, as continuous
+dictation does: mostly plain commands, with a forward seeker every so often.
+Reports the time per recognition, how much memory the stack items of one full
+stack take (stack items are compact __slots__ records), and how much memory
+is still allocated after all the recognitions (the stack is a bounded ring
+buffer, so this shouldn't grow with the number of recognitions).
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_context_stack
+'''
+import time
+import tracemalloc
+
+from dragonfly import Function
+from mock import Mock
+
+from castervoice.lib import settings
+from castervoice.lib.merge.state.actions import ContextSeeker, RegisteredAction
+from castervoice.lib.merge.state.contextoptions import ContextLevel, ContextSet
+from castervoice.lib.merge.state.stack import CasterState
+from castervoice.lib.merge.state.stackitems import StackItemRegisteredAction, StackItemSeeker
+
+
+def _create_actions(nexus, command_count):
+    commands = []
+    for index in range(command_count):
+        command = RegisteredAction(Function(lambda: None), rspec="command {}".format(index))
+        command.set_nexus(nexus)
+        commands.append(command)
+    seeker = ContextSeeker(forward=[ContextLevel(ContextSet(["default"], lambda: None),
+                                                 ContextSet(["command 0"], lambda: None))],
+                           rspec="seeker")
+    seeker.set_nexus(nexus)
+    return commands, seeker
+
+
+def _recognize(state, commands, seeker, recognitions, seeker_interval):
+    for index in range(recognitions):
+        if index % seeker_interval == 0:
+            state.add(StackItemSeeker(seeker, None))
+        else:
+            state.add(StackItemRegisteredAction(commands[index % len(commands)], None))
+
+
+def _stack_size(state, commands, seeker, seeker_interval):
+    """
+    Bytes allocated for the stack items of one full stack.
+    """
+    stack_size = state.stack.max_list_size
+    start = tracemalloc.take_snapshot()
+    stack_items = [StackItemSeeker(seeker, None) if index % seeker_interval == 0
+                   else StackItemRegisteredAction(commands[index % len(commands)], None)
+                   for index in range(stack_size)]
+    for stack_item in stack_items:
+        stack_item.preserve()
+    end = tracemalloc.take_snapshot()
+    return sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+
+
+def run_benchmark(recognitions=100000, command_count=100, seeker_interval=20):
+    if settings.SETTINGS is None:
+        settings.SETTINGS = {"miscellaneous": {"print_rdescripts": False}}
+    state = CasterState()
+    nexus = Mock()
+    nexus.state = state
+    commands, seeker = _create_actions(nexus, command_count)
+
+    start = time.time()
+    _recognize(state, commands, seeker, recognitions, seeker_interval)
+    elapsed = time.time() - start
+
+    tracemalloc.start()
+    full_stack = _stack_size(state, commands, seeker, seeker_interval)
+    before = tracemalloc.get_traced_memory()[0]
+    _recognize(state, commands, seeker, recognitions, seeker_interval)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{} recognitions, a forward seeker every {}, stack of {}:".format(
+        recognitions, seeker_interval, state.stack.max_list_size))
+    print("  time per recognition:          {:8.2f} us".format(elapsed / recognitions * 1000000))
+    print("  stack items of a full stack:   {:8.1f} KB".format(full_stack / 1024.0))
+    print("  memory kept after recognizing: {:8.1f} KB (peak {:.1f} KB over the start)".format(
+        (after - before) / 1024.0, (peak - before) / 1024.0))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,131 @@
+'''
+Times how long it takes from a homunculus (pop-up window) completing to the
+function waiting for its response running, with the homunculus pushing its
+response to Caster's HMCResponseReceiver against Caster polling the
+homunculus' get_message over XML-RPC, and counts the XML-RPC calls Caster
+makes to the homunculus while it waits. The homunculus here is a stand-in
+XML-RPC server, and the engine timer is a thread.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_hmc_responses
+'''
+import random
+import socket
+import threading
+import time
+
+import six
+if six.PY2:
+    from SimpleXMLRPCServer import SimpleXMLRPCServer  # pylint: disable=import-error
+    import xmlrpclib  # pylint: disable=import-error
+else:
+    from xmlrpc.server import SimpleXMLRPCServer  # pylint: disable=no-name-in-module
+    import xmlrpc.client as xmlrpclib
+
+from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.hmc_response_receiver import HMCResponseReceiver
+from castervoice.lib.merge.state.scheduler import AsynchronousScheduler
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind((Communicator.LOCALHOST, 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class _ThreadTimer(object):
+    def __init__(self, callback, seconds):
+        self._stopped = threading.Event()
+
+        def run():
+            while not self._stopped.wait(seconds):
+                callback()
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class _Homunculus(object):
+    def __init__(self, port):
+        self.completed = False
+        self.rpc_calls = 0
+        self._server = SimpleXMLRPCServer((Communicator.LOCALHOST, port), logRequests=False, allow_none=True)
+        self._server.register_function(self._rpc_get_message, "get_message")
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def _rpc_get_message(self):
+        self.rpc_calls += 1
+        return self.get_message()
+
+    def get_message(self):
+        return {"mode": "confirm", "confirm": 1} if self.completed else None
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _wait_for_response(push, interval, tick_seconds, delay, comm, receiver):
+    homunculus = _Homunculus(comm.com_registry["hmc"])
+    handled = threading.Event()
+    scheduler = AsynchronousScheduler(tick_seconds, _ThreadTimer)
+    homunculus_proxy = xmlrpclib.ServerProxy("http://{}:{}".format(Communicator.LOCALHOST, comm.com_registry["hmc"]))
+
+    launch_id = receiver.new_launch()
+
+    def check_complete():
+        if push:
+            data = receiver.take_response(launch_id)
+        else:
+            data = homunculus_proxy.get_message()
+        if data is not None:
+            handled.set()
+            scheduler.cancel(task)
+
+    task = scheduler.schedule(check_complete, interval, (lambda: receiver.has_response(launch_id)) if push else None)
+    time.sleep(delay)
+    homunculus.completed = True
+    completed_time = time.time()
+    if push:
+        comm.push_hmc_response(homunculus.get_message, launch_id)
+    handled.wait(10)
+    latency = time.time() - completed_time
+    calls = homunculus.rpc_calls
+    homunculus.close()
+    return latency, calls
+
+
+def run_benchmark(trials=5, interval=1.0, tick_seconds=0.1):
+    comm = Communicator()
+    comm.com_registry["hmc"] = _free_port()
+    comm.com_registry["hmc_response"] = _free_port()
+    receiver = HMCResponseReceiver(comm.com_registry["hmc_response"])
+    receiver.start()
+    random.seed(0)
+    delays = [random.uniform(0.5, 1.5) for _ in range(trials)]
+    try:
+        print("{} trials, checking every {} s, scheduler tick {} s, completing after 0.5-1.5 s:".format(
+            trials, interval, tick_seconds))
+        for push in (False, True):
+            results = [_wait_for_response(push, interval, tick_seconds, delay, comm, receiver) for delay in delays]
+            print("  {:4}: mean latency {:6.1f} ms (max {:6.1f} ms), XML-RPC calls to the homunculus {:4.1f} per window".format(
+                "push" if push else "poll",
+                sum(latency for latency, _ in results) / trials * 1000,
+                max(latency for latency, _ in results) * 1000,
+                sum(calls for _, calls in results) / float(trials)))
+        print("  receiver's own latencies (complete to response taken): mean {:.1f} ms".format(
+            sum(receiver.latencies) / len(receiver.latencies) * 1000))
+    finally:
+        receiver.stop()
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,68 @@
+'''
+Times setting the rdescripts of 20 CCR rules' actions, as happens every time
+their rule classes are (re)loaded, with the (rule class, spec) template table
+against creating every template again, and times the whole merge of those
+rules (which also sets rdescripts, but only for actions which don't have one
+yet) for comparison.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_rdescripts
+'''
+import time
+
+from dragonfly import get_engine
+
+from castervoice.lib.ctrl.mgr import rule_formatter
+from castervoice.lib.merge.ccrmerging2.merging.merge_rule_builder import MergeRuleBuilder
+from castervoice.lib.merge.state.actions2 import NullAction
+from tests.benchmarks.bench_ccr_merging import _create_rules
+
+
+def _create_mappings(rules):
+    """
+    Fresh actions, as a reloaded rule file creates.
+    """
+    mappings = []
+    for rule in rules:
+        mapping = {}
+        for spec in rule.get_mapping():
+            action = NullAction()
+            action.rdescript = None
+            mapping[spec] = action
+        mappings.append((rule.get_rule_class_name(), mapping))
+    return mappings
+
+
+def _time_set_rdescripts(rules, repeats, keep_table):
+    elapsed = 0
+    for _ in range(repeats):
+        mappings = _create_mappings(rules)
+        if not keep_table:
+            rule_formatter._RDESCRIPT_TEMPLATES.clear()
+        start = time.time()
+        for rcn, mapping in mappings:
+            rule_formatter._set_rdescripts(mapping, rcn)
+        elapsed += time.time() - start
+    return elapsed / repeats
+
+
+def run_benchmark(rule_count=20, specs_per_rule=50, repeats=50):
+    get_engine("text")
+    rules = _create_rules("Global", rule_count, specs_per_rule)
+    spec_count = sum(len(rule.get_mapping()) for rule in rules)
+
+    uncached = _time_set_rdescripts(rules, repeats, False)
+    cached = _time_set_rdescripts(rules, repeats, True)
+    start = time.time()
+    MergeRuleBuilder.from_rules(rules).build()
+    merge_time = time.time() - start
+
+    print("{} rules, {} specs:".format(rule_count, spec_count))
+    print("  set rdescripts on reload, templates created: {:7.2f} ms".format(uncached * 1000))
+    print("  set rdescripts on reload, template table:    {:7.2f} ms -> {:4.1f}x".format(cached * 1000,
+                                                                                        uncached / cached))
+    print("  merging the rules, for comparison:           {:7.2f} ms".format(merge_time * 1000))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,111 @@
+'''
+Times the text replacer over the full starter rule set: the original
+one-definition-at-a-time replacement against the compiled replacers.
+
+"strings" is only the replacing, over every spec, choice key and default;
+"rules" is the whole transformation of every rule (minus re-initializing it),
+which also includes rebuilding changed Choices.
+
+Run from the repository root:
+    python -m tests.benchmarks.bench_text_replacer
+'''
+import time
+
+import six
+from dragonfly import get_engine
+from dragonfly.grammar.elements import Choice
+
+from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.text_replacer import _preserve, \
+    _spec_override_from_config
+from tests.lib.merge.ccrmerging2.transformers.text_replacer.legacy_text_replacer import \
+    legacy_spec_override_from_config
+from tests.lib.merge.ccrmerging2.transformers.text_replacer.test_textReplacerStarterRules import \
+    make_starter_rule_definitions
+from tests.test_util import settings_mocking
+from tests.test_util.starter_rules import get_starter_rules
+
+
+def _get_strings(rules):
+    specs, choice_keys, defaults = [], [], []
+    for rule_class, _ in rules:
+        rule = rule_class()
+        specs.extend(_preserve(spec).cleaned for spec in rule._mapping.keys())
+        for extra in rule._extras.values():
+            if isinstance(extra, Choice):
+                choice_keys.extend(extra._choices.keys())
+        defaults.extend(v for v in rule._defaults.values() if isinstance(v, six.string_types))
+    return specs, choice_keys, defaults
+
+
+def _replace_sequentially(strings, definitions):
+    for text in strings:
+        for source in definitions.keys():
+            if source in text:
+                text = text.replace(source, definitions[source])
+
+
+def _replace_compiled(strings, replacer):
+    for text in strings:
+        replacer.replace(text)
+
+
+def _time_strings(strings, definitions):
+    groups = list(zip(strings, [definitions.specs, definitions.extras, definitions.defaults],
+                      [definitions.get_specs_replacer(), definitions.get_extras_replacer(),
+                       definitions.get_defaults_replacer()]))
+    start = time.time()
+    for group_strings, group_definitions, _ in groups:
+        _replace_sequentially(group_strings, group_definitions)
+    legacy = time.time() - start
+    start = time.time()
+    for group_strings, _, replacer in groups:
+        _replace_compiled(group_strings, replacer)
+    return legacy, time.time() - start
+
+
+def _time_rules(override_fn, rules, definitions):
+    instances = [rule_class() for rule_class, _ in rules]
+    start = time.time()
+    for rule in instances:
+        # the rule is re-initialized when anything changes; skip that part, it isn't the replacer's cost
+        rule.__init__ = lambda *args, **kwargs: None
+        try:
+            override_fn(rule, definitions)
+        except KeyError:
+            pass  # some tricky definitions make both versions fail on the same choice
+    return time.time() - start
+
+
+def _best(timing_fn, repeats):
+    return [min(times) for times in zip(*[timing_fn() for _ in range(repeats)])]
+
+
+def run_benchmark(definition_counts=(50, 200, 500), repeats=5):
+    get_engine("text")
+    settings_mocking.prevent_initialize()
+    rules = get_starter_rules(include_selfmod=False)
+    strings = _get_strings(rules)
+    print("starter rules: {} rules, {} specs, {} choice keys, {} string defaults".format(
+        len(rules), *[len(group) for group in strings]))
+
+    for tricky in (False, True):
+        print("typical definitions:" if not tricky else "tricky definitions (chains, parts of words):")
+        for count in definition_counts:
+            definitions = make_starter_rule_definitions(rules, count, 0, tricky)
+            start = time.time()
+            definitions.compile()
+            compile_time = time.time() - start
+
+            legacy_strings, compiled_strings = _best(lambda: _time_strings(strings, definitions), repeats)
+            legacy_rules, compiled_rules = _best(
+                lambda: (_time_rules(legacy_spec_override_from_config, rules, definitions),
+                         _time_rules(_spec_override_from_config, rules, definitions)), repeats)
+            print("  {:>4} definitions (compiled in {:6.1f} ms): "
+                  "strings {:7.1f} -> {:6.1f} ms ({:4.1f}x) | rules {:7.1f} -> {:6.1f} ms ({:4.1f}x)".format(
+                      len(definitions), compile_time * 1000,
+                      legacy_strings * 1000, compiled_strings * 1000, legacy_strings / compiled_strings,
+                      legacy_rules * 1000, compiled_rules * 1000, legacy_rules / compiled_rules))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -1,6 +1,7 @@
 from mock import Mock
 
 from castervoice.lib.ctrl.mgr.loading.load import content_loader
+from castervoice.lib.ctrl.mgr.loading.load.content_request import ContentRequest
 from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
 from castervoice.lib.ctrl.mgr.loading.load.content_type import ContentType
 from castervoice.lib.ctrl.mgr.rules_config import RulesConfig
@@ -58,6 +59,28 @@ class TestContentLoader(SettingsEnabledTestCase):
         # TODO: this test
         pass
 
+    def _load_everything_with_two_rules(self, defer_disabled_rules):
+        self.rc_mock._config[RulesConfig._WHITELISTED]["MockRuleTwo"] = True
+        self.rc_mock._config[RulesConfig._ENABLED_ORDERED] = ["MockRuleOne"]
+        self.crg_mock.iter_content_modules = Mock(side_effect=[
+            [ContentRequest(ContentType.GET_RULE, "/mock/base/path/rules", "rule_one", "MockRuleOne"),
+             ContentRequest(ContentType.GET_RULE, "/mock/base/path/rules", "rule_two", "MockRuleTwo")],
+            []])
+        content_loader._MODULES = {}
+        self.cl._get_load_fn.return_value = lambda x: _FakeImportedRuleModule(x)
+        self.cl._defer_disabled_rules = defer_disabled_rules
+        return self.cl.load_everything(self.rc_mock)
+
+    def test_load_everything_imports_all_allowed_rules(self):
+        content = self._load_everything_with_two_rules(False)
+        self.assertEqual(["rule_one", "rule_two"], sorted(content.rules))
+        self.assertEqual([], content.deferred_rules)
+
+    def test_load_everything_defers_disabled_rules(self):
+        content = self._load_everything_with_two_rules(True)
+        self.assertEqual(["rule_one"], content.rules)
+        self.assertEqual(["rule_two"], [request.module_name for request in content.deferred_rules])
+
     def test_idem_import_module_reimport_success(self):
         rule_module = _FakeImportedRuleModule(_FakeContent)
         content_loader._MODULES = {TestContentLoader._RULE_MODULE_NAME: rule_module}
@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
+from castervoice.lib.ctrl.mgr.loading.load.content_type import ContentType
+from castervoice.lib.ctrl.mgr.loading.load.indexed_content_request_generator import \
+    IndexedContentRequestGenerator
+from tests.test_util import utilities_mocking
+
+_RULE_LINES = ["class Abc(MappingRule):",
+               "  mapping={\"test action\":NullAction()}",
+               "def get_rule():",
+               "  return Abc, RuleDetails(name=\"test\")"]
+_HOOK_LINES = ["class ZHook(BaseHook):pass",
+               "def get_hook():",
+               "  return ZHook"]
+
+
+class TestIndexedContentRequestGenerator(TestCase):
+    """
+    Tests that unchanged files aren't read again, and that the requests
+    are the same as the unindexed generator's.
+    """
+
+    _INDEX_PATH = "/mock/content_index.json"
+
+    def setUp(self):
+        utilities_mocking.mock_toml_files()
+        self.files = {
+            "/dir/rules/abc.py": (1.0, 10, _RULE_LINES),
+            "/dir/rules/__init__.py": (1.0, 10, []),
+            "/dir/rules/notes.txt": (1.0, 10, ["def get_rule():"]),
+            "/dir/hooks/z_hook.py": (1.0, 10, _HOOK_LINES),
+            "/dir/hooks/helper.py": (1.0, 10, ["import os"])
+        }
+        self.crg = self._create_generator(TestIndexedContentRequestGenerator._INDEX_PATH)
+        self.reads = []
+
+    def _create_generator(self, *args):
+        crg = IndexedContentRequestGenerator(*args) if args else ContentRequestGenerator()
+        crg._walk = self._walk
+        crg._get_file_lines = self._get_file_lines
+        crg._stat = lambda file_path: self.files[file_path][:2]
+        return crg
+
+    def _walk(self, directory):
+        dirpaths = sorted(set(file_path.rsplit("/", 1)[0] for file_path in self.files
+                              if file_path.startswith(directory + "/")))
+        return [(dirpath, [], sorted(fp.rsplit("/", 1)[1] for fp in self.files if fp.rsplit("/", 1)[0] == dirpath))
+                for dirpath in dirpaths]
+
+    def _get_file_lines(self, file_path):
+        self.reads.append(file_path)
+        return self.files[file_path][2]
+
+    def _restart(self):
+        self.crg = self._create_generator(TestIndexedContentRequestGenerator._INDEX_PATH)
+        self.reads = []
+
+    @staticmethod
+    def _describe(requests):
+        return [(r.content_type, r.directory, r.module_name, r.content_class_name) for r in requests]
+
+    def test_same_requests_as_unindexed(self):
+        expected = self._describe(self._create_generator().get_all_content_modules("/dir"))
+        self.assertEqual(expected, self._describe(self.crg.get_all_content_modules("/dir")))
+        self.assertEqual([(ContentType.GET_HOOK, "/dir/hooks", "z_hook", None),
+                          (ContentType.GET_RULE, "/dir/rules", "abc", "Abc")], expected)
+
+    def test_unchanged_files_not_read_after_restart(self):
+        first = self._describe(self.crg.get_all_content_modules("/dir"))
+        self.assertEqual(3, len(self.reads))
+
+        self._restart()
+        self.assertEqual(first, self._describe(self.crg.get_all_content_modules("/dir")))
+        self.assertEqual([], self.reads)
+        self.assertEqual(3, self.crg.hits)
+
+    def test_changed_file_read_again(self):
+        self.crg.get_all_content_modules("/dir")
+        self.files["/dir/hooks/helper.py"] = (2.0, 10, _HOOK_LINES)
+
+        self._restart()
+        requests = self._describe(self.crg.get_all_content_modules("/dir"))
+        self.assertEqual(["/dir/hooks/helper.py"], self.reads)
+        self.assertIn((ContentType.GET_HOOK, "/dir/hooks", "helper", None), requests)
+
+    def test_deleted_file_removed_from_index(self):
+        self.crg.get_all_content_modules("/dir")
+        del self.files["/dir/rules/abc.py"]
+
+        self._restart()
+        self.assertEqual(1, len(self.crg.get_all_content_modules("/dir")))
+        self.assertNotIn("/dir/rules/abc.py", self.crg._get_index())
+
+    def test_other_directories_kept_in_index(self):
+        self.files["/other/x_hook.py"] = (1.0, 10, _HOOK_LINES)
+        self.crg.get_all_content_modules("/other")
+        self.crg.get_all_content_modules("/dir")
+
+        self._restart()
+        self.crg.get_all_content_modules("/other")
+        self.assertEqual([], self.reads)
+
+    def test_unfinished_scan_not_saved(self):
+        next(self.crg.iter_content_modules("/dir"))
+
+        self._restart()
+        self.crg.get_all_content_modules("/dir")
+        self.assertEqual(3, len(self.reads))
+
+    def test_requests_yielded_lazily(self):
+        self.crg._get_file_lines = Mock(side_effect=self._get_file_lines)
+        requests = self.crg.iter_content_modules("/dir")
+        self.assertEqual(0, self.crg._get_file_lines.call_count)
+        self.assertEqual("z_hook", next(requests).module_name)
@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, skipUnless
+
+from mock import Mock, patch
+
+from castervoice.lib.ctrl.mgr.loading.reload.base_reload_observable import BaseReloadObservable
+from castervoice.lib.ctrl.mgr.loading.reload.event_reload_observable import EventReloadObservable
+from castervoice.lib.ctrl.mgr.loading.reload.file_watchers import InotifyFileWatcher, StatFileWatcher
+from tests.test_util import printer_mocking
+
+
+class _FakeWatcher(object):
+    def __init__(self, reports):
+        self.reports = reports
+        self.watched = []
+
+    def watch(self, file_path):
+        self.watched.append(file_path)
+
+    def wait(self, timeout):
+        return set(self.reports.pop(0)) if len(self.reports) > 0 else set()
+
+    def close(self):
+        pass
+
+
+class TestEventReloadObservable(TestCase):
+
+    def setUp(self):
+        printer_mocking.printer_spy()
+        self.directory = tempfile.mkdtemp()
+        self.file_paths = [self._write("rule_{}.py".format(i), "x = {}".format(i)) for i in range(3)]
+        self.watcher = _FakeWatcher([])
+        self.observable = EventReloadObservable(1, self.watcher)
+        # the watching thread's loop isn't started: _watch_once is called directly
+        self.observable._running = True
+        self.listener = Mock(spec=["receive"])
+        self.observable.register_listener(self.listener)
+        for file_path in self.file_paths:
+            self.observable.register_watched_file(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, text):
+        file_path = os.path.join(self.directory, name)
+        with open(file_path, "w") as f:
+            f.write(text)
+        return file_path
+
+    def _received(self):
+        return [call[0][0] for call in self.listener.receive.call_args_list]
+
+    def test_files_watched(self):
+        self.assertEqual(self.file_paths, self.watcher.watched)
+
+    def test_burst_of_changes_is_one_batch(self):
+        self._write("rule_0.py", "x = 'changed'")
+        self._write("rule_1.py", "x = 'changed too'")
+        self.watcher.reports = [[self.file_paths[0]], [self.file_paths[1]], [self.file_paths[0]]]
+        self.observable._watch_once()
+
+        self.assertEqual(0, len(self.watcher.reports))
+        self.assertEqual(1, self.observable._batches.qsize())
+        self.assertEqual([], self._received())
+
+        self.observable._deliver_batches()
+        self.assertEqual(self.file_paths[:2], self._received())
+
+    def test_batch_listener_receives_batch_once(self):
+        batch_listener = Mock(spec=["receive", "receive_batch"])
+        self.observable.register_listener(batch_listener)
+        self._write("rule_0.py", "x = 'changed'")
+        self._write("rule_2.py", "x = 'changed too'")
+        self.watcher.reports = [[self.file_paths[0], self.file_paths[2]]]
+        self.observable._watch_once()
+        self.observable._deliver_batches()
+
+        batch_listener.receive_batch.assert_called_once_with([self.file_paths[0], self.file_paths[2]])
+        self.assertEqual(0, batch_listener.receive.call_count)
+        self.assertEqual([self.file_paths[0], self.file_paths[2]], self._received())
+
+    def test_only_changed_metadata_is_hashed(self):
+        self._write("rule_2.py", "x = 'a longer file'")
+        self.watcher.reports = [self.file_paths]
+        with patch.object(BaseReloadObservable, "_get_hash_of_file", return_value="new hash") as hash_fn:
+            self.observable._watch_once()
+        self.assertEqual([((self.file_paths[2],),)], hash_fn.call_args_list)
+
+    def test_same_contents_not_reloaded(self):
+        self.observable._file_stats[self.file_paths[0]] = None
+        self.watcher.reports = [[self.file_paths[0]]]
+        self.observable._watch_once()
+        self.observable._deliver_batches()
+        self.assertEqual([], self._received())
+
+    def test_deleted_file_reported_once(self):
+        spy = printer_mocking.printer_spy()
+        os.remove(self.file_paths[0])
+        for _ in range(2):
+            self.watcher.reports = [[self.file_paths[0]]]
+            self.observable._watch_once()
+            self.observable._deliver_batches()
+        self.assertEqual(1, len(spy.printed))
+
+
+class TestFileWatchers(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "rule.py")
+        self.other_path = os.path.join(self.directory, "other.py")
+        for file_path in [self.file_path, self.other_path]:
+            with open(file_path, "w") as f:
+                f.write("x = 1")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _assert_reports_change(self, watcher):
+        watcher.watch(self.file_path)
+        self.assertEqual(set(), watcher.wait(0.01))
+        with open(self.other_path, "w") as f:
+            f.write("x = 2")
+        # replaced by renaming, like many editors save:
+        replacement = self.file_path + ".tmp"
+        with open(replacement, "w") as f:
+            f.write("x = 22")
+        os.rename(replacement, self.file_path)
+        self.assertEqual({self.file_path}, watcher.wait(1))
+        watcher.close()
+
+    def test_stat_watcher(self):
+        self._assert_reports_change(StatFileWatcher())
+
+    @skipUnless(InotifyFileWatcher.is_available(), "inotify is Linux only")
+    def test_inotify_watcher(self):
+        self._assert_reports_change(InotifyFileWatcher())
+
+    @skipUnless(InotifyFileWatcher.is_available(), "inotify is Linux only")
+    def test_inotify_watcher_doesnt_wait_for_timeout(self):
+        watcher = InotifyFileWatcher()
+        watcher.watch(self.file_path)
+        with open(self.file_path, "w") as f:
+            f.write("x = 2")
+        start = time.time()
+        self.assertEqual({self.file_path}, watcher.wait(10))
+        self.assertLess(time.time() - start, 1)
+        watcher.close()
+
+    @skipUnless(InotifyFileWatcher.is_available(), "inotify is Linux only")
+    def test_inotify_overflow_reports_every_file(self):
+        watcher = InotifyFileWatcher()
+        watcher.watch(self.file_path)
+        watcher.watch(self.other_path)
+        overflow = InotifyFileWatcher._EVENT_HEADER.pack(-1, InotifyFileWatcher._IN_Q_OVERFLOW, 0, 0)
+        self.assertEqual({self.file_path, self.other_path}, watcher._parse_events(overflow))
+        watcher.close()
+
+    @skipUnless(InotifyFileWatcher.is_available(), "inotify is Linux only")
+    def test_inotify_watcher_falls_back_to_stat_when_watch_fails(self):
+        printer_mocking.printer_spy()
+        watcher = InotifyFileWatcher()
+        with patch.object(InotifyFileWatcher._get_libc(), "inotify_add_watch", return_value=-1):
+            watcher.watch(self.file_path)
+        time.sleep(0.01)  # so the mtime changes
+        with open(self.file_path, "w") as f:
+            f.write("x = 22")
+        self.assertEqual({self.file_path}, watcher.wait(0.01))
+        watcher.close()
+
+    @skipUnless(InotifyFileWatcher.is_available(), "inotify is Linux only")
+    def test_inotify_watcher_keeps_watching_recreated_directory(self):
+        watcher = InotifyFileWatcher()
+        watcher.watch(self.file_path)
+        shutil.rmtree(self.directory)
+        changed = set()
+        for _ in range(10):
+            changed |= watcher.wait(0.1)
+        self.assertEqual({self.file_path}, changed)
+        self.assertEqual({}, watcher._watch_descriptors)
+
+        os.mkdir(self.directory)
+        with open(self.file_path, "w") as f:
+            f.write("x = 2")
+        self.assertEqual({self.file_path}, watcher.wait(0.01))
+        watcher.close()
@@ -40,6 +40,7 @@ class TestGrammarManager(SettingsEnabledTestCase):
     def _initialize(self, content):
         # self._content_loader.load_everything.side_effect = [content]
         [self._gm.register_rule(rc, d) for rc, d in content.rules]
+        [self._gm.register_deferred_rule(r) for r in content.deferred_rules]
         [self._transformers_runner.add_transformer(t) for t in content.transformers]
         [self._hooks_runner.add_hook(h) for h in content.hooks]
         self._gm.load_activation_grammars()
@@ -296,3 +297,193 @@ class TestGrammarManager(SettingsEnabledTestCase):
 
         # simulate a spoken "enable" command from the GrammarActivator:
         self._gm._change_rule_enabled("Python", False)
+
+    def _setup_deferred_punctuation(self, trigger_known):
+        import os
+        from castervoice.lib.ctrl.mgr.loading.load.content_request import ContentRequest
+        from castervoice.lib.ctrl.mgr.loading.load.content_type import ContentType
+        from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
+        from castervoice.rules.core.punctuation_rules import punctuation
+
+        self._gm._startup_cache = StartupCache("/mock/startup_cache.json")
+        self._gm._startup_cache.load()
+        file_path = punctuation.__file__.replace(".pyc", ".py")
+        if trigger_known:
+            self._gm._startup_cache.put_trigger("Punctuation", file_path, "punctuation")
+        self._content_loader.process_request.side_effect = lambda request: punctuation.get_rule()
+        return ContentRequest(ContentType.GET_RULE, os.path.dirname(file_path), "punctuation", "Punctuation")
+
+    def test_deferred_rule_not_imported_until_enabled(self):
+        from castervoice.lib import utilities
+        from castervoice.lib.ctrl.mgr.rules_config import RulesConfig
+        from castervoice.rules.core.alphabet_rules import alphabet
+
+        self._setup_rules_config_file(loadable_true=["Alphabet", "Punctuation"], enabled=["Alphabet"])
+        request = self._setup_deferred_punctuation(True)
+        self._initialize(FullContentSet([alphabet.get_rule()], [], [], [request]))
+
+        self.assertEqual(0, self._content_loader.process_request.call_count)
+        self.assertNotIn("Punctuation", self._gm._managed_rules)
+        self.assertEqual("punctuation", self._gm._activator.get_registered_trigger("Punctuation"))
+
+        # simulate a spoken "enable" command from the GrammarActivator:
+        self._gm._change_rule_enabled("Punctuation", True)
+        self.assertEqual(1, self._content_loader.process_request.call_count)
+        self.assertIn("Punctuation", self._gm._managed_rules)
+        config = utilities.load_toml_file(TestGrammarManager._MOCK_PATH_RULES_CONFIG)
+        self.assertIn("Punctuation", config[RulesConfig._ENABLED_ORDERED])
+
+    def test_deferred_rule_with_unknown_trigger_imported(self):
+        self._setup_rules_config_file(loadable_true=["Punctuation"], enabled=[])
+        request = self._setup_deferred_punctuation(False)
+        self._initialize(FullContentSet([], [], [], [request]))
+
+        self.assertEqual(1, self._content_loader.process_request.call_count)
+        self.assertIn("Punctuation", self._gm._managed_rules)
+        # next time, it can be deferred
+        file_path = self._gm._managed_rules["Punctuation"].get_details().get_filepath()
+        self.assertEqual(self._gm._activator.get_registered_trigger("Punctuation"),
+                         self._gm._startup_cache.get_trigger("Punctuation", file_path))
+
+    def test_receive_batch_remerges_once(self):
+        from castervoice.rules.core.alphabet_rules import alphabet
+        from castervoice.rules.core.punctuation_rules import punctuation
+        from castervoice.rules.core.navigation_rules import nav
+
+        self._setup_rules_config_file(loadable_true=["Alphabet", "Punctuation", "Navigation"],
+                                      enabled=["Alphabet", "Punctuation"])
+        self._initialize(FullContentSet([alphabet.get_rule(), punctuation.get_rule(), nav.get_rule()], [], []))
+        modules = {"alphabet": alphabet, "punctuation": punctuation, "nav": nav}
+        self._content_loader.idem_import_module.side_effect = \
+            lambda module_name, fn_name: modules[module_name].get_rule()
+        self._gm._remerge_ccr_rules = Mock(wraps=self._gm._remerge_ccr_rules)
+
+        self._gm.receive_batch(["/mock/alphabet.py", "/mock/punctuation.py", "/mock/nav.py"])
+        self.assertEqual(3, self._content_loader.idem_import_module.call_count)
+        # Navigation isn't enabled, so it doesn't need merging
+        self.assertEqual(1, self._gm._remerge_ccr_rules.call_count)
+        self.assertEqual(1, len(self._gm._grammars_container.ccr))
+
+    def test_receive_batch_of_disabled_rule_doesnt_remerge(self):
+        from castervoice.rules.core.alphabet_rules import alphabet
+        from castervoice.rules.core.navigation_rules import nav
+
+        self._setup_rules_config_file(loadable_true=["Alphabet", "Navigation"], enabled=["Alphabet"])
+        self._initialize(FullContentSet([alphabet.get_rule(), nav.get_rule()], [], []))
+        self._content_loader.idem_import_module.side_effect = lambda module_name, fn_name: nav.get_rule()
+        self._gm._remerge_ccr_rules = Mock(wraps=self._gm._remerge_ccr_rules)
+
+        self._gm.receive_batch(["/mock/nav.py"])
+        self.assertEqual(0, self._gm._remerge_ccr_rules.call_count)
+
+    def test_receive_batch_merge_error_fires_error_event(self):
+        from castervoice.rules.core.alphabet_rules import alphabet
+
+        self._setup_rules_config_file(loadable_true=["Alphabet"], enabled=["Alphabet"])
+        self._initialize(FullContentSet([alphabet.get_rule()], [], []))
+        self._content_loader.idem_import_module.side_effect = lambda module_name, fn_name: alphabet.get_rule()
+        self._gm._remerge_ccr_rules = Mock(side_effect=ValueError("bad merge"))
+        self._hooks_runner.execute = Mock()
+
+        self._gm.receive_batch(["/mock/alphabet.py"])
+        self.assertEqual(1, self._gm._remerge_ccr_rules.call_count)
+        self.assertEqual(1, self._hooks_runner.execute.call_count)
+        self.assertEqual("OnErrorEvent", type(self._hooks_runner.execute.call_args[0][0]).__name__)
+
+    def test_each_rule_instantiated_once(self):
+        from castervoice.rules.core.alphabet_rules import alphabet
+        from castervoice.rules.core.punctuation_rules import punctuation
+        from castervoice.rules.core.navigation_rules import nav
+
+        self._setup_rules_config_file(loadable_true=["Alphabet", "Punctuation", "Navigation"],
+                                      enabled=["Alphabet", "Punctuation"])
+        self._initialize(FullContentSet([alphabet.get_rule(), punctuation.get_rule(), nav.get_rule()], [], []))
+        startup_instantiations, remerge_instantiations = self._gm.get_instantiation_counts()
+        # a loaded non-CCR rule with a name (e.g. the activation rules) is also constructed with that name
+        named_rcns = [rcn for rcn in self._gm._grammars_container.non_ccr
+                      if self._gm._managed_rules[rcn].get_details().name is not None]
+        self.assertEqual(len(self._gm._managed_rules) + len(named_rcns), startup_instantiations)
+        self.assertEqual(0, remerge_instantiations)
+
+        # simulate a spoken "enable" command from the GrammarActivator:
+        self._gm._change_rule_enabled("Navigation", True)
+        self.assertEqual(0, self._gm.get_instantiation_counts()[1])
+
+    def _register_cached_valid_rule(self, rule_class, details):
+        from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
+
+        self._gm._startup_cache = StartupCache("/mock/startup_cache.json")
+        self._gm._startup_cache.load()
+        self._gm._startup_cache.put_invalidation(rule_class, details, None)
+        self._gm._startup_cache.put_trigger(rule_class.__name__, details.get_filepath(), details.name)
+        self._gm.register_rule(rule_class, details)
+
+    def test_cached_valid_rule_not_instantiated_until_enabled(self):
+        from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+        from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+        from castervoice.rules.core.navigation_rules.nav import Navigation
+
+        self._setup_rules_config_file(loadable_true=["Navigation"])
+        instantiations = ManagedRule.get_instantiation_count()
+        self._register_cached_valid_rule(Navigation, RuleDetails(name="navigation", ccrtype="global"))
+        self.assertIn("Navigation", self._gm._managed_rules)
+        self.assertEqual("navigation", self._gm._activator.get_registered_trigger("Navigation"))
+        self.assertEqual(instantiations, ManagedRule.get_instantiation_count())
+
+        # simulate a spoken "enable" command from the GrammarActivator:
+        self._gm._change_rule_enabled("Navigation", True)
+        self.assertEqual(instantiations + 1, ManagedRule.get_instantiation_count())
+        self.assertEqual(1, len(self._gm._grammars_container.ccr))
+
+    def test_cached_valid_rule_which_fails_to_instantiate_rejected(self):
+        from dragonfly import MappingRule
+        from mock import patch
+        from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+
+        class BrokenRule(MappingRule):
+            def __init__(self):
+                raise ValueError("a module this rule imports changed")
+
+        details = RuleDetails(name="broken rule")
+        self._register_cached_valid_rule(BrokenRule, details)
+        self.assertIn("BrokenRule", self._gm._managed_rules)
+
+        # simulate a spoken "enable" command from the GrammarActivator:
+        with patch("castervoice.lib.ctrl.mgr.grammar_manager.traceback"):
+            self._gm._change_rule_enabled("BrokenRule", True)
+        self.assertNotIn("BrokenRule", self._gm._grammars_container.non_ccr)
+        self.assertEqual((True, "BrokenRule rejected due to instantiation errors"),
+                         self._gm._startup_cache.get_invalidation(BrokenRule, details))
+
+    def test_cached_valid_rule_with_unknown_trigger_which_fails_to_instantiate_rejected(self):
+        from dragonfly import MappingRule
+        from mock import patch
+        from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+        from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
+
+        class BrokenRule(MappingRule):
+            def __init__(self):
+                raise ValueError("a module this rule imports changed")
+
+        details = RuleDetails(name="broken rule")
+        self._gm._startup_cache = StartupCache("/mock/startup_cache.json")
+        self._gm._startup_cache.load()
+        self._gm._startup_cache.put_invalidation(BrokenRule, details, None)
+
+        with patch("castervoice.lib.ctrl.mgr.grammar_manager.traceback"):
+            self._gm.register_rule(BrokenRule, details)
+        self.assertNotIn("BrokenRule", self._gm._managed_rules)
+        self.assertEqual((True, "BrokenRule rejected due to instantiation errors"),
+                         self._gm._startup_cache.get_invalidation(BrokenRule, details))
+
+    def test_merge_after_startup_saves_cache_changes(self):
+        from castervoice.rules.core.alphabet_rules import alphabet
+        from castervoice.rules.core.navigation_rules import nav
+
+        self._setup_rules_config_file(loadable_true=["Alphabet", "Navigation"], enabled=["Alphabet"])
+        self._initialize(FullContentSet([alphabet.get_rule(), nav.get_rule()], [], []))
+        self._gm._startup_cache = Mock()
+
+        # simulate a spoken "enable" command from the GrammarActivator:
+        self._gm._change_rule_enabled("Navigation", True)
+        self.assertEqual(1, self._gm._startup_cache.save_changes.call_count)
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.rules.core.punctuation_rules.punctuation import Punctuation
+
+
+class TestManagedRule(TestCase):
+
+    def setUp(self):
+        self.managed_rule = ManagedRule(Punctuation, RuleDetails(name="punctuation"))
+
+    def test_prototype_instantiated_once(self):
+        count = ManagedRule.get_instantiation_count()
+        prototype = self.managed_rule.get_prototype()
+        self.assertIs(prototype, self.managed_rule.get_prototype())
+        self.managed_rule.get_rule_instance()
+        self.managed_rule.get_rule_instance()
+        self.assertEqual(count + 1, ManagedRule.get_instantiation_count())
+
+    def test_instances_are_copies(self):
+        prototype = self.managed_rule.get_prototype()
+        instance = self.managed_rule.get_rule_instance()
+        self.assertIsNot(prototype, instance)
+        self.assertIsInstance(instance, Punctuation)
+        self.assertEqual(prototype._mapping, instance._mapping)
+
+        # changing a copy doesn't change the prototype or other copies
+        instance._mapping["some new spec"] = None
+        instance._defaults["some new default"] = 1
+        self.assertNotIn("some new spec", prototype._mapping)
+        self.assertNotIn("some new spec", self.managed_rule.get_rule_instance()._mapping)
+        self.assertNotIn("some new default", prototype._defaults)
+
+    def test_instances_not_in_grammar(self):
+        instance = self.managed_rule.get_rule_instance()
+        self.assertIsNone(instance.grammar)
+        self.assertTrue(instance.enabled)
+
+    def test_invalidated_prototype_reinstantiated(self):
+        prototype = self.managed_rule.get_prototype()
+        self.managed_rule.invalidate_prototype()
+        self.assertIsNot(prototype, self.managed_rule.get_prototype())
+
+    def test_named_instance_constructed_with_name(self):
+        count = ManagedRule.get_instantiation_count()
+        instance = self.managed_rule.get_rule_instance("punctuation")
+        self.assertEqual("punctuation", instance.name)
+        self.assertEqual("Punctuation", self.managed_rule.get_prototype().name)
+        self.assertIsNot(instance, self.managed_rule.get_rule_instance("punctuation"))
+        self.assertEqual(count + 2, ManagedRule.get_instantiation_count())
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from castervoice.lib.ctrl.mgr import rule_formatter
+from castervoice.lib.merge.state.actions2 import NullAction
+
+
+class _Described(object):
+    def __init__(self):
+        self.rdescript = None
+
+
+class TestRuleFormatter(TestCase):
+
+    def setUp(self):
+        rule_formatter._RDESCRIPT_TEMPLATES.clear()
+
+    def test_rdescript_template(self):
+        action = _Described()
+        rule_formatter._set_rdescripts({"go to line <n> [<text>]": action}, "NavigationNonCCR")
+        self.assertEqual("Navigation: go to line <n> [<text>], %(n)s, %(text)s", action.rdescript)
+
+    def test_existing_rdescript_kept(self):
+        action = NullAction(rdescript="Custom")
+        rule_formatter._set_rdescripts({"spec": action}, "SomeRule")
+        self.assertEqual("Custom", action.rdescript)
+
+    def test_template_reused_for_new_actions(self):
+        first, second = _Described(), _Described()
+        rule_formatter._set_rdescripts({"spec <n>": first}, "SomeRule")
+        # e.g. the rule was reloaded
+        rule_formatter._set_rdescripts({"spec <n>": second}, "SomeRule")
+        self.assertIs(first.rdescript, second.rdescript)
+        self.assertEqual({"SomeRule": {"spec <n>": first.rdescript}}, rule_formatter._RDESCRIPT_TEMPLATES)
+
+    def test_old_specs_dropped_on_reload(self):
+        rule_formatter._register_rdescripts({"old spec": _Described(), "kept spec": _Described()}, "SomeRule")
+        # e.g. the rule was reloaded after a spec was changed
+        rule_formatter._register_rdescripts({"new spec": _Described(), "kept spec": _Described()}, "SomeRule")
+        self.assertEqual({"new spec", "kept spec"}, set(rule_formatter._RDESCRIPT_TEMPLATES["SomeRule"]))
+
+    def test_instances_dont_prune(self):
+        rule_formatter._register_rdescripts({"one spec": _Described(), "other spec": _Described()}, "SomeRule")
+        # e.g. an instance of the rule with only some of its specs
+        rule_formatter._set_rdescripts({"one spec": _Described()}, "SomeRule")
+        self.assertEqual({"one spec", "other spec"}, set(rule_formatter._RDESCRIPT_TEMPLATES["SomeRule"]))
+
+    def test_forget(self):
+        rule_formatter._register_rdescripts({"spec": _Described()}, "SomeRule")
+        rule_formatter._forget_rdescripts("SomeRule")
+        self.assertNotIn("SomeRule", rule_formatter._RDESCRIPT_TEMPLATES)
+
+    def test_merged_rules_not_added(self):
+        from castervoice.lib.merge.mergerule import MergeRule
+
+        class SomeRule(MergeRule):
+            mapping = {"spec": NullAction(rdescript=None)}
+
+        class OtherRule(MergeRule):
+            mapping = {"other spec": NullAction(rdescript=None)}
+
+        SomeRule().merge(OtherRule())
+        self.assertEqual({"SomeRule", "OtherRule"}, set(rule_formatter._RDESCRIPT_TEMPLATES))
+
+    def test_templates_per_rule_class(self):
+        first, second = _Described(), _Described()
+        rule_formatter._set_rdescripts({"spec": first}, "OneRule")
+        rule_formatter._set_rdescripts({"spec": second}, "TwoRule")
+        self.assertEqual(("One: spec", "Two: spec"), (first.rdescript, second.rdescript))
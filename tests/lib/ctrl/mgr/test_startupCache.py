@@ -0,0 +1,165 @@
+from mock import Mock, patch
+
+from castervoice.lib.const import CCRType
+from castervoice.lib.ctrl.mgr.loading.reload.base_reload_observable import BaseReloadObservable
+from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.lib.ctrl.mgr.startup_cache import StartupCache
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.ccrmerging2.sorting.config_ruleset_sorter import ConfigBasedRuleSetSorter
+from castervoice.lib.merge.ccrmerging2.transformers.transformers_runner import TransformersRunner
+from castervoice.rules.apps.editor.eclipse_rules.eclipse import EclipseCCR
+from castervoice.rules.ccr.java_rules.java import Java
+from castervoice.rules.ccr.python_rules.python import Python
+from castervoice.rules.core.alphabet_rules.alphabet import Alphabet
+from castervoice.rules.core.navigation_rules.nav import Navigation
+from tests.lib.merge.ccrmerging2 import test_incrementalCCRMerger2
+from tests.test_util import utilities_mocking
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+
+
+class TestStartupCache(SettingsEnabledTestCase):
+
+    _CACHE_PATH = "/mock/startup_cache.json"
+    _ORDER = ["Alphabet", "Navigation", "Java", "Python", "EclipseCCR"]
+
+    def setUp(self):
+        utilities_mocking.mock_toml_files()
+        self._set_setting(["miscellaneous", "max_ccr_repetitions"], "4")
+
+    def _create_cache(self):
+        cache = StartupCache(TestStartupCache._CACHE_PATH)
+        cache.load()
+        return cache
+
+    def _restart(self, cache):
+        cache.save()
+        return self._create_cache()
+
+    def test_validation_remembered_across_restart(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        self.assertEqual((False, None), cache.get_invalidation(Alphabet, details))
+        cache.put_invalidation(Alphabet, details, "some invalidation")
+
+        cache = self._restart(cache)
+        self.assertEqual((True, "some invalidation"), cache.get_invalidation(Alphabet, details))
+        self.assertEqual(1, cache.hits)
+
+    def test_valid_rule_remembered_as_none(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+
+        cache = self._restart(cache)
+        self.assertEqual((True, None), cache.get_invalidation(Alphabet, details))
+
+    def test_changed_file_not_found(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+
+        cache = self._restart(cache)
+        with patch.object(BaseReloadObservable, "_get_stat_of_file", return_value=(1.5, 2)):
+            self.assertEqual((False, None), cache.get_invalidation(Alphabet, details))
+        self.assertEqual(1, cache.misses)
+
+    def test_rule_file_not_read(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+        cache.put_trigger("Alphabet", details.get_filepath(), "alphabet")
+
+        cache = self._restart(cache)
+        with patch.object(BaseReloadObservable, "_get_hash_of_file") as hash_fn:
+            self.assertEqual((True, None), cache.get_invalidation(Alphabet, details))
+            self.assertEqual("alphabet", cache.get_trigger("Alphabet", details.get_filepath()))
+        self.assertEqual(0, hash_fn.call_count)
+
+    def test_watch_excluded_rule_not_cached(self):
+        details = RuleDetails(name="alphabet", watch_exclusion=True)
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+        self.assertEqual((False, None), cache.get_invalidation(Alphabet, details))
+
+    def test_changed_environment_discards_cache(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+        cache.save()
+
+        self._set_setting(["miscellaneous", "max_ccr_repetitions"], "5")
+        cache = self._create_cache()
+        self.assertEqual((False, None), cache.get_invalidation(Alphabet, details))
+
+    def test_unused_entries_dropped_on_save(self):
+        alphabet_details = RuleDetails(name="alphabet")
+        navigation_details = RuleDetails(name="navigation")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, alphabet_details, None)
+        cache.put_invalidation(Navigation, navigation_details, None)
+
+        cache = self._restart(cache)
+        cache.get_invalidation(Alphabet, alphabet_details)
+        cache = self._restart(cache)
+        self.assertEqual((True, None), cache.get_invalidation(Alphabet, alphabet_details))
+        self.assertEqual((False, None), cache.get_invalidation(Navigation, navigation_details))
+
+    def _merge(self, cache, enabled):
+        merger = CCRMerger2(TransformersRunner(Mock()), SimpleCompatibilityChecker(),
+                            Mock(wraps=ClassicMergingStrategy()), 4, Mock(), cache)
+        ordered = [rcn for rcn in TestStartupCache._ORDER if rcn in enabled]
+        rule_classes = {"Alphabet": Alphabet, "Navigation": Navigation, "Java": Java, "Python": Python}
+        managed_rules = [ManagedRule(rule_classes[rcn], RuleDetails(ccrtype=CCRType.GLOBAL))
+                         for rcn in ordered if rcn in rule_classes]
+        if "EclipseCCR" in ordered:
+            managed_rules.append(ManagedRule(EclipseCCR, RuleDetails(ccrtype=CCRType.APP, executable="eclipse")))
+        result = merger.merge_rules(managed_rules, ConfigBasedRuleSetSorter(ordered))
+        return result, merger._merging_strategy.merge_into_single.call_count
+
+    def test_warm_merge_same_as_cold_merge(self):
+        """
+        Includes a knockout (Java/Python) and an app rule.
+        """
+        enabled = ["Alphabet", "Navigation", "Java", "Python", "EclipseCCR"]
+        cache = self._create_cache()
+        cold_result, cold_strategy_merges = self._merge(cache, enabled)
+        self.assertEqual(2, cold_strategy_merges)
+
+        cache = self._restart(cache)
+        warm_result, warm_strategy_merges = self._merge(cache, enabled)
+        self.assertEqual(0, warm_strategy_merges)
+        describe = test_incrementalCCRMerger2.TestIncrementalCCRMerger2._describe
+        self.assertEqual(describe(cold_result), describe(warm_result))
+
+    def test_different_rule_set_merged_normally(self):
+        cache = self._create_cache()
+        self._merge(cache, ["Alphabet", "Navigation"])
+
+        cache = self._restart(cache)
+        _, strategy_merges = self._merge(cache, ["Alphabet", "Java"])
+        self.assertEqual(1, strategy_merges)
+
+    def test_dropped_validation_not_found(self):
+        details = RuleDetails(name="alphabet")
+        cache = self._create_cache()
+        cache.put_invalidation(Alphabet, details, None)
+        cache.drop_invalidation(Alphabet, details)
+
+        cache = self._restart(cache)
+        self.assertEqual((False, None), cache.get_invalidation(Alphabet, details))
+
+    def test_save_changes_only_saves_after_put(self):
+        cache = self._create_cache()
+        cache.save()
+        with patch.object(cache, "save", wraps=cache.save) as save:
+            cache.get_merge_layout("some key")
+            cache.save_changes()
+            self.assertEqual(0, save.call_count)
+
+            cache.put_merge_layout("some key", {})
+            cache.save_changes()
+            cache.save_changes()
+            self.assertEqual(1, save.call_count)
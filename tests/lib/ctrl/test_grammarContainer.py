@@ -10,14 +10,22 @@ class _FakeRule(object):
 
 
 class _FakeGrammar(object):
-    def __init__(self):
-        self.rules = []
+    def __init__(self, *rules):
+        self.rules = list(rules)
+        self._context = None
 
     def disable(self): pass
 
+    def load(self): pass
+
     def unload(self): pass
 
 
+class _FakeRepeatRule(_FakeRule):
+    def __init__(self, content_key):
+        self.content_key = content_key
+
+
 class TestGrammarContainer(TestCase):
 
     def setUp(self):
@@ -75,3 +83,54 @@ class TestGrammarContainer(TestCase):
         gc.set_ccr = Mock()
         gc.wipe_ccr()
         gc.set_ccr.assert_called_with([])
+
+    def _create_ccr_grammars(self, *content_keys):
+        grammars = [_FakeGrammar(_FakeRepeatRule(content_key)) for content_key in content_keys]
+        for grammar in grammars:
+            grammar.load = Mock()
+            grammar.unload = Mock()
+        return grammars
+
+    def test_set_ccr_keeps_same_content(self):
+        gc = BasicGrammarContainer()
+        first = self._create_ccr_grammars("global", "eclipse", "vscode")
+        gc.set_ccr(first)
+        second = self._create_ccr_grammars("global", "eclipse changed", "vscode")
+        gc.set_ccr(second)
+
+        self.assertEqual([first[0], second[1], first[2]], gc._ccr_grammars)
+        first[1].unload.assert_called_with()
+        second[1].load.assert_called_with()
+        first[0].unload.assert_not_called()
+        second[0].load.assert_not_called()
+        self.assertEqual((1, 1, 2), (gc.last_ccr_loads, gc.last_ccr_unloads, gc.last_ccr_reuses))
+        self.assertEqual((4, 1), (gc.ccr_loads, gc.ccr_unloads))
+
+    def test_kept_grammar_takes_new_context(self):
+        gc = BasicGrammarContainer()
+        first = self._create_ccr_grammars("global")
+        first[0]._context = Mock(__str__=lambda context: "none of eclipse")
+        gc.set_ccr(first)
+        second = self._create_ccr_grammars("global")
+        second[0]._context = Mock(__str__=lambda context: "none of eclipse")
+        gc.set_ccr(second)
+
+        self.assertEqual([first[0]], gc._ccr_grammars)
+        self.assertIs(second[0]._context, first[0]._context)
+
+    def test_set_ccr_different_context_not_kept(self):
+        gc = BasicGrammarContainer()
+        first = self._create_ccr_grammars("global")
+        gc.set_ccr(first)
+        second = self._create_ccr_grammars("global")
+        second[0]._context = "eclipse"
+        gc.set_ccr(second)
+
+        first[0].unload.assert_called_with()
+        second[0].load.assert_called_with()
+
+    def test_set_ccr_without_content_key_not_kept(self):
+        gc = BasicGrammarContainer()
+        gc.set_ccr([self.grammar])
+        gc.set_ccr([self.grammar])
+        self.assertEqual((1, 1, 0), (gc.last_ccr_loads, gc.last_ccr_unloads, gc.last_ccr_reuses))
@@ -30,3 +30,9 @@ class TestSimpleCompatibilityChecker(TestCase):
         results = self._compat_checker.compatibility_check(rules)
         self.assertIs(b, results[0].rule())
         self.assertIs(a, results[1].rule())
+
+    def test_ko_report(self):
+        self._compat_checker.compatibility_check([FakeRuleOne(), FakeRuleTwo(), FakeRuleThree()])
+        self.assertEqual({"FakeRuleOne": {"FakeRuleTwo"}}, self._compat_checker.get_ko_report())
+        self._compat_checker.compatibility_check([FakeRuleOne(), FakeRuleThree()])
+        self.assertEqual({}, self._compat_checker.get_ko_report())
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from dragonfly import ShortIntegerRef
+
+from castervoice.lib.merge.ccrmerging2.compatibility.detail_compat_checker import DetailCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_conflict_index import SpecConflictIndex
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_expander import SpecExpander
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+from tests.lib.merge.ccrmerging2.fake_rules import FakeRuleOne, FakeRuleTwo, FakeRuleThree
+
+
+class _GoToLine(MergeRule):
+    mapping = {"go [to] line <n>": NullAction()}
+    extras = [ShortIntegerRef("n", 1, 100)]
+
+
+class _GoLine(MergeRule):
+    mapping = {"go to line <n>": NullAction()}
+    extras = [ShortIntegerRef("n", 1, 100)]
+
+
+class _GoToFile(MergeRule):
+    mapping = {"go [to] file": NullAction()}
+
+
+class TestSpecConflictIndex(TestCase):
+
+    def setUp(self):
+        self.index = SpecConflictIndex()
+        self.one = FakeRuleOne()
+        self.two = FakeRuleTwo()
+        self.three = FakeRuleThree()
+        self.index.update([self.one, self.two, self.three])
+
+    def test_conflicts(self):
+        self.assertEqual({"FakeRuleTwo"}, self.index.get_conflicts("FakeRuleOne"))
+        self.assertEqual({"FakeRuleOne"}, self.index.get_conflicts("FakeRuleTwo"))
+        self.assertEqual(set(), self.index.get_conflicts("FakeRuleThree"))
+        self.assertEqual(["a", "b"], self.index.get_shared_specs("FakeRuleOne", "FakeRuleTwo"))
+
+    def test_conflicts_among(self):
+        self.assertEqual(set(), self.index.get_conflicts("FakeRuleOne", {"FakeRuleOne", "FakeRuleThree"}))
+
+    def test_same_rules_not_reindexed(self):
+        self.index.update([self.one, self.two])
+        self.assertEqual(3, self.index.indexed_rule_count)
+        self.index.update([FakeRuleOne()])
+        self.assertEqual(4, self.index.indexed_rule_count)
+        self.assertEqual({"FakeRuleTwo"}, self.index.get_conflicts("FakeRuleOne"))
+
+    def test_remove(self):
+        self.index.remove("FakeRuleTwo")
+        self.assertEqual(set(), self.index.get_conflicts("FakeRuleOne"))
+        self.assertEqual([], self.index.get_shared_specs("FakeRuleOne", "FakeRuleTwo"))
+
+    def test_shared_between_checkers(self):
+        simple_checker = SimpleCompatibilityChecker(self.index)
+        detail_checker = DetailCompatibilityChecker(self.index)
+        simple_checker.compatibility_check([self.one, self.two, self.three])
+        detail_checker.compatibility_check([self.one, self.two, self.three])
+
+        self.assertEqual(3, self.index.indexed_rule_count)
+        self.assertEqual({"FakeRuleOne": {"FakeRuleTwo"}}, simple_checker.get_ko_report())
+        self.assertEqual({"FakeRuleOne": {"FakeRuleTwo"}, "FakeRuleTwo": {"FakeRuleOne"}},
+                         detail_checker.get_ko_report())
+
+    def test_expanded_specs_conflict(self):
+        index = SpecConflictIndex(SpecExpander())
+        index.update([_GoToLine(), _GoLine(), _GoToFile()])
+        self.assertEqual({"_GoLine"}, index.get_conflicts("_GoToLine"))
+        self.assertEqual(["go to line <n>"], index.get_shared_specs("_GoToLine", "_GoLine"))
+        self.assertEqual(set(), index.get_conflicts("_GoToFile"))
+
+        exact_index = SpecConflictIndex()
+        exact_index.update([_GoToLine(), _GoLine()])
+        self.assertEqual(set(), exact_index.get_conflicts("_GoToLine"))
+
+    def test_description(self):
+        self.assertEqual("exact", self.index.get_description())
+        self.assertEqual("expanded:8", SpecConflictIndex(SpecExpander(8)).get_description())
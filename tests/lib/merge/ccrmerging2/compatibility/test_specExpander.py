@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_expander import SpecExpander
+
+
+class TestSpecExpander(TestCase):
+
+    def setUp(self):
+        self.expander = SpecExpander(max_expansions=16)
+
+    def test_plain_spec(self):
+        self.assertEqual({"go to line <n>"}, self.expander.expand("go  to line <n>"))
+
+    def test_optional(self):
+        self.assertEqual({"go line <n>", "go to line <n>"}, self.expander.expand("go [to] line <n>"))
+
+    def test_alternatives(self):
+        self.assertEqual({"page up", "page down", "page up <n>", "page down <n>"},
+                         self.expander.expand("page (up | down) [<n>]"))
+
+    def test_top_level_alternatives(self):
+        self.assertEqual({"undo", "scratch that"}, self.expander.expand("undo | scratch that"))
+
+    def test_nested(self):
+        self.assertEqual({"x {list}", "a x {list}", "b c x {list}"}, self.expander.expand("[(a | b c)] x {list}"))
+
+    def test_too_many_expansions_not_expanded(self):
+        spec = "[a] [b] [c] [d] [e]"
+        self.assertEqual({spec}, self.expander.expand(spec))
+        self.assertIn(spec, self.expander.unexpanded_specs)
+
+    def test_unbalanced_not_expanded(self):
+        self.assertEqual({"go [to line"}, self.expander.expand("go [to line"))
+        self.assertIn("go [to line", self.expander.unexpanded_specs)
+
+    def test_trailing_tokens_not_expanded(self):
+        self.assertEqual({"a ) b"}, self.expander.expand("a ) b"))
+        self.assertIn("a ) b", self.expander.unexpanded_specs)
+
+    def test_untokenizable_not_expanded(self):
+        self.assertEqual({"a > b"}, self.expander.expand("a > b"))
+        self.assertIn("a > b", self.expander.unexpanded_specs)
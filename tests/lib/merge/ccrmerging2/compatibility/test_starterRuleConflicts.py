@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+from castervoice.lib.merge.ccrmerging2.compatibility.detail_compat_checker import DetailCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_conflict_index import SpecConflictIndex
+from castervoice.lib.merge.ccrmerging2.compatibility.spec_expander import SpecExpander
+from tests.test_util import utilities_mocking
+
+
+class TestStarterRuleConflicts(TestCase):
+    """
+    Expanded spec conflicts over the CCR rules which ship with Caster.
+    """
+
+    @staticmethod
+    def _starter_rules():
+        from castervoice.rules.apps.editor.eclipse_rules import eclipse
+        from castervoice.rules.apps.editor.vscode_rules import vscode
+        from castervoice.rules.ccr.bash_rules import bash
+        from castervoice.rules.ccr.cpp_rules import cpp
+        from castervoice.rules.ccr.csharp_rules import csharp
+        from castervoice.rules.ccr.dart_rules import dart
+        from castervoice.rules.ccr.go_rules import go
+        from castervoice.rules.ccr.haxe_rules import haxe
+        from castervoice.rules.ccr.html_rules import html_rule
+        from castervoice.rules.ccr.java_rules import java
+        from castervoice.rules.ccr.javascript_rules import javascript
+        from castervoice.rules.ccr.latex_rules import latex
+        from castervoice.rules.ccr.markdown_rules import markdown
+        from castervoice.rules.ccr.matlab_rules import matlab
+        from castervoice.rules.ccr.prolog_rules import prolog
+        from castervoice.rules.ccr.python_rules import python
+        from castervoice.rules.ccr.r_rules import r
+        from castervoice.rules.ccr.rust_rules import rust
+        from castervoice.rules.ccr.sql_rules import sql
+        from castervoice.rules.ccr.vhdl_rules import vhdl
+        from castervoice.rules.core.alphabet_rules import alphabet
+        from castervoice.rules.core.navigation_rules import nav
+        from castervoice.rules.core.numbers_rules import numeric
+        from castervoice.rules.core.punctuation_rules import punctuation
+        from castervoice.rules.core.text_manipulation_rules import text_manipulation
+        modules = [eclipse, vscode, bash, cpp, csharp, dart, go, haxe, html_rule, java, javascript, latex,
+                   markdown, matlab, prolog, python, r, rust, sql, vhdl,
+                   alphabet, nav, numeric, punctuation, text_manipulation]
+        return [module.get_rule()[0]() for module in modules]
+
+    @classmethod
+    def setUpClass(cls):
+        utilities_mocking.mock_toml_files()
+        cls.rules = TestStarterRuleConflicts._starter_rules()
+
+    def setUp(self):
+        self.expander = SpecExpander()
+        self.expanded_index = SpecConflictIndex(self.expander)
+        self.expanded_index.update(self.rules)
+        self.exact_index = SpecConflictIndex()
+        self.exact_index.update(self.rules)
+
+    def test_all_specs_expanded(self):
+        self.assertEqual(set(), self.expander.unexpanded_specs)
+
+    def test_expanded_conflicts_include_exact_conflicts(self):
+        for rule in self.rules:
+            rcn = rule.get_rule_class_name()
+            self.assertTrue(self.exact_index.get_conflicts(rcn) <= self.expanded_index.get_conflicts(rcn), rcn)
+
+    def test_finds_conflicts_between_differently_written_specs(self):
+        self.assertNotIn("EclipseCCR", self.exact_index.get_conflicts("Navigation"))
+        self.assertIn("EclipseCCR", self.expanded_index.get_conflicts("Navigation"))
+        self.assertIn("jump back", self.expanded_index.get_shared_specs("Navigation", "EclipseCCR"))
+
+    def test_reindexing_one_rule_costs_only_its_expansions(self):
+        rules = list(self.rules)
+        for index, rule in enumerate(self.rules):
+            expansions = set(expansion for spec in rule.get_mapping() for expansion in self.expander.expand(spec))
+            before = self.expanded_index.indexed_spec_count
+            # as a reload of the rule's file would
+            rules[index] = type(rule)()
+            self.expanded_index.update(rules)
+            self.assertEqual(len(expansions), self.expanded_index.indexed_spec_count - before,
+                             rule.get_rule_class_name())
+
+    def test_toggling_one_rule_only_indexes_that_rule(self):
+        checker = DetailCompatibilityChecker(self.expanded_index)
+        indexed = self.expanded_index.indexed_rule_count
+        checker.compatibility_check(self.rules[1:])
+        checker.compatibility_check(self.rules)
+        self.assertEqual(indexed, self.expanded_index.indexed_rule_count)
+
+        replaced = [type(self.rules[0])()] + self.rules[1:]
+        checker.compatibility_check(replaced)
+        self.assertEqual(indexed + 1, self.expanded_index.indexed_rule_count)
+        self.assertIn("Navigation", checker.get_ko_report()["EclipseCCR"])
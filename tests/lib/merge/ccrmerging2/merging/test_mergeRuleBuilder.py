@@ -0,0 +1,94 @@
+from unittest import TestCase
+
+from dragonfly import ShortIntegerRef
+from mock import patch
+
+from castervoice.lib.merge.ccrmerging2.compatibility.compat_result import CompatibilityResult
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.ccrmerging2.merging.merge_rule_builder import MergeRuleBuilder
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+
+
+class _TestRuleA(MergeRule):
+    mapping = {
+        "hello [<n>]": NullAction(),
+        "alpha": NullAction()
+    }
+    extras = [ShortIntegerRef("n", 1, 10)]
+    defaults = {"n": 1}
+
+
+class _TestRuleB(MergeRule):
+    mapping = {
+        "hello [<n>]": NullAction(),
+        "bravo": NullAction()
+    }
+    extras = [ShortIntegerRef("n", 1, 50)]
+    defaults = {"n": 2}
+
+
+class _TestRuleC(MergeRule):
+    mapping = {
+        "charlie": NullAction()
+    }
+
+
+class TestMergeRuleBuilder(TestCase):
+
+    @staticmethod
+    def _describe(rule):
+        return (sorted((spec, id(action)) for spec, action in rule.get_mapping().items()),
+                [(extra.name, id(extra)) for extra in rule.get_extras()],
+                rule.get_defaults())
+
+    def test_same_as_merging_one_by_one(self):
+        rules = [_TestRuleA(), _TestRuleB(), _TestRuleC()]
+        chained = rules[0].merge(rules[1]).merge(rules[2])
+        built = MergeRuleBuilder.from_rules(rules).build()
+        self.assertEqual(self._describe(chained), self._describe(built))
+        self.assertIs(rules[1].get_mapping()["hello [<n>]"], built.get_mapping()["hello [<n>]"])
+
+    def test_no_rules(self):
+        self.assertIsNone(MergeRuleBuilder().build())
+
+    def test_single_rule_not_rebuilt(self):
+        rule = _TestRuleA()
+        self.assertIs(rule, MergeRuleBuilder().add(rule).build())
+
+    def test_base_reused_for_prefix(self):
+        a, b, c = _TestRuleA(), _TestRuleB(), _TestRuleC()
+        base = MergeRuleBuilder.from_rules([a, b])
+        with patch.object(MergeRuleBuilder, "add", autospec=True, side_effect=MergeRuleBuilder.add) as add:
+            built = MergeRuleBuilder.from_rules([a, b, c], base).build()
+        self.assertEqual(1, add.call_count)
+        self.assertEqual(self._describe(a.merge(b).merge(c)), self._describe(built))
+        self.assertNotIn("charlie", base.build().get_mapping())
+
+    def test_base_not_reused_for_other_rules(self):
+        a, b, c = _TestRuleA(), _TestRuleB(), _TestRuleC()
+        base = MergeRuleBuilder.from_rules([a, b])
+        self.assertFalse(base.is_prefix_of([a, _TestRuleB(), c]))
+        self.assertFalse(base.is_prefix_of([a]))
+        built = MergeRuleBuilder.from_rules([b, c], base).build()
+        self.assertNotIn("alpha", built.get_mapping())
+
+    def test_strategy_shares_global_rules_between_app_rules(self):
+        strategy = ClassicMergingStrategy()
+        a, b, c = _TestRuleA(), _TestRuleC(), _TestRuleB()
+        global_crs = [CompatibilityResult(a, set()), CompatibilityResult(b, set())]
+        strategy.merge_into_single(global_crs)
+
+        app_cr = CompatibilityResult(c, set())
+        with patch.object(MergeRuleBuilder, "add", autospec=True, side_effect=MergeRuleBuilder.add) as add:
+            merged_rule = strategy.merge_into_single(global_crs + [app_cr])
+        self.assertEqual(1, add.call_count)
+        self.assertEqual(self._describe(a.merge(b).merge(c)), self._describe(merged_rule))
+
+    def test_strategy_ko_by_app_rule_not_shared(self):
+        strategy = ClassicMergingStrategy()
+        a, b = _TestRuleA(), _TestRuleB()
+        strategy.merge_into_single([CompatibilityResult(a, set())])
+        merged_rule = strategy.merge_into_single([CompatibilityResult(a, {"_TestRuleB"}),
+                                                  CompatibilityResult(b, {"_TestRuleA"})])
+        self.assertIs(b, merged_rule)
@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from dragonfly import AppContext, Context
+from mock import patch
+
+from castervoice.lib.context import ForegroundContextCache
+from castervoice.lib.merge.ccrmerging2.ccr_context_index import CCRContextIndex
+
+
+class _SwitchContext(Context):
+    """
+    Like a FuncContext: doesn't depend on the window.
+    """
+
+    def __init__(self):
+        super(_SwitchContext, self).__init__()
+        self.enabled = False
+
+    def matches(self, executable, title, handle):
+        return self.enabled
+
+
+class TestCCRContextIndex(TestCase):
+
+    _WINDOWS = [("C:\\Program Files\\eclipse\\eclipse.exe", "Java - Eclipse"),
+                ("/usr/bin/code", "main.py - Visual Studio Code"),
+                ("/usr/bin/firefox", "Eclipse Downloads - Mozilla Firefox"),
+                ("/usr/bin/gedit", "notes.txt")]
+
+    def setUp(self):
+        self.app_contexts = [AppContext(executable="eclipse"),
+                             AppContext(executable="code"),
+                             AppContext(title="eclipse downloads")]
+        self.cache = ForegroundContextCache()
+        self.index = CCRContextIndex(self.app_contexts, self.cache)
+        self.contexts = self.index.create_contexts()
+
+    def _matches(self, contexts, window):
+        return [context.matches(window[0], window[1], 1) for context in contexts]
+
+    def test_same_as_negation_context(self):
+        negation_context = ~self.app_contexts[0] & ~self.app_contexts[1] & ~self.app_contexts[2]
+        for window in TestCCRContextIndex._WINDOWS:
+            self.assertEqual(self._matches([negation_context] + self.app_contexts, window),
+                             self._matches(self.contexts, window))
+
+    def test_app_contexts_matched_once_per_window(self):
+        with patch.object(AppContext, "matches", autospec=True, side_effect=AppContext.matches) as matches:
+            for _ in range(3):
+                self._matches(self.contexts, TestCCRContextIndex._WINDOWS[0])
+            self.assertEqual(3, matches.call_count)
+            self._matches(self.contexts, TestCCRContextIndex._WINDOWS[1])
+            self.assertEqual(6, matches.call_count)
+        self.assertEqual(6, self.cache.misses)
+
+    def test_shares_cache_with_grammar_contexts(self):
+        grammar_context = self.cache.cached(self.app_contexts[1])
+        with patch.object(AppContext, "matches", autospec=True, side_effect=AppContext.matches) as matches:
+            self._matches(self.contexts, TestCCRContextIndex._WINDOWS[1])
+            self.assertTrue(grammar_context.matches(TestCCRContextIndex._WINDOWS[1][0],
+                                                    TestCCRContextIndex._WINDOWS[1][1], 1))
+            self.assertEqual(3, matches.call_count)
+
+    def test_other_contexts_matched_every_time(self):
+        switch_context = _SwitchContext()
+        index = CCRContextIndex([AppContext(executable="code"), switch_context], ForegroundContextCache())
+        contexts = index.create_contexts()
+        window = TestCCRContextIndex._WINDOWS[3]
+        self.assertEqual([True, False, False], self._matches(contexts, window))
+        switch_context.enabled = True
+        self.assertEqual([False, False, True], self._matches(contexts, window))
@@ -1,4 +1,4 @@
-from dragonfly.grammar.context import LogicNotContext, Context, LogicAndContext
+from dragonfly import Function, Grammar, get_engine
 from mock import Mock
 from castervoice.lib.context import AppContext
 from castervoice.rules.apps.editor.eclipse_rules.eclipse import EclipseCCR
@@ -9,13 +9,29 @@ from castervoice.lib.const import CCRType
 from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
 from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
 from castervoice.lib.ctrl.nexus import Nexus
+from castervoice.lib.merge.ccrmerging2.ccr_context_index import IndexedCCRContext
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.compatibility.detail_compat_checker import DetailCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
 from castervoice.lib.merge.ccrmerging2.sorting.config_ruleset_sorter import ConfigBasedRuleSetSorter
 from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.text_replacer import TextReplacerTransformer
 from castervoice.lib.merge.ccrmerging2.transformers.transformers_runner import TransformersRunner
+from castervoice.lib.merge.mergerule import MergeRule
 from tests.lib.merge.ccrmerging2.fake_rules import FakeRuleOne, FakeRuleTwo
 from tests.lib.merge.ccrmerging2.transformers.text_replacer import mock_TRParser
 from tests.test_util.settings_mocking import SettingsEnabledTestCase
 
+_SPOKEN = []
+
+
+class _SharedGlobalRule(MergeRule):
+    mapping = {"shared global": Function(lambda: _SPOKEN.append("global"))}
+
+
+class _SharedAppRule(MergeRule):
+    mapping = {"shared app": Function(lambda: _SPOKEN.append("app"))}
+
 
 class TestCCRMerger2(SettingsEnabledTestCase):
 
@@ -85,8 +101,8 @@ class TestCCRMerger2(SettingsEnabledTestCase):
     def test_merge_one_context_one_no_context(self):
         """
         One contexted CCR rule and one non-contexted mergerule should result in two
-        RepeatRules, the contexted one with a Context aligned with it and the non-contexted
-        one with a LogicNotContext aligned with it.
+        RepeatRules, the contexted one with a context matching its AppContext aligned with it
+        and the non-contexted one with a context matching when that one doesn't aligned with it.
         """
         eclipse_mr = TestCCRMerger2._create_managed_rule(EclipseCCR, CCRType.APP, "eclipse")
         navigation_mr = TestCCRMerger2._create_managed_rule(Navigation, CCRType.GLOBAL)
@@ -95,8 +111,9 @@ class TestCCRMerger2(SettingsEnabledTestCase):
         self.assertEqual(2, len(result.ccr_rules_and_contexts))
         self.assertEqual("RepeatRule", result.ccr_rules_and_contexts[0][0].__class__.__name__)
         self.assertEqual("RepeatRule", result.ccr_rules_and_contexts[1][0].__class__.__name__)
-        self.assertIsInstance(result.ccr_rules_and_contexts[0][1], LogicNotContext)
-        self.assertIsInstance(result.ccr_rules_and_contexts[1][1], Context)
+        self.assertIsInstance(result.ccr_rules_and_contexts[0][1], IndexedCCRContext)
+        self.assertIsNone(result.ccr_rules_and_contexts[0][1].get_app_context())
+        self.assertIsInstance(result.ccr_rules_and_contexts[1][1].get_app_context(), AppContext)
 
     def test_words_txt_transformer(self):
         """
@@ -137,7 +154,109 @@ class TestCCRMerger2(SettingsEnabledTestCase):
         self.assertEqual("RepeatRule", repeat_rule_1.__class__.__name__)
         self.assertEqual("RepeatRule", repeat_rule_2.__class__.__name__)
         self.assertEqual("RepeatRule", repeat_rule_3.__class__.__name__)
-        self.assertIsInstance(context_1, LogicAndContext)
-        self.assertIsInstance(context_2, AppContext)
-        self.assertIsInstance(context_3, AppContext)
+        self.assertIsNone(context_1.get_app_context())
+        self.assertIsInstance(context_2.get_app_context(), AppContext)
+        self.assertIsInstance(context_3.get_app_context(), AppContext)
         # TODO: write a similar unit test to check the executables/titles validity of the contexts produced
+
+    def _create_sharing_merger(self, compatibility_checker=None):
+        compatibility_checker = compatibility_checker or SimpleCompatibilityChecker()
+        return CCRMerger2(self.transformers_runner, compatibility_checker, ClassicMergingStrategy(), 4,
+                          self.selfmodrule_configurer, share_global_rule=True)
+
+    def test_shared_global_rule(self):
+        """
+        With share_global_rule, every repeat rule refers to the same merged global rule,
+        the app repeat rules only add their own app rule, and the repeat rules have the contexts.
+        """
+        alphabet_mr = TestCCRMerger2._create_managed_rule(Alphabet, CCRType.GLOBAL)
+        eclipse_app_mr = TestCCRMerger2._create_managed_rule(EclipseCCR, CCRType.APP, "eclipse")
+        vscode_app_mr = TestCCRMerger2._create_managed_rule(VSCodeCcrRule, CCRType.APP, "vscode")
+        result = self._create_sharing_merger().merge_rules([alphabet_mr, eclipse_app_mr, vscode_app_mr], self.sorter)
+
+        self.assertTrue(result.single_grammar)
+        self.assertEqual([None, None, None], [context for _, context in result.ccr_rules_and_contexts])
+        global_rule = self._extract_merged_rule_from_repeatrule(result.ccr_rules_and_contexts, 0)
+        self.assertIsNone(result.ccr_rules_and_contexts[0][0]._context.get_app_context())
+        self.assertFalse(global_rule.exported)
+        for index, app_rcn in ((1, "EclipseCCR"), (2, "VSCodeCcrRule")):
+            repeat_rule = result.ccr_rules_and_contexts[index][0]
+            self.assertIsInstance(repeat_rule._context.get_app_context(), AppContext)
+            refs = repeat_rule._extras["caster_base_sequence"]._child._children
+            self.assertIs(global_rule, refs[0]._rule)
+            self.assertNotIn("list available commands", refs[1]._rule._mapping)
+            self.assertNotIn("a", refs[1]._rule._mapping)  # alphabet's specs are only in the global rule
+
+    def test_shared_global_rule_app_rule_kos_global_rule(self):
+        """
+        An app rule which KOs a global rule gets its own fully merged rule.
+        """
+        sorter = ConfigBasedRuleSetSorter(["FakeRuleOne", "FakeRuleTwo"])
+        one_mr = TestCCRMerger2._create_managed_rule(FakeRuleOne, CCRType.GLOBAL)
+        two_mr = TestCCRMerger2._create_managed_rule(FakeRuleTwo, CCRType.APP, "two")
+        result = self._create_sharing_merger(DetailCompatibilityChecker()).merge_rules([one_mr, two_mr], sorter)
+
+        refs = result.ccr_rules_and_contexts[1][0]._extras["caster_base_sequence"]._child._children
+        self.assertEqual(1, len(refs))
+        self.assertIn("two exclusive", refs[0]._rule._mapping)
+        self.assertNotIn("one exclusive", refs[0]._rule._mapping)
+
+    def test_shared_global_rule_recognition(self):
+        """
+        In one grammar, the app's commands are only recognized in the app, the global ones everywhere.
+        """
+        sorter = ConfigBasedRuleSetSorter(["_SharedGlobalRule", "_SharedAppRule"])
+        global_mr = TestCCRMerger2._create_managed_rule(_SharedGlobalRule, CCRType.GLOBAL)
+        app_mr = TestCCRMerger2._create_managed_rule(_SharedAppRule, CCRType.APP, "shared")
+        result = self._create_sharing_merger().merge_rules([global_mr, app_mr], sorter)
+        grammar = Grammar("shared ccr")
+        for repeat_rule, _ in result.ccr_rules_and_contexts:
+            grammar.add_rule(repeat_rule)
+        grammar.load()
+        try:
+            del _SPOKEN[:]
+            get_engine().mimic("shared global shared app", executable="shared", title="")
+            get_engine().mimic("shared global", executable="other", title="")
+            self.assertEqual(["global", "app", "global"], _SPOKEN)
+            self.assertRaises(Exception, get_engine().mimic, "shared app", executable="other", title="")
+        finally:
+            grammar.unload()
+
+    def _load_segmented_repeat_rule(self, max_repetitions, segment_size):
+        merger = CCRMerger2(self.transformers_runner, SimpleCompatibilityChecker(), ClassicMergingStrategy(),
+                            max_repetitions, self.selfmodrule_configurer, repetition_segment_size=segment_size)
+        sorter = ConfigBasedRuleSetSorter(["_SharedGlobalRule", "_SharedAppRule"])
+        global_mr = TestCCRMerger2._create_managed_rule(_SharedGlobalRule, CCRType.GLOBAL)
+        app_mr = TestCCRMerger2._create_managed_rule(_SharedAppRule, CCRType.GLOBAL)
+        repeat_rule = merger.merge_rules([global_mr, app_mr], sorter).ccr_rules_and_contexts[0][0]
+        grammar = Grammar("segmented ccr {} {}".format(max_repetitions, segment_size))
+        grammar.add_rule(repeat_rule)
+        grammar.load()
+        return grammar, repeat_rule
+
+    def test_repetition_segments(self):
+        """
+        With segments, commands can be spoken in a row past the end of a segment.
+        """
+        grammar, repeat_rule = self._load_segmented_repeat_rule(9, 3)
+        try:
+            self.assertIn("RepeaterSegment", repeat_rule._extras["caster_base_sequence"]._child._rule.name)
+            del _SPOKEN[:]
+            get_engine().mimic(" ".join(["shared global", "shared app"] * 4) + " shared global")
+            self.assertEqual(["global", "app"] * 4 + ["global"], _SPOKEN)
+            self.assertRaises(Exception, get_engine().mimic, " ".join(["shared app"] * 10))
+        finally:
+            grammar.unload()
+
+    def test_repetition_segments_keep_max_repetitions(self):
+        """
+        Whatever the segment size, exactly as many commands can be spoken in a row as without segments.
+        """
+        for max_repetitions in (3, 8, 9, 10, 12, 16, 17, 24):
+            for segment_size in (0, 3, 4, 5, 8):
+                grammar, _ = self._load_segmented_repeat_rule(max_repetitions, segment_size)
+                try:
+                    get_engine().mimic(" ".join(["shared app"] * max_repetitions))
+                    self.assertRaises(Exception, get_engine().mimic, " ".join(["shared app"] * (max_repetitions + 1)))
+                finally:
+                    grammar.unload()
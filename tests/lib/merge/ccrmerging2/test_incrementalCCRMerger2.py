@@ -0,0 +1,178 @@
+from mock import Mock
+
+from dragonfly import Grammar
+
+from castervoice.lib.const import CCRType
+from castervoice.lib.ctrl.mgr.grammar_container.basic_grammar_container import BasicGrammarContainer
+from castervoice.lib.ctrl.mgr.managed_rule import ManagedRule
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.lib.merge.ccrmerging2.ccrmerger2 import CCRMerger2
+from castervoice.lib.merge.ccrmerging2.compatibility.simple_compat_checker import SimpleCompatibilityChecker
+from castervoice.lib.merge.ccrmerging2.incremental_ccrmerger2 import IncrementalCCRMerger2
+from castervoice.lib.merge.ccrmerging2.merging.classic_merging_strategy import ClassicMergingStrategy
+from castervoice.lib.merge.ccrmerging2.repeat_rule_cache import RepeatRuleCache
+from castervoice.lib.merge.ccrmerging2.sorting.config_ruleset_sorter import ConfigBasedRuleSetSorter
+from castervoice.lib.merge.ccrmerging2.transformers.transformers_runner import TransformersRunner
+from castervoice.rules.apps.editor.eclipse_rules.eclipse import EclipseCCR
+from castervoice.rules.apps.editor.vscode_rules.vscode import VSCodeCcrRule
+from castervoice.rules.ccr.java_rules.java import Java
+from castervoice.rules.ccr.python_rules.python import Python
+from castervoice.rules.core.alphabet_rules.alphabet import Alphabet
+from castervoice.rules.core.navigation_rules.nav import Navigation
+from castervoice.rules.core.punctuation_rules.punctuation import Punctuation
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+
+
+class _CountingManagedRule(ManagedRule):
+    def __init__(self, rule_class, details):
+        super(_CountingManagedRule, self).__init__(rule_class, details)
+        self.instantiations = 0
+
+    def get_rule_instance(self):
+        self.instantiations += 1
+        return super(_CountingManagedRule, self).get_rule_instance()
+
+
+class TestIncrementalCCRMerger2(SettingsEnabledTestCase):
+
+    _ORDER = ["Alphabet", "Navigation", "Punctuation", "Java", "Python", "EclipseCCR", "VSCodeCcrRule"]
+
+    def setUp(self):
+        self._set_setting(["miscellaneous", "max_ccr_repetitions"], "4")
+        self.managed_rules = {
+            "Alphabet": _CountingManagedRule(Alphabet, RuleDetails(ccrtype=CCRType.GLOBAL)),
+            "Navigation": _CountingManagedRule(Navigation, RuleDetails(ccrtype=CCRType.GLOBAL)),
+            "Punctuation": _CountingManagedRule(Punctuation, RuleDetails(ccrtype=CCRType.GLOBAL)),
+            "Java": _CountingManagedRule(Java, RuleDetails(ccrtype=CCRType.GLOBAL)),
+            "Python": _CountingManagedRule(Python, RuleDetails(ccrtype=CCRType.GLOBAL)),
+            "EclipseCCR": _CountingManagedRule(EclipseCCR, RuleDetails(ccrtype=CCRType.APP, executable="eclipse")),
+            "VSCodeCcrRule": _CountingManagedRule(VSCodeCcrRule, RuleDetails(ccrtype=CCRType.APP,
+                                                                             executable="code"))
+        }
+        self.incremental_merger = TestIncrementalCCRMerger2._create_merger(IncrementalCCRMerger2)
+
+    @staticmethod
+    def _create_merger(merger_class):
+        transformers_runner = TransformersRunner(Mock())
+        return merger_class(transformers_runner, SimpleCompatibilityChecker(), ClassicMergingStrategy(), 4, Mock())
+
+    def _merge(self, merger, enabled):
+        ordered = [rcn for rcn in TestIncrementalCCRMerger2._ORDER if rcn in enabled]
+        return merger.merge_rules([self.managed_rules[rcn] for rcn in ordered], ConfigBasedRuleSetSorter(ordered))
+
+    @staticmethod
+    def _extract_merged_rule(repeat_rule):
+        return repeat_rule._extras["caster_base_sequence"]._child._children[0]._rule
+
+    @staticmethod
+    def _describe(merge_result):
+        """
+        Everything about a merge result which ends up in the engine, as plain data.
+        """
+        description = []
+        for repeat_rule, context in merge_result.ccr_rules_and_contexts:
+            rule = TestIncrementalCCRMerger2._extract_merged_rule(repeat_rule)
+            mapping = [(spec, action.__class__.__name__, getattr(action, "rdescript", None))
+                       for spec, action in rule._mapping.items() if spec != "list available commands"]
+            extras = sorted((name, extra.__class__.__name__) for name, extra in rule._extras.items())
+            defaults = sorted((k, repr(v)) for k, v in rule._defaults.items())
+            description.append((mapping, extras, defaults, str(context)))
+        return description, list(merge_result.all_rule_class_names), \
+            list(merge_result.rules_enabled_diff.newly_enabled), \
+            sorted(merge_result.rules_enabled_diff.newly_disabled)
+
+    def _assert_same_as_full_merge(self, enabled):
+        incremental_result = self._merge(self.incremental_merger, enabled)
+        full_result = self._merge(TestIncrementalCCRMerger2._create_merger(CCRMerger2), enabled)
+        self.assertEqual(TestIncrementalCCRMerger2._describe(full_result),
+                         TestIncrementalCCRMerger2._describe(incremental_result))
+        return incremental_result
+
+    def test_toggle_sequence_matches_full_merge(self):
+        """
+        Every step of a sequence of enables/disables (including knockouts and
+        app rules) should produce exactly what a full merge produces.
+        """
+        steps = [
+            ["Alphabet"],
+            ["Alphabet", "Navigation"],
+            ["Alphabet", "Navigation", "EclipseCCR"],
+            ["Alphabet", "Navigation", "EclipseCCR", "Java"],
+            ["Alphabet", "Navigation", "EclipseCCR", "Java", "Python"],
+            ["Alphabet", "Navigation", "EclipseCCR", "Python", "VSCodeCcrRule"],
+            ["Alphabet", "Navigation", "Python", "VSCodeCcrRule"],
+            ["Alphabet", "Navigation", "Punctuation", "Python", "VSCodeCcrRule"],
+            ["Navigation", "Punctuation", "Python", "VSCodeCcrRule", "EclipseCCR"],
+            [],
+            ["Alphabet", "EclipseCCR"]
+        ]
+        for enabled in steps:
+            self._assert_same_as_full_merge(enabled)
+
+    def test_unchanged_rules_not_reinstantiated(self):
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation"])
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation", "Punctuation"])
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation"])
+
+        self.assertEqual(1, self.managed_rules["Alphabet"].instantiations)
+        self.assertEqual(1, self.managed_rules["Navigation"].instantiations)
+        self.assertEqual(1, self.managed_rules["Punctuation"].instantiations)
+
+    def test_reregistered_rule_is_reinstantiated(self):
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation"])
+        old_alphabet = self.managed_rules["Alphabet"]
+        self.managed_rules["Alphabet"] = _CountingManagedRule(Alphabet, RuleDetails(ccrtype=CCRType.GLOBAL))
+        self._assert_same_as_full_merge(["Alphabet", "Navigation"])
+
+        self.assertEqual(1, old_alphabet.instantiations)
+        # once for the incremental merge, once for the comparison full merge
+        self.assertEqual(2, self.managed_rules["Alphabet"].instantiations)
+
+    def test_invalidated_rule_is_reinstantiated(self):
+        self._merge(self.incremental_merger, ["Alphabet"])
+        self.incremental_merger.invalidate_rule("Alphabet")
+        self._merge(self.incremental_merger, ["Alphabet"])
+
+        self.assertEqual(2, self.managed_rules["Alphabet"].instantiations)
+
+    def test_toggling_app_rule_reuses_global_merged_rule(self):
+        self.incremental_merger._merging_strategy = Mock(wraps=ClassicMergingStrategy())
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation", "EclipseCCR"])
+        self.assertEqual(2, self.incremental_merger._merging_strategy.merge_into_single.call_count)
+
+        self._merge(self.incremental_merger, ["Alphabet", "Navigation", "EclipseCCR", "VSCodeCcrRule"])
+        # only the new app rule's merged rule had to be built
+        self.assertEqual(3, self.incremental_merger._merging_strategy.merge_into_single.call_count)
+
+    def test_toggled_back_rules_reuse_repeat_rule(self):
+        merger = IncrementalCCRMerger2(TransformersRunner(Mock()), SimpleCompatibilityChecker(),
+                                       ClassicMergingStrategy(), 4, Mock(), repeat_rule_cache=RepeatRuleCache(4))
+
+        def repeat_rule(enabled):
+            return self._merge(merger, enabled).ccr_rules_and_contexts[0][0]
+
+        first = repeat_rule(["Alphabet", "Navigation"])
+        self.assertIsNot(first, repeat_rule(["Alphabet", "Navigation", "Punctuation"]))
+        self.assertIs(first, repeat_rule(["Alphabet", "Navigation"]))
+        self.assertEqual(1, merger._repeat_rule_cache.hits)
+
+    def test_unchanged_grammars_not_reloaded(self):
+        container = BasicGrammarContainer()
+
+        def remerge(enabled):
+            merge_result = self._merge(self.incremental_merger, enabled)
+            grammars = []
+            for index, (rule, context) in enumerate(merge_result.ccr_rules_and_contexts):
+                grammar = Grammar("ccr-test-{}-{}".format(len(enabled), index), context=context)
+                grammar.add_rule(rule)
+                grammars.append(grammar)
+            container.set_ccr(grammars)
+            return container.last_ccr_loads, container.last_ccr_unloads, container.last_ccr_reuses
+
+        try:
+            self.assertEqual((3, 0, 0), remerge(["Alphabet", "EclipseCCR", "VSCodeCcrRule"]))
+            # the global grammar's context changes and vscode's grammar goes; eclipse's grammar stays
+            self.assertEqual((1, 2, 1), remerge(["Alphabet", "EclipseCCR"]))
+            self.assertEqual((0, 0, 2), remerge(["Alphabet", "EclipseCCR"]))
+        finally:
+            container.wipe_ccr()
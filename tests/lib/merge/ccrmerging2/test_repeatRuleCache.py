@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from castervoice.lib.merge.ccrmerging2.repeat_rule_cache import RepeatRuleCache
+
+
+class _FakeGrammar(object):
+    def __init__(self, loaded):
+        self.loaded = loaded
+
+
+class _FakeRule(object):
+    def __init__(self):
+        self.grammar = None
+        self._enabled = False
+        self._active = False
+
+
+class TestRepeatRuleCache(TestCase):
+
+    def setUp(self):
+        self.cache = RepeatRuleCache(2)
+
+    def _put(self, key):
+        rule = _FakeRule()
+        self.cache.put(key, rule, [])
+        return rule
+
+    def test_get(self):
+        rule = self._put("a")
+        self.assertEqual((rule, []), self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_least_recently_used_evicted(self):
+        self._put("a")
+        self._put("b")
+        self.cache.get("a")
+        self._put("c")
+
+        self.assertEqual(2, len(self.cache))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertEqual(1, self.cache.evictions)
+
+    def test_rule_in_loaded_grammar_not_returned(self):
+        rule = self._put("a")
+        rule.grammar = _FakeGrammar(True)
+        self.assertIsNone(self.cache.get("a"))
+        rule.grammar.loaded = False
+        self.assertIs(rule, self.cache.get("a")[0])
+
+    def test_returned_rules_enabled(self):
+        rule = _FakeRule()
+        prepared_rule = _FakeRule()
+        self.cache.put("a", rule, [prepared_rule])
+        self.cache.get("a")
+        self.assertEqual([True, True], [rule._enabled, prepared_rule._enabled])
+        self.assertEqual([None, None], [rule._active, prepared_rule._active])
@@ -0,0 +1,151 @@
+from dragonfly import Grammar
+from mock import Mock
+
+from castervoice.lib.ctrl.mgr.rule_details import RuleDetails
+from castervoice.lib.merge.ccrmerging2.transformers.base_transformer import BaseRuleTransformer
+from castervoice.lib.merge.ccrmerging2.transformers.transformed_rule_cache import TransformedRuleCache
+from castervoice.lib.merge.ccrmerging2.transformers.transformers_runner import TransformersRunner
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+
+
+class _RuleA(MergeRule):
+    mapping = {
+        "alpha": NullAction(),
+        "bravo": NullAction()
+    }
+
+
+class _RuleB(MergeRule):
+    mapping = {
+        "charlie": NullAction()
+    }
+
+
+class _CountingTransformer(BaseRuleTransformer):
+    def __init__(self):
+        self.count = 0
+
+    def _transform(self, rule):
+        self.count += 1
+        mapping = rule.get_mapping()
+        mapping["delta"] = NullAction()
+        rule.__init__(name=rule.name, mapping=mapping, extras=rule.get_extras(), defaults=rule.get_defaults())
+        return rule
+
+    def _is_applicable(self, rule):
+        return True
+
+    def get_pronunciation(self):
+        return "counting"
+
+
+class TestTransformedRuleCache(SettingsEnabledTestCase):
+
+    def setUp(self):
+        self._set_setting(["paths", "GDEF_FILE"], "/mock/words.txt")
+        self.file_hashes = {}
+        self.cache = TransformedRuleCache(lambda file_path: self.file_hashes.get(file_path), max_size=2)
+        self.transformer = _CountingTransformer()
+        self.runner = TransformersRunner(Mock(), self.cache)
+        self.runner._transformers.append(self.transformer)
+        self.details = RuleDetails(ccrtype="global")
+        self.file_hashes[self.details.get_filepath()] = "hash1"
+
+    def test_unchanged_rule_skips_transformers(self):
+        first = self.runner.transform_rule(_RuleA(), self.details)
+        second = self.runner.transform_rule(_RuleA(), self.details)
+
+        self.assertEqual(1, self.transformer.count)
+        self.assertIn("delta", second._mapping)
+        self.assertEqual(list(first._mapping.keys()), list(second._mapping.keys()))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_changed_file_hash_misses(self):
+        self.runner.transform_rule(_RuleA(), self.details)
+        self.file_hashes[self.details.get_filepath()] = "hash2"
+        self.runner.transform_rule(_RuleA(), self.details)
+
+        self.assertEqual(2, self.transformer.count)
+
+    def test_changed_transformer_set_misses(self):
+        self.runner.transform_rule(_RuleA(), self.details)
+        self.runner._transformers.append(_CountingTransformer())
+        self.runner.transform_rule(_RuleA(), self.details)
+
+        self.assertEqual(2, self.transformer.count)
+
+    def test_unwatched_rule_not_cached(self):
+        details = RuleDetails(name="internal rule", watch_exclusion=True)
+        self.runner.transform_rule(_RuleA(), details)
+        self.runner.transform_rule(_RuleA(), details)
+
+        self.assertEqual(2, self.transformer.count)
+        self.assertEqual(0, len(self.cache))
+
+    def test_no_details_not_cached(self):
+        self.runner.transform_rule(_RuleA())
+        self.runner.transform_rule(_RuleA())
+
+        self.assertEqual(2, self.transformer.count)
+
+    def test_least_recently_used_evicted(self):
+        details_with_name = RuleDetails(name="other", ccrtype="global")
+        self.runner.transform_rule(_RuleA(), self.details)
+        self.runner.transform_rule(_RuleB(), self.details)
+        self.runner.transform_rule(_RuleA(), self.details)  # A is now most recently used
+        self.runner.transform_rule(_RuleA(), details_with_name)  # evicts B
+        self.assertEqual(2, len(self.cache))
+
+        self.runner.transform_rule(_RuleA(), self.details)
+        self.assertEqual(3, self.transformer.count)
+        self.runner.transform_rule(_RuleB(), self.details)
+        self.assertEqual(4, self.transformer.count)
+
+    def test_cached_rule_is_detached_from_grammar(self):
+        rule = self.runner.transform_rule(_RuleA(), self.details)
+        grammar = Grammar("test")
+        grammar.add_rule(rule)
+        rule.disable()
+
+        cached = self.runner.transform_rule(_RuleA(), self.details)
+        self.assertIsNot(rule, cached)
+        self.assertIsNone(cached.grammar)
+        self.assertTrue(cached.enabled)
+
+    def test_changed_words_txt_misses(self):
+        import os
+        import shutil
+        import tempfile
+        directory = tempfile.mkdtemp()
+        try:
+            words_txt = os.path.join(directory, "words.txt")
+            with open(words_txt, "w") as f:
+                f.write("alpha -> able\n")
+            self._set_setting(["paths", "GDEF_FILE"], words_txt)
+            self.runner.transform_rule(_RuleA(), self.details)
+            self.runner.transform_rule(_RuleA(), self.details)
+            self.assertEqual(1, self.transformer.count)
+
+            # edited during the session
+            with open(words_txt, "w") as f:
+                f.write("alpha -> arch\nbravo -> brav\n")
+            self.runner.transform_rule(_RuleA(), self.details)
+            self.assertEqual(2, self.transformer.count)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_imported_modules_not_in_key(self):
+        """
+        Only the rule's own file is: a rule is only reloaded when its own file changes.
+        """
+        self.runner.transform_rule(_RuleA(), self.details)
+
+        # e.g. a module which _RuleA's file imports was changed and re-imported
+        reimported_rule_class = type("_RuleA", (MergeRule,), {"mapping": {"alpha": NullAction()},
+                                                              "__module__": __name__})
+        cached = self.runner.transform_rule(reimported_rule_class(), self.details)
+
+        self.assertEqual(1, self.transformer.count)
+        self.assertIn("bravo", cached._mapping)
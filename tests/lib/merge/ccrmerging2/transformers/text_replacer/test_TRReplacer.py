@@ -0,0 +1,77 @@
+import random
+from collections import OrderedDict
+from unittest import TestCase
+
+from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.tr_replacer import TRReplacer
+
+
+def _replace_sequentially(text, definitions, steps=None):
+    """The original text replacer behavior."""
+    for source in definitions.keys():
+        if source in text:
+            text = text.replace(source, definitions[source])
+            if steps is not None:
+                steps.append(text)
+    return text
+
+
+class TestTRReplacer(TestCase):
+
+    def _assert_same_as_sequential(self, definitions, texts):
+        replacer = TRReplacer(definitions)
+        for text in texts:
+            message = "definitions: {}, text: {}".format(list(definitions.items()), text)
+            steps = []
+            self.assertEqual(_replace_sequentially(text, definitions, steps), replacer.replace(text), message)
+            self.assertEqual(steps, replacer.replace_in_steps(text), message)
+
+    def test_no_definitions(self):
+        self._assert_same_as_sequential(OrderedDict(), ["anything", ""])
+
+    def test_independent_definitions(self):
+        definitions = OrderedDict([("clear", "bear"), ("shock", "earthquake")])
+        self.assertTrue(TRReplacer(definitions)._independent)
+        self._assert_same_as_sequential(definitions, ["clear <?> shock", "shocking clearly", "nothing", "clearclear"])
+
+    def test_chained_definitions(self):
+        definitions = OrderedDict([("alpha", "bravo"), ("bravo", "charlie")])
+        self.assertFalse(TRReplacer(definitions)._independent)
+        self._assert_same_as_sequential(definitions, ["alpha", "bravo alpha", "charlie"])
+
+    def test_chain_against_file_order(self):
+        definitions = OrderedDict([("bravo", "charlie"), ("alpha", "bravo")])
+        self._assert_same_as_sequential(definitions, ["alpha", "bravo alpha"])
+
+    def test_containing_and_overlapping_sources(self):
+        definitions = OrderedDict([("go", "went"), ("go to", "visit"), ("to line", "toline"), ("ne", "knee")])
+        self._assert_same_as_sequential(definitions, ["go to line <?>", "gone", "to line", "go"])
+
+    def test_replacement_forms_source_across_boundary(self):
+        definitions = OrderedDict([("ab", "c"), ("cd", "e")])
+        self._assert_same_as_sequential(definitions, ["abd", "ab d", "cd"])
+
+    def test_empty_target_joins_text(self):
+        definitions = OrderedDict([("x", ""), ("ab", "z")])
+        self._assert_same_as_sequential(definitions, ["axb", "ab", "xx"])
+
+    def test_steps_include_unchanged_replacement(self):
+        definitions = OrderedDict([("same", "same"), ("a", "b")])
+        self.assertEqual(["same", "sbme"], TRReplacer(definitions).replace_in_steps("same"))
+
+    def test_empty_source(self):
+        definitions = OrderedDict([("", "-"), ("a", "b")])
+        self._assert_same_as_sequential(definitions, ["abc", ""])
+
+    def test_random_definitions(self):
+        """
+        Small alphabets make chains, overlaps and containment very likely.
+        """
+        rng = random.Random(1234)
+        alphabet = "ab c"
+        for _ in range(300):
+            definitions = OrderedDict()
+            for _ in range(rng.randint(1, 6)):
+                source = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3)))
+                definitions[source] = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+            texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(10)]
+            self._assert_same_as_sequential(definitions, texts)
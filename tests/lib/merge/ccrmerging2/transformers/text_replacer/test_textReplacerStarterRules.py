@@ -0,0 +1,126 @@
+import random
+from collections import OrderedDict
+
+import six
+from dragonfly.grammar.elements import Choice
+
+from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.text_replacer import _spec_override_from_config
+from castervoice.lib.merge.ccrmerging2.transformers.text_replacer.tr_definitions import TRDefinitions
+from tests.lib.merge.ccrmerging2.transformers.text_replacer.legacy_text_replacer import \
+    legacy_spec_override_from_config
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+from tests.test_util.starter_rules import get_starter_rules
+
+
+def _get_words(rules):
+    specs_words = set()
+    extras_words = set()
+    defaults_words = set()
+    for rule_class, _ in rules:
+        rule = rule_class()
+        for spec in rule._mapping.keys():
+            specs_words.update(w for w in spec.replace("[", " ").replace("]", " ").split() if w.isalpha())
+        for extra in rule._extras.values():
+            if isinstance(extra, Choice):
+                for key in extra._choices.keys():
+                    extras_words.update(w for w in key.split() if w.isalpha())
+        for value in rule._defaults.values():
+            if isinstance(value, six.string_types):
+                defaults_words.update(w for w in value.split() if w.isalpha())
+    return sorted(specs_words), sorted(extras_words), sorted(defaults_words)
+
+
+def _make_group(words, count, rng, tricky):
+    """
+    Tricky definitions include chains (one's replacement is another's source)
+    and parts of words as sources, so that the order of definitions matters.
+    Otherwise they're like a typical words.txt: whole words replaced by other words
+    (upper case here, so that no replacement forms another source).
+    """
+    definitions = OrderedDict()
+    if not tricky:
+        words = [w for w in words if w.islower()]
+    if len(words) == 0:
+        return definitions
+    for _ in range(count):
+        source = rng.choice(words)
+        if tricky and len(source) > 3 and rng.random() < 0.2:
+            source = source[:rng.randint(2, len(source) - 1)]
+        if tricky and rng.random() < 0.2 and len(definitions) > 0:
+            target = rng.choice(list(definitions.keys()))
+        elif tricky:
+            target = rng.choice(words) + rng.choice(["", "s", " " + rng.choice(words)])
+        else:
+            target = rng.choice(words).upper()
+        if source != target:
+            definitions[source] = target
+    return definitions
+
+
+def make_starter_rule_definitions(rules, count, seed, tricky=True):
+    """
+    :param rules: list of (rule class, RuleDetails)
+    :param count: int, how many definitions to attempt per group
+    :param seed: random seed, so that every run uses the same definitions
+    :param tricky: bool, see _make_group
+    :return: TRDefinitions made from words which occur in the rules
+    """
+    rng = random.Random(seed)
+    specs_words, extras_words, defaults_words = _get_words(rules)
+    return TRDefinitions(_make_group(specs_words, count, rng, tricky),
+                         _make_group(extras_words, count, rng, tricky),
+                         _make_group(defaults_words, count, rng, tricky))
+
+
+def _describe(rule):
+    extras = {}
+    for name, extra in rule._extras.items():
+        if isinstance(extra, Choice):
+            extras[name] = sorted(extra._choices.items(), key=lambda item: item[0])
+        else:
+            extras[name] = extra.__class__.__name__
+    return list(rule._mapping.keys()), extras, sorted((k, repr(v)) for k, v in rule._defaults.items())
+
+
+def _apply(override_fn, rule_class, definitions):
+    try:
+        return _describe(override_fn(rule_class(), definitions))
+    except Exception as e:
+        return e.__class__.__name__
+
+
+class TestTextReplacerStarterRules(SettingsEnabledTestCase):
+    """
+    The compiled replacers must change the starter rules exactly the way
+    the original one-definition-at-a-time replacement did.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rules = get_starter_rules(include_selfmod=False)
+
+    def test_starter_rules_found(self):
+        self.assertGreater(len(self.rules), 50)
+
+    def _assert_same_as_legacy(self, definitions):
+        changed = 0
+        for rule_class, _ in self.rules:
+            expected = _apply(legacy_spec_override_from_config, rule_class, definitions)
+            actual = _apply(_spec_override_from_config, rule_class, definitions)
+            self.assertEqual(expected, actual, rule_class.__name__)
+            if expected != _describe(rule_class()):
+                changed += 1
+        return changed
+
+    def test_same_as_legacy(self):
+        for seed in range(3):
+            changed = self._assert_same_as_legacy(make_starter_rule_definitions(self.rules, 40, seed))
+            self.assertGreater(changed, 0)
+
+    def test_same_as_legacy_many_definitions(self):
+        changed = self._assert_same_as_legacy(make_starter_rule_definitions(self.rules, 300, 99))
+        self.assertGreater(changed, 0)
+
+    def test_same_as_legacy_typical_definitions(self):
+        changed = self._assert_same_as_legacy(make_starter_rule_definitions(self.rules, 300, 7, tricky=False))
+        self.assertGreater(changed, 0)
@@ -0,0 +1,87 @@
+import unittest
+
+from mock import Mock
+
+from castervoice.lib.merge.state.scheduler import AsynchronousScheduler
+
+
+class TestAsynchronousScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.timers = []
+        self.scheduler = AsynchronousScheduler(0.1, self._create_timer, lambda: self.now)
+        self.runs = []
+
+    def _create_timer(self, callback, seconds):
+        timer = Mock()
+        timer.callback = callback
+        self.timers.append(timer)
+        return timer
+
+    def _tick_at(self, now):
+        self.now = now
+        self.timers[-1].callback()
+
+    def _task(self, name):
+        return lambda: self.runs.append(name)
+
+    def test_one_timer_for_all_tasks(self):
+        self.scheduler.schedule(self._task("a"), 0.2)
+        self.scheduler.schedule(self._task("b"), 0.5)
+        self.assertEqual(1, len(self.timers))
+        self.assertEqual(2, self.scheduler.get_active_task_count())
+
+    def test_tasks_run_at_their_deadlines(self):
+        self.scheduler.schedule(self._task("a"), 2)
+        self.scheduler.schedule(self._task("b"), 5)
+        for now in range(1, 11):
+            self._tick_at(now)
+        # due at the same time: the one which has been waiting longer first
+        self.assertEqual(["a", "a", "b", "a", "a", "b", "a"], self.runs)
+
+    def test_late_tick_runs_task_once(self):
+        self.scheduler.schedule(self._task("a"), 0.2)
+        self._tick_at(1.0)
+        self.assertEqual(["a"], self.runs)
+
+    def test_cancel(self):
+        task = self.scheduler.schedule(self._task("a"), 0.2)
+        other = self.scheduler.schedule(self._task("b"), 0.2)
+        self.scheduler.cancel(task)
+        self.scheduler.cancel(task)
+        self._tick_at(0.2)
+        self.assertEqual(["b"], self.runs)
+        self.assertEqual(1, self.scheduler.cancellations)
+        self.scheduler.cancel(other)
+        self.assertEqual(0, self.scheduler.get_active_task_count())
+        self.timers[-1].stop.assert_called_once_with()
+
+    def test_task_cancels_other_task(self):
+        tasks = []
+        tasks.append(self.scheduler.schedule(lambda: self.scheduler.cancel(tasks[1]), 0.2))
+        tasks.append(self.scheduler.schedule(self._task("b"), 0.2))
+        self._tick_at(0.2)
+        self.assertEqual([], self.runs)
+
+    def test_timer_restarts_after_last_task(self):
+        task = self.scheduler.schedule(self._task("a"), 0.2)
+        self.scheduler.cancel(task)
+        self.scheduler.schedule(self._task("b"), 0.2)
+        self.assertEqual(2, len(self.timers))
+        self._tick_at(0.2)
+        self.assertEqual(["b"], self.runs)
+
+    def test_wake(self):
+        arrived = []
+        self.scheduler.schedule(self._task("a"), 10, lambda: len(arrived) > 0)
+        self._tick_at(1)
+        arrived.append(True)
+        self._tick_at(2)
+        self.assertEqual(["a"], self.runs)
+        self.assertEqual(1, self.scheduler.wakes)
+        # the deadline starts over from the run
+        arrived.pop()
+        self._tick_at(10)
+        self._tick_at(12)
+        self.assertEqual(["a", "a"], self.runs)
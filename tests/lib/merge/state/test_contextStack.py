@@ -0,0 +1,114 @@
+from dragonfly import Function
+from mock import Mock
+
+from castervoice.lib.merge.state.actions import AsynchronousAction, ContextSeeker, RegisteredAction
+from castervoice.lib.merge.state.contextoptions import ContextLevel, ContextSet
+from castervoice.lib.merge.state.scheduler import AsynchronousScheduler
+from castervoice.lib.merge.state.stack import CasterState, ContextStack
+from tests.test_util import printer_mocking
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+
+
+class TestContextStack(SettingsEnabledTestCase):
+
+    def setUp(self):
+        self._set_setting(["miscellaneous", "print_rdescripts"], False)
+        self.state = CasterState()
+        self.nexus = Mock()
+        self.nexus.state = self.state
+        self.executed = []
+
+    def _command(self, rspec):
+        action = RegisteredAction(Function(lambda: self.executed.append(rspec)), rspec=rspec)
+        action.set_nexus(self.nexus)
+        return action
+
+    def _seeker(self, name, *levels):
+        """
+        :param levels: lists of trigger lists, one per context level
+        """
+        forward = []
+        for index, level in enumerate(levels):
+            sets = [ContextSet(triggers, lambda triggers=triggers, index=index:
+                               self.executed.append((name, index, triggers[0])))
+                    for triggers in level]
+            forward.append(ContextLevel(*sets))
+        seeker = ContextSeeker(forward=forward, rspec=name)
+        seeker.set_nexus(self.nexus)
+        return seeker
+
+    def test_forward_seeker_consumes_trigger(self):
+        self._seeker("seeker", [["default"], ["go"]]).execute()
+        self._command("go").execute()
+        self.assertEqual([("seeker", 0, "go")], self.executed)
+        self.assertEqual([], self.state.stack.get_incomplete_seekers())
+
+    def test_wildcard_trigger(self):
+        self._seeker("seeker", [["default"], ["*"]]).execute()
+        self._command("anything").execute()
+        self.assertEqual([("seeker", 0, "*")], self.executed)
+
+    def test_all_satisfied_seekers_execute(self):
+        # a forward seeker fills the next level of the seekers before it
+        self._seeker("first", [["default"]], [["go"]]).execute()
+        self._seeker("second", [["go"]]).execute()
+        self.assertEqual(2, len(self.state.stack.get_incomplete_seekers()))
+        self._command("go").execute()
+        self.assertEqual([("first", 0, "default"), ("first", 1, "go"), ("second", 0, "go")], self.executed)
+
+    def test_stack_size(self):
+        stack = ContextStack(self.state, 2)
+        self.state.stack = stack
+        self._seeker("seeker", [["a"]], [["b"]], [["c"]]).execute()
+        self._command("a").execute()
+        self._command("b").execute()
+        # the seeker fell off the end of the stack before its last level
+        self._command("c").execute()
+        self.assertEqual(2, len(stack.list))
+        self.assertEqual([], stack.get_incomplete_seekers())
+        self.assertEqual(["c"], self.executed)
+
+    def test_stack_size_at_least_one(self):
+        spy = printer_mocking.printer_spy()
+        stack = ContextStack(self.state, 0)
+        self.assertEqual(1, len(spy.printed))
+        self.state.stack = stack
+        self._command("a").execute()
+        self._command("b").execute()
+        self.assertEqual(1, stack.max_list_size)
+        self.assertEqual(["a", "b"], self.executed)
+
+    def test_context_set_triggers(self):
+        context_set = ContextSet(["one", "two"], None)
+        self.assertTrue(context_set.is_triggered_by("two"))
+        self.assertFalse(context_set.is_triggered_by("three"))
+
+    def test_stack_items_are_compact(self):
+        self._command("go").execute()
+        self._seeker("seeker", [["go"]]).execute()
+        for stack_item in self.state.stack.list:
+            self.assertFalse(hasattr(stack_item, "__dict__"))
+
+    def test_asynchronous_actions_share_scheduler(self):
+        self.state.scheduler = AsynchronousScheduler(0.1, lambda callback, seconds: Mock())
+        polls = []
+        for _ in range(2):
+            action = AsynchronousAction([ContextLevel(ContextSet(["cancel"], lambda: polls.append(1)))],
+                                        blocking=False)
+            action.set_nexus(self.nexus)
+            action.execute()
+        self.assertEqual(2, len(polls))
+        self.assertEqual(2, self.state.scheduler.get_active_task_count())
+        self._command("cancel").execute()
+        self.assertEqual(0, self.state.scheduler.get_active_task_count())
+
+    def test_terminate_asynchronous(self):
+        self.state.scheduler = AsynchronousScheduler(0.1, lambda callback, seconds: Mock())
+        action = AsynchronousAction([ContextLevel(ContextSet(["cancel"], lambda: False))])
+        action.set_nexus(self.nexus)
+        action.execute()
+        self.assertEqual(1, self.state.scheduler.get_active_task_count())
+        self.state.terminate_asynchronous(True)
+        self.assertEqual(0, self.state.scheduler.get_active_task_count())
+        self.assertIsNone(self.state.blocker)
+        self.state.terminate_asynchronous(True)
@@ -0,0 +1,50 @@
+from mock import patch
+
+from castervoice.lib import available_commands_tracker
+from castervoice.lib.merge.available_commands_listing import AvailableCommandsListing
+from castervoice.lib.merge.mergerule import MergeRule
+from castervoice.lib.merge.state.actions2 import NullAction
+from tests.test_util.settings_mocking import SettingsEnabledTestCase
+
+
+class _ListedRule(MergeRule):
+    mapping = {
+        "beta": NullAction(),
+        "alpha": NullAction()
+    }
+
+
+class TestAvailableCommandsListing(SettingsEnabledTestCase):
+
+    def setUp(self):
+        self._set_setting(["miscellaneous", "available_commands_page_size"], 0)
+        self.listing = AvailableCommandsListing(["a", "b", "c", "d", "e"])
+
+    def tearDown(self):
+        self._set_setting(["miscellaneous", "available_commands_page_size"], 0)
+
+    def _list_commands(self):
+        with patch("castervoice.lib.printer.out") as out:
+            self.listing.list_commands()
+        return out.call_args[0][0]
+
+    def test_all_commands(self):
+        self.assertEqual("a\nb\nc\nd\ne", self._list_commands())
+        self.assertEqual("a\nb\nc\nd\ne", available_commands_tracker.get_instance().get_available_commands())
+
+    def test_pages(self):
+        self._set_setting(["miscellaneous", "available_commands_page_size"], 2)
+        self.assertEqual("Available commands, page 1 of 3:\na\nb", self._list_commands())
+        self.assertEqual("Available commands, page 2 of 3:\nc\nd", self._list_commands())
+        self.assertEqual("Available commands, page 3 of 3:\ne", self._list_commands())
+        self.assertEqual("Available commands, page 1 of 3:\na\nb", self._list_commands())
+
+    def test_listing_not_built_by_merger_preparation(self):
+        tracker = available_commands_tracker.get_instance()
+        tracker.set_available_commands("before")
+        prepared_rule = _ListedRule().prepare_for_merger()
+        self.assertEqual("before", tracker.get_available_commands())
+
+        with patch("castervoice.lib.printer.out") as out:
+            prepared_rule._mapping["list available commands"].execute()
+        out.assert_called_with("alpha\nbeta")
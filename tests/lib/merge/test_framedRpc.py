@@ -0,0 +1,187 @@
+import socket
+import threading
+import time
+import unittest
+
+import six
+if six.PY2:
+    from SimpleXMLRPCServer import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler  # pylint: disable=import-error
+    import xmlrpclib  # pylint: disable=import-error
+else:
+    from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler  # pylint: disable=no-name-in-module
+    import xmlrpc.client as xmlrpclib
+
+from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.framed_rpc import CasterRPCServer, FramedProxy, FramedRPCError, HANDSHAKE, \
+    read_frame, write_frame
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind((Communicator.LOCALHOST, 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class _QuietRequestHandler(SimpleXMLRPCRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _raise_error():
+    raise ValueError("bad value")
+
+
+class TestFramedRPC(unittest.TestCase):
+
+    def setUp(self):
+        self.port = _free_port()
+        self.servers = []
+        self.proxies = []
+
+    def tearDown(self):
+        for proxy in self.proxies:
+            proxy.close()
+        for server in self.servers:
+            self._stop(server)
+
+    def _start(self, server_class=CasterRPCServer):
+        if server_class is CasterRPCServer:
+            server = CasterRPCServer((Communicator.LOCALHOST, self.port))
+        else:
+            server = server_class((Communicator.LOCALHOST, self.port), _QuietRequestHandler, allow_none=True)
+        server.register_function(lambda x, y: [x + 1, y + 1], "move_mouse")
+        server.register_function(_raise_error, "raise_error")
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.servers.append(server)
+        return server
+
+    def _stop(self, server):
+        if server in self.servers:
+            self.servers.remove(server)
+            server.shutdown()
+            server.server_close()
+
+    def _proxy(self, handshake_seconds=1.0):
+        proxy = FramedProxy(Communicator.LOCALHOST, self.port, handshake_seconds)
+        self.proxies.append(proxy)
+        return proxy
+
+    def test_framed_calls(self):
+        self._start()
+        proxy = self._proxy()
+        for i in range(3):
+            self.assertEqual([i + 1, 2], proxy.move_mouse(i, 1))
+        self.assertTrue(proxy.ping())
+        self.assertTrue(proxy.is_framed())
+
+    def test_error(self):
+        self._start()
+        proxy = self._proxy()
+        with self.assertRaises(FramedRPCError):
+            proxy.raise_error()
+        with self.assertRaises(FramedRPCError):
+            proxy.missing_function()
+        self.assertEqual([1, 1], proxy.move_mouse(0, 0))
+
+    def test_handshake_in_pieces(self):
+        self._start()
+        client = socket.create_connection((Communicator.LOCALHOST, self.port))
+        try:
+            client.sendall(HANDSHAKE[:2])
+            time.sleep(0.1)
+            client.sendall(HANDSHAKE[2:])
+            write_frame(client.sendall, {"method": "move_mouse", "params": [1, 2]})
+            read_file = client.makefile("rb")
+            self.assertEqual(HANDSHAKE, read_file.read(len(HANDSHAKE)))
+            self.assertEqual({"result": [2, 3]}, read_frame(read_file))
+            read_file.close()
+        finally:
+            client.close()
+
+    def test_xmlrpc_clients_still_work(self):
+        self._start()
+        xmlrpc_proxy = xmlrpclib.ServerProxy("http://{}:{}".format(Communicator.LOCALHOST, self.port))
+        self.assertEqual([2, 3], xmlrpc_proxy.move_mouse(1, 2))
+        self.assertEqual([3, 4], xmlrpc_proxy.move_mouse(2, 3))
+        xmlrpc_proxy("close")()
+
+    def test_falls_back_to_xmlrpc(self):
+        self._start(SimpleXMLRPCServer)
+        proxy = self._proxy(0.2)
+        self.assertEqual([2, 3], proxy.move_mouse(1, 2))
+        self.assertFalse(proxy.is_framed())
+        self.assertEqual([3, 4], proxy.move_mouse(2, 3))
+
+    def test_server_not_serving_yet_doesnt_fall_back_for_good(self):
+        server = CasterRPCServer((Communicator.LOCALHOST, self.port))
+        server.register_function(lambda x, y: [x + 1, y + 1], "move_mouse")
+        self.servers.append(server)
+        # as a grid window does: bind now, serve a moment later
+        thread = threading.Timer(0.4, server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        proxy = self._proxy(0.2)
+        self.assertEqual([2, 3], proxy.move_mouse(1, 2))
+        self.assertTrue(proxy.is_framed())
+        self.assertEqual([3, 4], proxy.move_mouse(2, 3))
+        self.assertIsNotNone(proxy._socket)
+
+    def test_functions_called_one_at_a_time(self):
+        server = self._start()
+        running = {"now": 0, "most": 0}
+
+        def slow():
+            running["now"] += 1
+            running["most"] = max(running["most"], running["now"])
+            time.sleep(0.05)
+            running["now"] -= 1
+            return True
+
+        server.register_function(slow, "slow")
+        proxies = [self._proxy() for _ in range(3)]
+        threads = [threading.Thread(target=proxy.slow) for proxy in proxies]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, running["most"])
+
+    def test_reconnects_to_restarted_server(self):
+        server = self._start()
+        proxy = self._proxy()
+        self.assertEqual([1, 1], proxy.move_mouse(0, 0))
+        self._stop(server)
+        proxy_connection = proxy._socket
+        proxy_connection.shutdown(socket.SHUT_RDWR)  # as the closed window's process exiting would
+        self._start()
+        self.assertEqual([2, 2], proxy.move_mouse(1, 1))
+
+    def test_no_server(self):
+        proxy = self._proxy()
+        with self.assertRaises(socket.error):
+            proxy.ping()
+
+
+class TestCommunicatorLiveness(unittest.TestCase):
+
+    def test_is_alive_is_cached(self):
+        port = _free_port()
+        comm = Communicator()
+        comm.com_registry["grids"] = port
+        self.assertFalse(comm.is_alive("grids"))
+        server = CasterRPCServer((Communicator.LOCALHOST, port))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            self.assertFalse(comm.is_alive("grids"))
+            comm._liveness.clear()
+            self.assertTrue(comm.is_alive("grids"))
+        finally:
+            comm.get_com("grids").close()
+            server.shutdown()
+            server.server_close()
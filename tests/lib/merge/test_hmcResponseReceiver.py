@@ -0,0 +1,111 @@
+import socket
+import unittest
+
+from mock import Mock, patch
+
+from castervoice.lib.merge.communication import Communicator
+from castervoice.lib.merge.hmc_response_receiver import HMCResponseReceiver
+from castervoice.lib.merge.state.actions import AsynchronousAction
+
+
+def _free_port():
+    s = socket.socket()
+    s.bind((Communicator.LOCALHOST, 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class TestHMCResponseReceiver(unittest.TestCase):
+
+    def setUp(self):
+        port = _free_port()
+        self.receiver = HMCResponseReceiver(port)
+        self.comm = Communicator()
+        self.comm.com_registry["hmc_response"] = port
+
+    def tearDown(self):
+        self.receiver.stop()
+
+    def test_push_response(self):
+        self.assertTrue(self.receiver.start())
+        launch_id = self.receiver.new_launch()
+        self.assertFalse(self.receiver.has_response(launch_id))
+        self.assertTrue(self.comm.push_hmc_response(lambda: {"mode": "confirm", "confirm": 1}, launch_id))
+        self.assertTrue(self.receiver.has_response(launch_id))
+        self.assertEqual({"mode": "confirm", "confirm": 1}, self.receiver.take_response(launch_id))
+        self.assertIsNone(self.receiver.take_response(launch_id))
+        self.assertEqual(1, len(self.receiver.latencies))
+        self.assertGreaterEqual(self.receiver.latencies[0], 0)
+
+    def test_not_listening(self):
+        get_message = Mock()
+        self.assertFalse(self.receiver.is_listening())
+        self.assertFalse(self.comm.push_hmc_response(get_message, 1))
+        get_message.assert_not_called()
+
+    def test_not_launched_by_caster(self):
+        self.receiver.start()
+        get_message = Mock()
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertFalse(self.comm.push_hmc_response(get_message))
+        get_message.assert_not_called()
+
+    def test_launch_id_from_environment(self):
+        self.receiver.start()
+        launch_id = self.receiver.new_launch()
+        with patch.dict("os.environ", {Communicator.HMC_LAUNCH_ID_VARIABLE: str(launch_id)}):
+            self.assertTrue(self.comm.push_hmc_response(lambda: ["response"]))
+        self.assertEqual(["response"], self.receiver.take_response(launch_id))
+
+    def test_late_response_only_taken_by_its_launch(self):
+        self.receiver.start()
+        old_id = self.receiver.new_launch()
+        new_id = self.receiver.new_launch()
+        self.comm.push_hmc_response(lambda: ["old"], old_id)
+        self.assertFalse(self.receiver.has_response(new_id))
+        self.assertIsNone(self.receiver.take_response(new_id))
+        self.assertEqual(["old"], self.receiver.take_response(old_id))
+
+    def test_untaken_responses_dropped(self):
+        self.receiver.start()
+        launch_id = self.receiver.new_launch()
+        self.receiver._respond(["stale"], 0, launch_id)
+        self.receiver.new_launch()
+        self.assertIsNone(self.receiver.take_response(launch_id))
+        self.assertEqual(0, len(self.receiver.latencies))
+
+
+class TestHMCComplete(unittest.TestCase):
+
+    def setUp(self):
+        self.nexus = Mock()
+        self.nexus.hmc_responses = HMCResponseReceiver(0)
+        patcher = patch("castervoice.lib.control.nexus", return_value=self.nexus)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_takes_only_its_own_response(self):
+        data_function = Mock()
+        old_id = self.nexus.hmc_responses.new_launch()
+        new_id = self.nexus.hmc_responses.new_launch()
+        check_complete = AsynchronousAction.hmc_complete(data_function, new_id)
+        self.nexus.hmc_responses._respond(["old"], 0, old_id)
+        self.assertFalse(check_complete.wake())
+
+        self.nexus.hmc_responses._respond(["new"], 0, new_id)
+        self.assertTrue(check_complete.wake())
+        self.assertTrue(check_complete())
+        data_function.assert_called_once_with(["new"])
+
+    def test_closed_window_ends_action(self):
+        data_function = Mock()
+        check_complete = AsynchronousAction.hmc_complete(data_function, self.nexus.hmc_responses.new_launch())
+        self.nexus.comm.is_alive.return_value = True
+        self.assertFalse(any(check_complete() for _ in range(20)))
+
+        self.nexus.comm.is_alive.return_value = False
+        results = [check_complete() for _ in range(10)]
+        self.assertEqual([False] * 9 + [True], results)
+        self.nexus.comm.is_alive.assert_called_with("hmc")
+        data_function.assert_not_called()
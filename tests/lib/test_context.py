@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from dragonfly import AppContext, Context
+from mock import patch
+
+from castervoice.lib.context import CachedContext, ForegroundContextCache
+
+
+class _SwitchContext(Context):
+
+    def __init__(self):
+        super(_SwitchContext, self).__init__()
+        self.enabled = False
+
+    def matches(self, executable, title, handle):
+        return self.enabled
+
+
+class TestForegroundContextCache(TestCase):
+
+    _ECLIPSE = ("C:\\eclipse\\eclipse.exe", "Java - Eclipse", 1)
+    _FIREFOX = ("C:\\firefox\\firefox.exe", "Mozilla Firefox", 2)
+
+    def setUp(self):
+        self.cache = ForegroundContextCache()
+        self.contexts = [self.cache.cached(AppContext(executable="eclipse")),
+                         self.cache.cached(AppContext(executable="firefox")),
+                         self.cache.cached(AppContext(title="eclipse"))]
+
+    def _matches(self, window):
+        return [context.matches(*window) for context in self.contexts]
+
+    def test_same_results_as_contexts(self):
+        for window in (TestForegroundContextCache._ECLIPSE, TestForegroundContextCache._FIREFOX):
+            self.assertEqual([context.get_context().matches(*window) for context in self.contexts],
+                             self._matches(window))
+
+    def test_matched_once_per_window(self):
+        with patch.object(AppContext, "matches", autospec=True, side_effect=AppContext.matches) as matches:
+            self._matches(TestForegroundContextCache._ECLIPSE)
+            self._matches(TestForegroundContextCache._ECLIPSE)
+            self.assertEqual(3, matches.call_count)
+            self._matches(TestForegroundContextCache._FIREFOX)
+            self.assertEqual(6, matches.call_count)
+        self.assertEqual(3, self.cache.hits)
+        self.assertEqual(6, self.cache.misses)
+
+    def test_other_contexts_not_cached(self):
+        switch_context = _SwitchContext()
+        self.assertIs(switch_context, self.cache.cached(switch_context))
+        self.assertIsNone(self.cache.cached(None))
+        self.assertFalse(self.cache.matches(switch_context, *TestForegroundContextCache._ECLIPSE))
+        switch_context.enabled = True
+        self.assertTrue(self.cache.matches(switch_context, *TestForegroundContextCache._ECLIPSE))
+
+    def test_cached_context_wraps_context(self):
+        self.assertIsInstance(self.contexts[0], CachedContext)
+        self.assertEqual(str(self.contexts[0].get_context()), self.contexts[0]._str)
@@ -0,0 +1,41 @@
+import importlib
+import os
+
+from castervoice.lib.ctrl.mgr.loading.load.content_request_generator import ContentRequestGenerator
+from castervoice.lib.ctrl.mgr.loading.load.content_type import ContentType
+from castervoice.lib.merge.selfmod.selfmodrule import BaseSelfModifyingRule
+from castervoice.lib.util import recognition_history
+from tests.test_util import utilities_mocking
+
+
+def get_starter_rules(include_selfmod=True):
+    """
+    Finds every rule module in the starter rules directory the same way Caster does,
+    and returns its get_rule() content.
+
+    :param include_selfmod: bool, selfmod rules need their config paths in the settings to be instantiated
+    :return: list of (rule class, RuleDetails)
+    """
+    recognition_history.get_and_register_history = lambda x: None
+    utilities_mocking.mock_toml_files()
+
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    rules_dir = os.path.join(package_root, "castervoice", "rules")
+    requests = ContentRequestGenerator().get_all_content_modules(rules_dir)
+
+    rules = []
+    for request in sorted(requests, key=lambda r: (r.directory, r.module_name)):
+        if request.content_type != ContentType.GET_RULE:
+            continue
+        package = os.path.relpath(request.directory, package_root).replace(os.sep, ".")
+        try:
+            module = importlib.import_module(package + "." + request.module_name)
+            rule_class, details = module.get_rule()
+        except Exception:  # rules which need a fully initialized Caster (e.g. user paths) are skipped
+            continue
+        if not include_selfmod and issubclass(rule_class, BaseSelfModifyingRule):
+            continue
+        if rule_class.__name__ == "HistoryRule":
+            rule_class._setup_recognition_history = lambda: None
+        rules.append((rule_class, details))
+    return rules